@@ -0,0 +1 @@
+"""Performance measurements for lethal and the dungeon. Not part of the test suite."""
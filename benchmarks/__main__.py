@@ -0,0 +1,7 @@
+"""python -m benchmarks: run the benchmark suite (see benchmarks.suite)"""
+
+import sys
+
+from .suite import main
+
+sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""World load cost: Entity.from_dict over many serialized entities.
+
+    python -m benchmarks.load [count]
+
+Also times the kind lookup alone, against the recursive __subclasses__ walk find_class used to do.
+"""
+
+import sys
+import time
+from typing import Any, Callable
+
+from lethal import Component, Entity, EntityStore, Loc
+from lethal.ecs import EntityDict
+from dungeon.dungeon_comps import Drawable, Health, Mob, Room, Text
+
+
+def serialized_world(count: int) -> list[EntityDict]:
+    """count mobs, as Entity.to_dict dicts"""
+    estore = EntityStore()
+    for i in range(count):
+        ent = estore.create_entity()
+        ent.take(Mob(cat="enemy", name="Slime"))
+        ent.take(Health(max=3, current=3))
+        ent.take(Text(text="@"))
+        ent.take(Loc(x=i % 80, y=i % 15))
+        ent.take(Room(room_id=f"room{i % 4}"))
+        ent.take(Drawable())
+    return [ent.to_dict() for ent in estore.entities.values()]
+
+
+def walk_subclasses(cls: type, name: str) -> type | None:
+    """The old Component.find_class"""
+    if cls.__name__ == name:
+        return cls
+    subc: type
+    for subc in cls.__subclasses__():
+        found = walk_subclasses(subc, name)
+        if found:
+            return found
+    return None
+
+
+def timed(label: str, count: int, func: Callable[[], Any]) -> None:
+    """Run func once, print total and per-entity time"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:28}{elapsed:9.3f}s{elapsed / count * 1e6:10.2f}us/entity")
+
+
+def main(count: int) -> None:
+    """Print load timings"""
+    world = serialized_world(count)
+    kinds = [cd["kind"] for ed in world for cd in ed["components"]]
+    print(f"Loading {count} entities, {len(kinds)} components")
+    timed("kind lookup: subclass walk", count, lambda: [walk_subclasses(Component, k) for k in kinds])
+    timed("kind lookup: registry", count, lambda: [Component.find_class(k) for k in kinds])
+    timed("Entity.from_dict", count, lambda: [Entity.from_dict(ed) for ed in world])
+    timed("Entity.from_dict trusted", count, lambda: [Entity.from_dict(ed, trusted=True) for ed in world])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
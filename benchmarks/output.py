@@ -0,0 +1,50 @@
+"""Terminal output cost per frame of each Output mode, over a scripted walk through the dungeon.
+
+    python -m benchmarks.output
+
+Frames are written to /dev/null through a real file descriptor, so writes are real syscalls.
+"""
+
+import os
+import time
+
+from blessed import Terminal
+
+from lethal import BufferedOutput, FramebufferOutput, Input, Output
+from dungeon.dungeon_module import DungeonModule
+
+WALK = ["KEY_LEFT"] * 5 + ["KEY_DOWN"] * 4 + ["KEY_RIGHT"] * 10 + [" "] + ["KEY_RIGHT"] * 3 + ["KEY_UP"] * 20
+
+
+def run(output_class: type[Output]) -> None:
+    """Play WALK, print output stats and draw time per frame"""
+    module = DungeonModule()
+    state = module.create()
+    term = Terminal(kind="xterm-256color", force_styling=True)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        output = output_class(term, devnull)
+        drawing = 0.0
+        for key in WALK:
+            start = time.perf_counter()
+            output.begin_frame()
+            module.draw(state, output)
+            output.end_frame()
+            drawing += time.perf_counter() - start
+            state = module.update(state, Input([key]), 0)
+    stats = output.stats
+    print(
+        f"{output_class.__name__:20}{stats.total_bytes / stats.frames:12.0f}"
+        f"{stats.total_writes / stats.frames:14.1f}{drawing / stats.frames * 1e6:12.0f}"
+    )
+
+
+def main() -> None:
+    """Compare the modes"""
+    print(f"{len(WALK)} frames")
+    print(f"{'':20}{'bytes/frame':>12}{'writes/frame':>14}{'us/frame':>12}")
+    for output_class in (Output, BufferedOutput, FramebufferOutput):
+        run(output_class)
+
+
+if __name__ == "__main__":
+    main()
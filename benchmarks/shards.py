@@ -0,0 +1,85 @@
+"""Tick throughput of a many-room world: one process vs ShardedSimulation over 1..N workers.
+
+    python -m benchmarks.shards [rooms] [mobs_per_room] [ticks]
+"""
+
+import multiprocessing
+import sys
+import time
+
+from lethal import EntityStore, Input, Loc, Scheduler, SpatialIndex, System
+from lethal.sharding import ShardedSimulation
+from dungeon.dungeon_comps import ROOM_HEIGHT, ROOM_WIDTH, Drawable, Health, Mob, Room, Text
+
+
+class WanderSystem(System):
+    """Every mob takes a step, bumping into whatever is there: work proportional to the mobs in a room"""
+
+    reads = (Mob,)
+    writes = (Loc, Health)
+
+    def update(self) -> None:
+        spatial = SpatialIndex.of(self.estore, Room, "room_id")
+        for ent in self.estore.query(Mob, Loc, Room):
+            loc = ent[Loc]
+            loc.x = (loc.x + 1 + loc.y % 3) % ROOM_WIDTH
+            loc.y = (loc.y + (loc.x % 2)) % ROOM_HEIGHT
+            for other in spatial.at(ent[Room].room_id, loc.x, loc.y):
+                if other is not ent and other.has_any(Health):
+                    other[Health].current = max(other[Health].current - 1, 1)
+
+
+def setup(estore: EntityStore) -> Scheduler:
+    """Per-worker store setup, for ShardedSimulation"""
+    SpatialIndex.of(estore, Room, "room_id")
+    return Scheduler([WanderSystem()])
+
+
+def build_world(rooms: int, mobs: int) -> EntityStore:
+    """rooms rooms of mobs mobs each"""
+    estore = EntityStore()
+    for r in range(rooms):
+        for i in range(mobs):
+            estore.create_entity(
+                [
+                    Mob(cat="enemy", name="Slime"),
+                    Health(max=3, current=3),
+                    Text(text="@"),
+                    Loc(x=i % ROOM_WIDTH, y=(i // ROOM_WIDTH) % ROOM_HEIGHT),
+                    Room(room_id=f"room{r}"),
+                    Drawable(),
+                ]
+            )
+    return estore
+
+
+def main(rooms: int, mobs: int, ticks: int) -> None:
+    """Print ticks/second for each configuration"""
+    print(f"{rooms} rooms x {mobs} mobs, {ticks} ticks, {multiprocessing.cpu_count()} cpus")
+    no_keys = Input([])
+
+    estore = build_world(rooms, mobs)
+    systems = setup(estore)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        systems.run(estore, no_keys)
+    print(f"{'one process':>16}: {ticks / (time.perf_counter() - start):8.1f} ticks/s")
+
+    workers = 1
+    while workers <= max(multiprocessing.cpu_count(), 2):
+        with ShardedSimulation(build_world(rooms, mobs), setup, Room, "room_id", workers=workers) as sim:
+            start = time.perf_counter()
+            for _ in range(ticks):
+                sim.tick(no_keys)
+            elapsed = time.perf_counter() - start
+            busiest = max(s.tick_time for s in sim.stats)
+        print(
+            f"{workers:>8} workers: {ticks / elapsed:8.1f} ticks/s"
+            f"   (busiest worker's last tick: {busiest * 1e3:.1f}ms)"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [64, 200, 50][len(args) :]))
@@ -0,0 +1,72 @@
+"""Save/load cost of binary snapshots vs Entity.to_dict/from_dict + JSON.
+
+    python -m benchmarks.snapshot [count]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+from lethal import Entity, EntityStore, Loc
+from lethal.snapshot import Snapshot
+from dungeon.dungeon_comps import Drawable, Health, Mob, Room, Text
+
+
+def build_world(count: int) -> EntityStore:
+    """count mobs"""
+    estore = EntityStore()
+    for i in range(count):
+        ent = estore.create_entity()
+        ent.take(Mob(cat="enemy", name="Slime"))
+        ent.take(Health(max=3, current=3))
+        ent.take(Text(text="@"))
+        ent.take(Loc(x=i % 80, y=i % 15))
+        ent.take(Room(room_id=f"room{i % 4}"))
+        ent.take(Drawable())
+    return estore
+
+
+def timed(label: str, func: Callable[[], Any]) -> Any:
+    """Run func once, print its time, return its result"""
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:36}{time.perf_counter() - start:9.3f}s")
+    return result
+
+
+def main(count: int) -> None:
+    """Print save/load timings and sizes"""
+    estore = build_world(count)
+    print(f"{count} entities, {count * 6} components")
+    with tempfile.TemporaryDirectory() as tmp:
+        for compress in (False, True):
+            path = os.path.join(tmp, f"world{int(compress)}.snap")
+            label = "compressed" if compress else "raw"
+            timed(f"save ({label})", lambda: estore.save(path, compress=compress))
+            print(f"{'':36}{os.path.getsize(path) / 1e6:9.1f}MB")
+            snap = timed(f"open ({label})", lambda: Snapshot.open(path))
+            timed(f"  sum(Loc.x) ({label})", lambda: sum(snap.column(Loc, "x")))
+            timed(f"  one entity ({label})", lambda: snap.entity(f"e{count // 2}"))
+            timed(f"  restore all ({label})", snap.restore)
+            snap.close()
+
+        path = os.path.join(tmp, "world.json")
+
+        def save_json() -> None:
+            with open(path, "w", encoding="utf-8") as out:
+                json.dump([ent.to_dict() for ent in estore.entities.values()], out)
+
+        def load_json() -> list[Entity]:
+            with open(path, encoding="utf-8") as src:
+                return [Entity.from_dict(ed, trusted=True) for ed in json.load(src)]
+
+        timed("save (to_dict + json)", save_json)
+        print(f"{'':36}{os.path.getsize(path) / 1e6:9.1f}MB")
+        timed("load (json + from_dict trusted)", load_json)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,289 @@
+"""The lethal ECS benchmark suite: micro cases on EntityStores of each size, plus a whole dungeon tick.
+
+    python -m benchmarks [--sizes 1000,100000,1000000] [--cases select] [--save FILE] [--baseline FILE]
+
+Each case is timed best-of-3, at a count of operations that takes at least MIN_TIME. Results are printed in ns per
+operation, and can be saved as JSON. Given a baseline (a saved run), cases more than --threshold slower are flagged,
+and the exit status is 1. benchmarks/baseline.json is a full run to compare with (mind that it was measured on another
+machine: save a baseline of your own before changing things).
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from blessed import Terminal
+
+from lethal import Component, Entity, EntityStore, FramebufferOutput, Input, Loc
+from dungeon.dungeon_comps import Drawable, Health, Mob, Room, Text
+from dungeon.dungeon_module import DungeonModule
+
+SIZES = (1_000, 100_000, 1_000_000)
+MIN_TIME = 0.1  # seconds
+REPEATS = 3
+SAMPLE = 10_000  # entities the per-entity cases cycle through
+KINDS = (Loc, Room, Health, Mob)  # for select_1 .. select_4 (and query_1 .. query_4)
+
+
+class Tag(Component):
+    """Added and removed by the add_remove case"""
+
+    label: str
+
+
+def mob_parts(i: int) -> list[Component]:
+    """The components of one filler mob, in one of 64 rooms none of the dungeon's players is in"""
+    return [
+        Mob(cat="enemy", name="Slime"),
+        Health(max=3, current=3),
+        Loc(x=i % 80, y=i % 15),
+        Room(room_id=f"far{i % 64}"),
+        Text(text="@"),
+        Drawable(),
+    ]
+
+
+@dataclass
+class World:
+    """An EntityStore of a given size, with the queries the game would have, and a sample of its Entities"""
+
+    estore: EntityStore
+    sample: list[Entity]
+
+    @classmethod
+    def build(cls, size: int) -> "World":
+        """size filler mobs"""
+        estore = EntityStore()
+        for kinds in range(1, len(KINDS) + 1):
+            estore.query(*KINDS[:kinds])
+        for i in range(size):
+            estore.create_entity(mob_parts(i))
+        return cls(estore, list(estore.entities.values())[:: max(size // SAMPLE, 1)])
+
+
+# A case does `count` operations on a World, returning the seconds its operations took (excluding any cleanup)
+Case = Callable[[World, int], float]
+
+
+def create_entity(world: World, count: int) -> float:
+    """EntityStore.create_entity, with 6 components"""
+    estore = world.estore
+    parts = [mob_parts(i) for i in range(count)]
+    start = time.perf_counter()
+    made = [estore.create_entity(comps) for comps in parts]
+    elapsed = time.perf_counter() - start
+    for ent in made:
+        estore.destroy_entity(ent)
+    return elapsed
+
+
+def add_remove(world: World, count: int) -> float:
+    """Entity.add then Entity.remove of a Component (one operation)"""
+    sample = world.sample
+    tag = Tag(label="x")
+    start = time.perf_counter()
+    for i in range(count):
+        ent = sample[i % len(sample)]
+        ent.add(tag)
+        ent.remove(ent[Tag])
+    return time.perf_counter() - start
+
+
+def getitem(world: World, count: int) -> float:
+    """Entity[kind]"""
+    sample = world.sample
+    start = time.perf_counter()
+    for i in range(count):
+        sample[i % len(sample)][Loc]  # pylint: disable=expression-not-assigned
+    return time.perf_counter() - start
+
+
+def select(kinds: int) -> Case:
+    """EntityStore.select of the first `kinds` of KINDS (every filler mob matches)"""
+
+    def case(world: World, count: int) -> float:
+        estore, wanted = world.estore, KINDS[:kinds]
+        start = time.perf_counter()
+        for _ in range(count):
+            estore.select(*wanted)
+        return time.perf_counter() - start
+
+    case.__doc__ = f"EntityStore.select of {kinds} kind(s)"
+    return case
+
+
+def query(kinds: int) -> Case:
+    """Listing the live EntityStore.query of the first `kinds` of KINDS (as registered by World.build)"""
+
+    def case(world: World, count: int) -> float:
+        found = world.estore.query(*KINDS[:kinds])
+        start = time.perf_counter()
+        for _ in range(count):
+            list(found)
+        return time.perf_counter() - start
+
+    case.__doc__ = f"list(EntityStore.query) of {kinds} kind(s)"
+    return case
+
+
+def dict_roundtrip(world: World, count: int) -> float:
+    """Entity.from_dict(Entity.to_dict()), validated"""
+    sample = world.sample
+    start = time.perf_counter()
+    for i in range(count):
+        Entity.from_dict(sample[i % len(sample)].to_dict())
+    return time.perf_counter() - start
+
+
+class DungeonTick:
+    """DungeonModule.update plus draw into a FramebufferOutput writing to /dev/null, with the world's mobs added to
+    the dungeon (in rooms the player isn't in)"""
+
+    WALK = ["KEY_LEFT"] * 20 + ["KEY_RIGHT"] * 20
+
+    def __init__(self, size: int):
+        self.module = DungeonModule()
+        self.state = self.module.create()
+        for i in range(size):
+            self.state.estore.create_entity(mob_parts(i))
+        self.devnull = open(os.devnull, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        term = Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO())
+        self.output = FramebufferOutput(term, self.devnull)
+        self.ticks = 0
+        self(None, 1)  # (the first frame draws everything)
+
+    def __call__(self, _world: World | None, count: int) -> float:
+        module, output = self.module, self.output
+        start = time.perf_counter()
+        for _ in range(count):
+            key = self.WALK[self.ticks % len(self.WALK)]
+            self.ticks += 1
+            self.state = module.update(self.state, Input([key]), 0)
+            output.begin_frame()
+            module.draw(self.state, output)
+            output.end_frame()
+        return time.perf_counter() - start
+
+    def close(self) -> None:
+        """Release the output"""
+        self.devnull.close()
+
+
+MICRO_CASES: dict[str, Case] = {
+    "create_entity": create_entity,
+    "add_remove": add_remove,
+    "getitem": getitem,
+    **{f"select_{k}": select(k) for k in range(1, len(KINDS) + 1)},
+    **{f"query_{k}": query(k) for k in range(1, len(KINDS) + 1)},
+    "dict_roundtrip": dict_roundtrip,
+}
+CASES = [*MICRO_CASES, "dungeon_tick"]
+
+
+def measure(case: Case, world: World | None) -> tuple[float, int]:
+    """(best seconds per operation, operations per timing) for case"""
+    count = 1
+    while True:
+        elapsed = case(world, count)  # type: ignore[arg-type]
+        if elapsed >= MIN_TIME or count >= 1 << 20:
+            break
+        count *= 2 if elapsed * 10 >= MIN_TIME else 10
+    best = min([elapsed] + [case(world, count) for _ in range(REPEATS - 1)])  # type: ignore[arg-type]
+    return best / count, count
+
+
+def run(sizes: list[int], wanted: list[str]) -> dict[str, dict[str, Any]]:
+    """Results keyed by "case@size" """
+    results: dict[str, dict[str, Any]] = {}
+
+    def report(name: str, size: int, per_op: float, count: int) -> None:
+        key = f"{name}@{size}"
+        results[key] = {"case": name, "size": size, "ns_per_op": per_op * 1e9, "ops": count}
+        print(f"{key:28}{per_op * 1e9:14.0f} ns/op")
+
+    for size in sizes:
+        micro = [name for name in MICRO_CASES if name in wanted]
+        if micro:
+            start = time.perf_counter()
+            world = World.build(size)
+            print(f"-- {size} entities (built in {time.perf_counter() - start:.1f}s)")
+            gc.collect()
+            gc.freeze()  # (the world is long-lived: keep the collector from walking it over and over)
+            for name in micro:
+                report(name, size, *measure(MICRO_CASES[name], world))
+            del world
+            gc.unfreeze()
+            gc.collect()
+        if "dungeon_tick" in wanted:
+            tick = DungeonTick(size)
+            gc.collect()
+            gc.freeze()
+            report("dungeon_tick", size, *measure(tick, None))
+            tick.close()
+            del tick
+            gc.unfreeze()
+            gc.collect()
+    return results
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], threshold: float) -> list[str]:
+    """Print each result against the baseline's, returning the keys of those more than threshold slower"""
+    regressions = []
+    print(f"\n{'vs baseline':28}{'before':>14}{'after':>14}{'change':>10}")
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        ratio = result["ns_per_op"] / before["ns_per_op"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:28}{before['ns_per_op']:14.0f}{result['ns_per_op']:14.0f}{(ratio - 1) * 100:+9.0f}%{flag}")
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    """Run the suite, returns the exit status"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="entity counts, comma separated")
+    parser.add_argument("--cases", default="", help="only the cases whose names contain one of these (comma separated)")
+    parser.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with results saved earlier")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slowdown flagged as a regression (0.25: 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    filters = [f for f in args.cases.split(",") if f]
+    wanted = [name for name in CASES if not filters or any(f in name for f in filters)]
+    print(f"python {platform.python_version()} on {platform.machine()}, sizes {sizes}")
+    results = run(sizes, wanted)
+
+    if args.save:
+        meta = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "when": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with open(args.save, "w", encoding="utf-8") as out:
+            json.dump({"meta": meta, "results": results}, out, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as src:
+            baseline = json.load(src)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
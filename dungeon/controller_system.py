@@ -21,11 +21,11 @@ class Controller(Component):
 class ControllerSystem(System):
     """Updates Controller components based on user input"""
 
+    writes = (Controller,)
+
     def update(self) -> None:
-        for ent in self.estore.select(Controller):
-            con = ent[Controller]
-            if con.name == "controller1":
-                self._apply_input(con)
+        for ent in self.estore.field_index(Controller, "name").find("controller1"):
+            self._apply_input(ent[Controller])
 
     def _apply_input(self, con: Controller):
         # map keys to controller attr names
@@ -45,7 +45,5 @@ class ControllerSystem(System):
         # Update controller state::
         for key in self.user_input.keys:
             attr2 = key_map.get(key)
-            print(f"Checking {key}")
             if attr2:
-                print("setting")
                 setattr(con, attr2, True)
@@ -63,7 +63,16 @@ class Room(Component):
 
 
 class Door(Component):
-    """Doors link to doors by id"""
+    """Doors link to doors by id. (The other door's room lets travellers find it when that room is simulated
+    elsewhere, see Arriving.)"""
 
     door_id: str
     to_door_id: str
+    to_room_id: str | None = Field(default=None)
+
+
+class Arriving(Component):
+    """Coming through a door from a room simulated elsewhere: to be placed at the door when the room's
+    PlayerSystem sees it"""
+
+    door_id: str
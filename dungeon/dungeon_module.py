@@ -2,7 +2,8 @@
 # from typing import Any, Optional
 
 
-from lethal import EntityStore, Input, Loc, Module, Output
+from lethal import EntityStore, Input, Loc, Module, Output, Scheduler, SpatialIndex
+from lethal.profiling import PROFILER
 
 from .controller_system import Controller, ControllerSystem
 from .dungeon_comps import *
@@ -10,119 +11,152 @@ from .dungeon_comps import ROOM_HEIGHT, ROOM_WIDTH
 from .dungeon_renderer import DungeonRenderer
 from .dungeon_state import DungeonState
 from .dungeon_system import MsgSideEffect
+from .message_log import MessageLog
 from .player_system import PlayerSystem
 
 
 class DungeonModule(Module[DungeonState]):
-    """The Dungeon"""
+    """The Dungeon. Messages beyond the last MESSAGE_CAPACITY go to the message_spill file, if given."""
+
+    MESSAGE_CAPACITY = 100
+
+    systems: Scheduler
+    message_spill: str | None
+    renderer: DungeonRenderer | None  # (made on first draw, for the Output drawn to)
+
+    def __init__(self, message_spill: str | None = None):
+        self.systems = self.make_systems()
+        self.message_spill = message_spill
+        self.renderer = None
+
+    @staticmethod
+    def make_systems() -> Scheduler:
+        """The Systems that update the dungeon"""
+        return Scheduler([ControllerSystem(), PlayerSystem()])
+
+    @staticmethod
+    def setup_shard(estore: EntityStore) -> Scheduler:
+        """Prepare an EntityStore holding some of the rooms, for ShardedSimulation"""
+        DungeonModule._index_entity_store(estore)
+        return DungeonModule.make_systems()
 
     def create(self) -> DungeonState:
         estore = self._init_entity_store()
 
-        messages = [
-            "Move with arrow keys.  t=take, T=drop",
-            "Welcome to the Dungeon!",
-        ]
+        messages = MessageLog(
+            [
+                "Move with arrow keys.  t=take, T=drop",
+                "Welcome to the Dungeon!",
+            ],
+            capacity=self.MESSAGE_CAPACITY,
+            spill=self.message_spill,
+        )
 
         return DungeonState(estore=estore, my_player_id="player1", messages=messages)
 
     def update(self, state: DungeonState, user_input: Input, delta: float) -> DungeonState:
-        #
-        # System chain
-        #
-        side_effects = []
-        systems = [
-            ControllerSystem,
-            PlayerSystem,
-        ]
-        for new_system in systems:
-            s = new_system(estore=state.estore, user_input=user_input)
-            s.update()
-            side_effects.extend(s.side_effects)
+        side_effects = self.systems.run(state.estore, user_input)
 
         #
         # Side effects
         #
-        for se in side_effects:
-            if isinstance(se, MsgSideEffect):
-                state.messages.append(se.text)
+        with PROFILER.span("dungeon.side_effects"):
+            for se in side_effects:
+                if isinstance(se, MsgSideEffect):
+                    state.messages.append(se.text)
 
         return state
 
+    def finish(self, state: DungeonState) -> None:
+        state.messages.close()
+
     def draw(self, state: DungeonState, output: Output):
-        DungeonRenderer(state, output).draw()
+        if self.renderer is None or self.renderer.output is not output:
+            self.renderer = DungeonRenderer(output)
+        self.renderer.draw(state)
+
+    def needs_redraw(self, state: DungeonState) -> bool:
+        return self.renderer is None or self.renderer.needs_draw(state)
 
     def _init_entity_store(self):
         estore = EntityStore()
+        self._index_entity_store(estore)
 
         player = estore.create_entity()
-        player.add(Player(player_id="player1"))
-        player.add(Health(max=10, current=10))
-        player.add(Controller(name="controller1"))
-        player.add(Text(text="O"))
-        player.add(Loc(x=70, y=10))
-        player.add(Drawable(layer=10))
-        player.add(Room(room_id="room1"))
+        player.take(Player(player_id="player1"))
+        player.take(Health(max=10, current=10))
+        player.take(Controller(name="controller1"))
+        player.take(Text(text="O"))
+        player.take(Loc(x=70, y=10))
+        player.take(Drawable(layer=10))
+        player.take(Room(room_id="room1"))
 
         self._add_room1(estore)
         self._add_room2(estore)
         return estore
 
+    @staticmethod
+    def _index_entity_store(estore: EntityStore) -> None:
+        SpatialIndex.of(estore, Room, "room_id")  # used by PlayerSystem to find what's underfoot
+        estore.field_index(Door, "door_id", unique=True)
+        estore.field_index(Player, "player_id", unique=True)
+        estore.field_index(Controller, "name")
+
     def _add_room1(self, estore):
         gold1 = estore.create_entity()
-        gold1.add(Item(cat="gold", name="Gold Piece", value="10"))
-        gold1.add(Loc(x=12, y=4))
-        gold1.add(Text(text="$"))
+        gold1.take(Item(cat="gold", name="Gold Piece", value=10))
+        gold1.take(Loc(x=12, y=4))
+        gold1.take(Text(text="$"))
 
         gold2 = estore.create_entity()
-        gold2.add(Item(cat="gold", name="Dubloon", value="10"))
-        gold2.add(Loc(x=30, y=8))
-        gold2.add(Text(text="$"))
+        gold2.take(Item(cat="gold", name="Dubloon", value=10))
+        gold2.take(Loc(x=30, y=8))
+        gold2.take(Text(text="$"))
 
         sword = estore.create_entity()
-        sword.add(Item(cat="sword", name="Sword", value="30"))
-        sword.add(Loc(x=32, y=3))
-        sword.add(Text(text="/"))
+        sword.take(Item(cat="sword", name="Sword", value=30))
+        sword.take(Loc(x=32, y=3))
+        sword.take(Text(text="/"))
 
         fountain = estore.create_entity()
-        fountain.add(Place(name="Fountain", blocked=True))
-        fountain.add(Loc(x=10, y=0))
-        fountain.add(Text(text="*"))
+        fountain.take(Place(name="Fountain", blocked=True))
+        fountain.take(Loc(x=10, y=0))
+        fountain.take(Text(text="*"))
 
         door = estore.create_entity()
-        door.add(Door(door_id="door1", to_door_id="door2"))
-        door.add(Place(name="Door"))
-        door.add(Loc(x=ROOM_WIDTH - 5, y=ROOM_HEIGHT - 1))
-        door.add(Text(text="#"))
+        door.take(Door(door_id="door1", to_door_id="door2", to_room_id="room2"))
+        door.take(Place(name="Door"))
+        door.take(Loc(x=ROOM_WIDTH - 5, y=ROOM_HEIGHT - 1))
+        door.take(Text(text="#"))
 
         slime1 = estore.create_entity()
-        slime1.add(Mob(cat="enemy", name="Slime"))
-        slime1.add(Health(max=3, current=3))
-        slime1.add(Text(text="@"))
-        slime1.add(Loc(x=ROOM_WIDTH - 6, y=ROOM_HEIGHT - 3))
+        slime1.take(Mob(cat="enemy", name="Slime"))
+        slime1.take(Health(max=3, current=3))
+        slime1.take(Text(text="@"))
+        slime1.take(Loc(x=ROOM_WIDTH - 6, y=ROOM_HEIGHT - 3))
 
         slime2 = estore.create_entity()
-        slime2.add(Mob(cat="enemy", name="Slime"))
-        slime2.add(Health(max=3, current=3))
-        slime2.add(Text(text="@"))
-        slime2.add(Loc(x=10, y=4))
+        slime2.take(Mob(cat="enemy", name="Slime"))
+        slime2.take(Health(max=3, current=3))
+        slime2.take(Text(text="@"))
+        slime2.take(Loc(x=10, y=4))
 
         for e in estore.select():
-            e.add(Room(room_id="room1"))
-            e.add(Drawable())
+            e.take(Room(room_id="room1"))
+            e.take(Drawable())
 
     def _add_room2(self, estore):
         gold1 = estore.create_entity()
-        gold1.add(Item(cat="gold", name="Gold Piece", value="10"))
-        gold1.add(Loc(x=20, y=10))
-        gold1.add(Text(text="$"))
-        gold1.add(Room(room_id="room2"))
-        gold1.add(Drawable())
+        gold1.take(Item(cat="gold", name="Gold Piece", value=10))
+        gold1.take(Loc(x=20, y=10))
+        gold1.take(Text(text="$"))
+        gold1.take(Room(room_id="room2"))
+        gold1.take(Drawable())
 
         door = estore.create_entity()
-        door.add(Place(name="Door"))
-        door.add(Door(door_id="door2", to_door_id="door1"))
-        door.add(Room(room_id="room2"))
-        door.add(Loc(x=4, y=0))
-        door.add(Text(text="#"))
-        door.add(Drawable())
+        door.take(Place(name="Door"))
+        door.take(Door(door_id="door2", to_door_id="door1", to_room_id="room1"))
+        door.take(Room(room_id="room2"))
+        door.take(Loc(x=4, y=0))
+        door.take(Text(text="#"))
+        door.take(Drawable())
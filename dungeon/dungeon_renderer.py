@@ -1,44 +1,81 @@
 # from dungeon_comps import *
+
 from .dungeon_state import DungeonState
-from lethal import Output, Loc, Pos
+from .message_log import MessageLog
+from lethal import ChangeReader, ChangeTracker, EntityStore, Entity, Output, Loc, SpatialIndex
+from lethal.ecs import Handle
+from lethal.layers import Compositor, Layer
 from .dungeon_comps import *
 
+MESSAGE_LINES = 5
+
 
 class DungeonRenderer:
-    """Single-use object: convenience code around geting state rendered"""
+    """Draws the dungeon, keeping what it drew from frame to frame in layers:
+      frame     the room's border (drawn once)
+      entities  the Drawables in the player's room (only cells whose occupants changed are redrawn)
+      messages  the latest messages (redrawn when they change)
+    Only cells that changed are sent to the Output, so a frame costs what changed in it.
+    What changed is read from a ChangeTracker on the Drawables' looks and whereabouts."""
+
+    TRACKED = (Drawable, Loc, Room, Text)
 
-    def __init__(self, state: DungeonState, output: Output):
-        self.state = state
+    def __init__(self, output: Output):
         self.output = output
-        self.estore = state.estore
+        self.compositor = Compositor()
+        width = ROOM_WIDTH + 2
+        height = ROOM_HEIGHT
 
-        self.player_id = state.my_player_id
-        self.player_ent = next((e for e in self.state.estore.select(Player) if e[Player].player_id == self.player_id))
+        self.frame = self.compositor.add(Layer(0, 0, width, height + 2))
+        self.entities = self.compositor.add(Layer(1, 1, ROOM_WIDTH, ROOM_HEIGHT, z=1))
+        self.messages = self.compositor.add(Layer(0, height + 3, output.term.width, MESSAGE_LINES))
+        self.draw_frame()
 
-    def draw(self):
-        self.draw_ui()
+        self.estore: EntityStore | None = None
+        self.changes: ChangeReader | None = None
+        self.room_id: str | None = None
+        self.shown_messages: tuple[str, ...] = ()
+        # Where each Drawable in the room was last drawn
+        self.positions: dict[Handle, tuple[int, int]] = {}
 
-        room_id = self.player_ent[Room].room_id
+    def draw(self, state: DungeonState):
+        self.output.retain = True
+        estore = state.estore
+        if estore is not self.estore or self.changes is None:  # (a new game)
+            self.estore = estore
+            self.changes = ChangeTracker.of(estore, *self.TRACKED).reader()
+            self.room_id = None
+        changes = self.changes.read()
 
-        with self.output.offset(Pos(1, 1)):  # offset to be within the UI borders
-            for ent in sorted(
-                self.state.estore.select(Drawable, Loc, Room),
-                key=lambda e: e[Drawable].layer,
-            ):
-                # for ent in state.estore.select(Drawable, Loc, Room):
-                if ent[Room].room_id == room_id:
-                    self.output.print_at(ent[Loc].to_pos(), ent[Text].text)
+        player_ent = estore.field_index(Player, "player_id", unique=True)[state.my_player_id]
+        room_id = player_ent[Room].room_id
+        if room_id != self.room_id:
+            self.room_id = room_id
+            self.draw_room()
+        else:
+            for ent in changes.entities():
+                self.update_entity(ent)
 
-    def draw_ui(self):
-        """render bound box and labels"""
+        self.draw_messages(state.messages)
+
+        self.compositor.compose(self.output)
+
+    def needs_draw(self, state: DungeonState) -> bool:
+        """Whether draw(state) would change anything: Drawables changed since the last frame, or there's a new
+        message to show"""
+        if state.estore is not self.estore or self.changes is None:
+            return True
+        return bool(self.changes.pending) or tuple(state.messages.latest(MESSAGE_LINES)) != self.shown_messages
+
+    def draw_frame(self):
+        """render bound box"""
         width = ROOM_WIDTH + 2
         height = ROOM_HEIGHT
 
-        # messages
-        self.output.print_at(
-            Pos(0, height + 3),
-            self.output.term.darkgray + "\n".join(list(reversed(self.state.messages))[0:5]) + self.output.term.normal,
-        )
+        # bounds
+        hbar = "+" + ("-" * (width - 2)) + "+"
+        row = "|" + (" " * (width - 2)) + "|"
+        self.frame.put(0, 0, "\n".join([hbar] + [row] * height + [hbar]))
 
         # Debug controller state:
         # for e in state.estore.select(Controller):
@@ -47,14 +84,6 @@ class DungeonRenderer:
         #         Pos(0, height + 3), output.term.blue + repr(con) + output.term.normal
         #     )
 
-        # bounds
-        hbar = "+" + ("-" * (width - 2)) + "+"
-        bounds = hbar + "\n"
-        for y in range(0, height):
-            bounds += "|" + (" " * (width - 2)) + "|\n"
-        bounds += hbar
-        self.output.print_at(Pos(0, 0), bounds)
-
         # status
         # with output.offset(Pos(0, height + 1)):
         #     item_str = ""
@@ -76,3 +105,55 @@ class DungeonRenderer:
         #         Pos(0, 0),
         #         f"{output.term.normal}Gear: {output.term.gold_on_black}{', '.join([i.name for i in state.player.items])}{output.term.normal}",
         #     )
+
+    def draw_messages(self, messages: MessageLog):
+        """The latest messages, newest first"""
+        shown = tuple(messages.latest(MESSAGE_LINES))
+        if shown != self.shown_messages:
+            self.shown_messages = shown
+            self.messages.clear()
+            self.messages.put(0, 0, "\n".join(shown), self.output.codes.style("darkgray"))
+
+    def draw_room(self):
+        """Redraw every entity in the (new) room"""
+        self.entities.clear()
+        self.positions.clear()
+        for ent in self.estore.query(Drawable, Loc, Room):
+            pos = self._position(ent)
+            if pos is not None:
+                self.positions[ent.handle] = pos
+        for pos in set(self.positions.values()):
+            self.draw_cell(*pos)
+
+    def update_entity(self, ent: Entity):
+        """Redraw the cells an entity left and entered"""
+        old = self.positions.pop(ent.handle, None)
+        new = self._position(ent)
+        if new is not None:
+            self.positions[ent.handle] = new
+        if old is not None:
+            self.draw_cell(*old)
+        if new is not None and new != old:
+            self.draw_cell(*new)
+
+    def draw_cell(self, x: int, y: int):
+        """Draw the top-most (highest Drawable.layer) entity at x,y, or nothing"""
+        assert self.estore is not None
+        top = None
+        for ent in SpatialIndex.of(self.estore, Room, "room_id").at(self.room_id, x, y):
+            if not ent.has_all([Drawable, Text]):
+                continue
+            if top is None or (ent[Drawable].layer or 0) >= (top[Drawable].layer or 0):
+                top = ent
+        if top is None:
+            self.entities.erase(x, y)
+        else:
+            self.entities.put(x, y, top[Text].text)
+
+    def _position(self, ent: Entity) -> tuple[int, int] | None:
+        """Where ent is drawn, if it's a drawable entity (still) in the current room"""
+        if ent._store is not self.estore or not ent.has_all([Drawable, Loc, Room, Text]):
+            return None
+        if ent[Room].room_id != self.room_id:
+            return None
+        return (ent[Loc].x, ent[Loc].y)
@@ -2,6 +2,8 @@ from dataclasses import dataclass
 
 from lethal.ecs import EntityStore
 
+from .message_log import MessageLog
+
 
 @dataclass
 class DungeonState:
@@ -9,4 +11,4 @@ class DungeonState:
 
     estore: EntityStore
     my_player_id: str
-    messages: list[str]
+    messages: MessageLog
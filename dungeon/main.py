@@ -1,5 +1,6 @@
 """Dungeon game: main"""
 
+import argparse
 import sys
 
 from lethal import Driver
@@ -13,5 +14,12 @@ class DungeonDriver(Driver[DungeonModule, DungeonState]):
 
 
 if __name__ == "__main__":
-    DungeonDriver(DungeonModule()).loop()
+    parser = argparse.ArgumentParser(prog="python -m dungeon.main", description="Play the dungeon")
+    parser.add_argument("--record", metavar="FILE", help="record the session's input, to replay with dungeon.replay")
+    parser.add_argument(
+        "--profile", metavar="FILE", help="time the systems, drawing and output, writing it all to FILE"
+    )
+    parser.add_argument("--message-log", metavar="FILE", help="append messages too old to keep in memory to FILE")
+    args = parser.parse_args()
+    DungeonDriver(DungeonModule(message_spill=args.message_log), record=args.record, profile=args.profile).loop()
     sys.exit(0)
@@ -0,0 +1,92 @@
+"""The dungeon's message log: the latest messages, in a fixed-size ring"""
+
+import itertools
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable, Iterator, TextIO, overload
+
+
+@dataclass
+class LoggedMessage:
+    """A message, and how many times in a row it was logged"""
+
+    text: str
+    count: int = 1
+
+    def __str__(self) -> str:
+        return self.text if self.count == 1 else f"{self.text} (x{self.count})"
+
+
+class MessageLog:
+    """Holds the last `capacity` messages, oldest first. A message repeating the one before it bumps its count
+    instead (shown as "Bonk! (x12)"). Messages pushed out of the ring are appended to the spill file, if given,
+    one per line. So the log takes the same memory, and showing its latest few the same time, however long the game.
+    The spill file is opened on the first spill and kept open until close().
+
+    Reads like a sequence of the messages as shown: iterate, index, slice, or latest(n)."""
+
+    capacity: int
+    spill: str | None
+    entries: deque[LoggedMessage]
+    _out: TextIO | None
+
+    def __init__(self, messages: Iterable[str] = (), capacity: int = 100, spill: str | None = None):
+        self.capacity = capacity
+        self.spill = spill
+        self.entries = deque()
+        self._out = None
+        for text in messages:
+            self.append(text)
+
+    def append(self, text: str) -> None:
+        """Log a message"""
+        entries = self.entries
+        if entries and entries[-1].text == text:
+            entries[-1].count += 1
+            return
+        if len(entries) == self.capacity:
+            self._spill(entries.popleft())
+        entries.append(LoggedMessage(text))
+
+    def latest(self, n: int) -> list[str]:
+        """The last n messages (or fewer), newest first"""
+        return [str(entry) for entry in itertools.islice(reversed(self.entries), n)]
+
+    def close(self) -> None:
+        """Close the spill file, if open (a later spill opens it again)"""
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def _spill(self, entry: LoggedMessage) -> None:
+        if self.spill is None:
+            return
+        if self._out is None:
+            # (line-buffered, so the file can be followed as the game goes)
+            self._out = open(self.spill, "a", encoding="utf-8", buffering=1)  # pylint: disable=consider-using-with
+        self._out.write(f"{entry}\n")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(entry) for entry in self.entries)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return list(self)[index]
+        return str(self.entries[index])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MessageLog):
+            return NotImplemented
+        return list(self.entries) == list(other.entries)
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
@@ -1,6 +1,6 @@
 from typing import cast
 
-from lethal import Entity, Loc
+from lethal import Entity, Loc, SpatialIndex
 
 from .controller_system import Controller
 from .dungeon_comps import *
@@ -10,13 +10,18 @@ from .dungeon_system import DungeonSystem
 class PlayerSystem(DungeonSystem):
     """Update Player(s)"""
 
+    reads = (Player, Controller, Place, Door, Item, Mob)
+    writes = (Loc, Room, Health, Arriving)
+
     def update(self) -> None:
-        for player_e in self.estore.select(Player, Controller, Room, Loc):
+        for player_e in self.estore.query(Player, Controller, Room, Loc):
             con = player_e[Controller]
             room = player_e[Room]
             loc = player_e[Loc]
+            if player_e.has_any(Arriving):
+                self._arrive(player_e, loc)
 
-            loc_backup = loc.model_copy()
+            loc_backup = loc.clone()
             self._move(loc, con)
 
             for other_e in self._entities_at_loc(room, loc):
@@ -30,10 +35,7 @@ class PlayerSystem(DungeonSystem):
                     elif con.action:
                         door: Door = other_e[Door]
                         if door:
-                            dest_door = next(
-                                (e for e in self.estore.select(Door) if e[Door].door_id == door.to_door_id),
-                                None,
-                            )
+                            dest_door = self.estore.field_index(Door, "door_id", unique=True).get(door.to_door_id)
                             if dest_door:
                                 dest_room = dest_door[Room].room_id
                                 self._message(f"Opened door {door.door_id}")
@@ -43,6 +45,11 @@ class PlayerSystem(DungeonSystem):
                                 # self.add_side_effect(
                                 #     RoomSideEffect(to_room_id=dest_room)
                                 # )
+                            elif door.to_room_id is not None:
+                                # The other room is simulated elsewhere: go, to be placed at its door on arrival
+                                self._message(f"Opened door {door.door_id}")
+                                player_e[Room].room_id = door.to_room_id
+                                self.commands.take(player_e, Arriving(door_id=door.to_door_id))
 
                 elif other_e.has_any(Item):
                     # TODO: Pickup items
@@ -59,6 +66,14 @@ class PlayerSystem(DungeonSystem):
 
                     self._attack_mob(player_e, other_e)
 
+    def _arrive(self, player_e: Entity, loc: Loc):
+        arriving = player_e[Arriving]
+        door_e = self.estore.field_index(Door, "door_id", unique=True).get(arriving.door_id)
+        if door_e:
+            loc.x = door_e[Loc].x
+            loc.y = door_e[Loc].y
+        self.commands.remove(player_e, arriving)
+
     def _attack_mob(self, player_e: Entity, mob_e: Entity):
         hit = True
         damage = 1
@@ -66,7 +81,7 @@ class PlayerSystem(DungeonSystem):
             mob_health = mob_e[Health]
             mob_health.current = max(mob_health.current - damage, 0)
             if mob_health.current <= 0:
-                self.estore.destroy_entity(mob_e)
+                self.commands.destroy(mob_e)
                 self._message(f"{mob_e[Mob].name} defeated!")
             else:
                 self._message(f"{mob_e[Mob].name} hit for {damage}")
@@ -88,11 +103,5 @@ class PlayerSystem(DungeonSystem):
             pass
 
     def _entities_at_loc(self, room: Room, loc: Loc):
-        def hitting(ent: Entity, room: Room, loc: Loc):
-            if ent.eid != loc.eid:
-                if ent[Room].room_id == room.room_id:
-                    eloc = ent[Loc]
-                    return eloc.x == loc.x and eloc.y == loc.y
-            return False
-
-        return [e for e in self.estore.select(Room, Loc) if hitting(e, room, loc)]
+        spatial = SpatialIndex.of(self.estore, Room, "room_id")
+        return [e for e in spatial.at(room.room_id, loc.x, loc.y) if e.eid != loc.eid]
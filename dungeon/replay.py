@@ -0,0 +1,31 @@
+"""Dungeon game: replay a recorded session without a terminal, and report how fast it ran
+
+    python -m dungeon.replay FILE [--realtime] [--no-draw] [--profile OUT]
+"""
+
+import argparse
+import sys
+
+from lethal import HeadlessDriver
+
+from .dungeon_module import DungeonModule
+from .dungeon_state import DungeonState
+
+
+class DungeonReplay(HeadlessDriver[DungeonModule, DungeonState]):
+    """The headless driver"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m dungeon.replay", description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="a file written by: python -m dungeon.main --record FILE")
+    parser.add_argument("--realtime", action="store_true", help="keep the recorded pace (default: full speed)")
+    parser.add_argument("--no-draw", action="store_true", help="only update, don't draw")
+    parser.add_argument("--profile", metavar="OUT", help="write the time each system and phase took to OUT (JSON)")
+    args = parser.parse_args()
+
+    driver = DungeonReplay(
+        DungeonModule(), args.recording, realtime=args.realtime, draw=not args.no_draw, profile=args.profile
+    )
+    print(driver.run())
+    sys.exit(0)
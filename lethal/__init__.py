@@ -1,9 +1,32 @@
 """Lethal Package"""
 
 from .input import Input
-from .output import Output
+from .output import Output, BufferedOutput, FramebufferOutput
 from .module import Module
-from .driver import Driver
+from .driver import Driver, FrameTiming
+from .async_driver import AsyncDriver
+from .headless import HeadlessDriver, ReplayReport
+from .recording import Recording
 from .pos import Pos
 from .loc import Loc
-from .ecs import Entity, Component, EntityStore, EntityId, System, SideEffect
+from .ecs import (
+    Entity,
+    Component,
+    EntityStore,
+    EntityId,
+    Handle,
+    EntityStoreListener,
+    Query,
+    FieldIndex,
+    System,
+    SideEffect,
+    CommandBuffer,
+)
+from .spatial import SpatialIndex
+from .changes import ChangeTracker, ChangeReader, Changes
+from .archetype import ArchetypeStorage
+from .snapshot import Snapshot
+from .scheduler import Scheduler
+from .sharding import ShardedSimulation
+from .layers import Layer, Compositor
+from .profiling import Profiler, PROFILER
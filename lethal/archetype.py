@@ -0,0 +1,156 @@
+"""Archetype storage: Entities grouped into tables by their exact set of Component kinds"""
+
+from typing import Iterator, Type
+
+from .ecs import Component, Entity, EntityStore, EntityStoreListener, Handle, component_kinds
+
+Signature = frozenset[type]
+
+
+class Archetype:
+    """A table of all the Entities answering to one exact set of Component kinds (see component_kinds).
+    One column per kind, holding each Entity's ent[kind], row-aligned with the entities column."""
+
+    signature: Signature
+    entities: list[Entity]
+    columns: dict[type, list[Component]]
+
+    def __init__(self, signature: Signature):
+        self.signature = signature
+        self.entities = []
+        self.columns = {kind: [] for kind in signature}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def append(self, ent: Entity, cells: dict[type, Component]) -> int:
+        """Add a row, return its index"""
+        self.entities.append(ent)
+        for kind, column in self.columns.items():
+            column.append(cells[kind])
+        return len(self.entities) - 1
+
+    def set_row(self, row: int, cells: dict[type, Component]) -> None:
+        """Overwrite the cells of a row"""
+        for kind, column in self.columns.items():
+            column[row] = cells[kind]
+
+    def swap_remove(self, row: int) -> Entity | None:
+        """Remove a row by moving the last row into its place.
+        Returns the Entity that moved (whose row is now `row`), if any."""
+        last = len(self.entities) - 1
+        moved = None
+        if row != last:
+            moved = self.entities[row] = self.entities[last]
+            for column in self.columns.values():
+                column[row] = column[last]
+        self.entities.pop()
+        for column in self.columns.values():
+            column.pop()
+        return moved
+
+    def column_for(self, kind: Type[Component]) -> list[Component] | None:
+        """The column for kind, or None"""
+        return self.columns.get(kind)
+
+
+class ArchetypeStorage(EntityStoreListener):
+    """Lays out the Entities of an EntityStore as archetype tables.
+    The Entity/EntityStore API keeps working as a facade over the same Component objects;
+    this adds column-wise iteration that skips per-entity lookups entirely:
+
+        for room, loc, drawable in ArchetypeStorage.of(estore).iter(Room, Loc, Drawable):
+            ...
+
+    Cells are the Entity's own Components, picked as ent[kind] picks them (the first answering to the kind).
+    Adding or removing a Component moves the Entity to the table for its new signature;
+    a like-kind Component only touches the cells it heads."""
+
+    kinds = (Component,)
+    tables: dict[Signature, Archetype]
+    rows: dict[Handle, tuple[Archetype, int]]
+    _plans: dict[tuple[Type[Component], ...], list[tuple[Archetype, list[list[Component]]]]]
+
+    def __init__(self) -> None:
+        self.tables = {}
+        self.rows = {}
+        self._plans = {}
+
+    @classmethod
+    def of(cls, estore: EntityStore) -> "ArchetypeStorage":
+        """Return the estore's ArchetypeStorage, creating it on first use"""
+        return estore.index((cls,), cls)
+
+    def iter(self, *kinds: Type[Component]) -> Iterator[tuple[Component, ...]]:
+        """Yield a tuple of Components (in the order of kinds) for each Entity having all the kinds"""
+        for table, columns in self._plan(kinds):
+            if table.entities:
+                yield from zip(*columns)
+
+    def entities(self, *kinds: Type[Component]) -> Iterator[Entity]:
+        """Yield each Entity having all the given kinds"""
+        for table, _ in self._plan(kinds):
+            yield from table.entities
+
+    def table_of(self, ent: Entity) -> Archetype:
+        """The table currently holding the Entity"""
+        return self.rows[ent.handle][0]
+
+    def entity_created(self, ent: Entity) -> None:
+        self._place(ent)
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        self._vacate(ent)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        if all(ent[kind] is not comp for kind in component_kinds(type(comp))):
+            return  # (behind a like-kind Component: the row stands)
+        self._place(ent)
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        current = self.rows.get(ent.handle)
+        kinds = component_kinds(type(comp))
+        if current is None or not all(ent.has_any(kind) for kind in kinds):
+            self._place(ent)
+            return
+        table, row = current  # same signature: the next like-kind Components take over comp's cells
+        for kind in kinds:
+            table.columns[kind][row] = ent[kind]
+
+    def _place(self, ent: Entity) -> None:
+        cells: dict[type, Component] = {}
+        for comp in ent.components:  # first Component answering to each kind wins, like ent[kind]
+            for kind in component_kinds(type(comp)):
+                cells.setdefault(kind, comp)
+        signature = frozenset(cells)
+        current = self.rows.get(ent.handle)
+        if current is not None and current[0].signature == signature:
+            current[0].set_row(current[1], cells)
+            return
+        self._vacate(ent)
+        table = self.tables.get(signature)
+        if table is None:
+            table = self.tables[signature] = Archetype(signature)
+            self._plans.clear()
+        self.rows[ent.handle] = (table, table.append(ent, cells))
+
+    def _vacate(self, ent: Entity) -> None:
+        current = self.rows.pop(ent.handle, None)
+        if current is None:
+            return
+        table, row = current
+        moved = table.swap_remove(row)
+        if moved is not None:
+            self.rows[moved.handle] = (table, row)
+
+    def _plan(self, kinds: tuple[Type[Component], ...]) -> list[tuple[Archetype, list[list[Component]]]]:
+        """The tables matching kinds, with the column for each kind. Cached until a new table appears."""
+        plan = self._plans.get(kinds)
+        if plan is None:
+            plan = []
+            for table in self.tables.values():
+                columns = [table.column_for(kind) for kind in kinds]
+                if all(column is not None for column in columns):
+                    plan.append((table, [column for column in columns if column is not None]))
+            self._plans[kinds] = plan
+        return plan
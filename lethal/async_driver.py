@@ -0,0 +1,166 @@
+"""Terminal game driver on asyncio"""
+
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+from .driver import Driver, FrameTiming
+from .input import Input
+from .profiling import PROFILER
+
+
+M = TypeVar("M")
+S = TypeVar("S")
+
+
+class AsyncDriver(Driver[M, S]):
+    """Terminal game driver that runs as asyncio tasks, taking turns on one thread:
+      input    reads keys (in a worker thread, so waiting for them stalls nothing) onto the `keys` queue
+      updates  calls Module.update_async: once per key, or every 1/tick_rate seconds (see Driver)
+      render   calls Module.draw_async when a frame is due (see Driver.draw_due), checking after updates have run
+               and every resize_poll seconds
+    plus any coroutines given to background() (eg. autosave), which run until the driver stops.
+    ESC, or stop(), cancels them all and returns from play()."""
+
+    keys: asyncio.Queue[str]
+    poll_interval = 0.05  # seconds each wait for a key lasts, at most: how quickly ESC/stop() is noticed
+
+    _stopping: asyncio.Event
+    _redraw: asyncio.Event
+    _group: asyncio.TaskGroup | None
+    _tasks: list[asyncio.Task]
+    _queued: list[tuple[Coroutine[Any, Any, Any], str | None]]  # background() before play()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._group = None
+        self._tasks = []
+        self._queued = []
+
+    def loop(self) -> None:
+        """i/o loop"""
+        try:
+            asyncio.run(self.run())
+        finally:
+            self.finish()
+
+    async def run(self) -> None:
+        """Play in the terminal"""
+        term = self.term
+        with term.cbreak(), term.fullscreen(), term.hidden_cursor():
+            await self.play()
+
+    async def play(self) -> None:
+        """Run the input, update and render tasks until stopped"""
+        self.keys = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        self._redraw = asyncio.Event()
+        self._redraw.set()
+        async with asyncio.TaskGroup() as group:
+            self._group = group
+            self._tasks = [
+                group.create_task(self._read_input(), name="input"),
+                group.create_task(self._run_updates(), name="updates"),
+                group.create_task(self._render(), name="render"),
+            ]
+            for coro, name in self._queued:
+                self.background(coro, name)
+            self._queued = []
+            try:
+                await self._stopping.wait()
+            finally:
+                for task in self._tasks:
+                    task.cancel()
+                self._group = None
+
+    def background(self, coro: Coroutine[Any, Any, Any], name: str | None = None) -> None:
+        """Run a coroutine alongside the game (from when play() starts), until it's done or the driver stops.
+        Blocking work in it belongs in asyncio.to_thread, to keep the game responsive."""
+        if self._group is None:
+            self._queued.append((coro, name))
+        else:
+            self._tasks.append(self._group.create_task(coro, name=name))
+
+    def stop(self) -> None:
+        """Have play() return, cancelling whatever is still running"""
+        self._stopping.set()
+
+    async def _read_input(self) -> None:
+        while True:
+            key_str = await asyncio.to_thread(self._read_key, self.poll_interval)
+            if key_str:
+                self.keys.put_nowait(key_str)
+            if key_str == "KEY_ESCAPE":
+                return  # (the keys before it are still applied)
+
+    def _read_key(self, timeout: float) -> str:
+        """The next key pressed within timeout seconds, or ''"""
+        key = self.term.inkey(timeout=timeout)
+        return Input.key_to_str(key) if key else ""
+
+    async def _run_updates(self) -> None:
+        if self.tick_rate is None:
+            while True:
+                key_str = await self.keys.get()
+                if key_str == "KEY_ESCAPE":
+                    # Exit on ESC
+                    self.stop()
+                    return
+                if key_str == self.profile_key:
+                    self.toggle_profile()
+                    self._redraw.set()
+                    continue
+                self.timing = FrameTiming()
+                await self.update_async(Input([key_str]), 0)
+                self._redraw.set()
+
+        step = 1.0 / self.tick_rate
+        last = self.clock()
+        while True:
+            await asyncio.sleep(max(step - self.lag - (self.clock() - last), 0.0))
+            while not self.keys.empty():
+                key_str = self.keys.get_nowait()
+                if key_str == "KEY_ESCAPE":
+                    self.stop()
+                    return
+                if key_str == self.profile_key:
+                    self.toggle_profile()
+                    self._redraw.set()
+                    continue
+                self.pending_keys.append(key_str)
+
+            now = self.clock()
+            self.lag += now - last
+            last = now
+            for user_input in self._due_updates(step):
+                await self.update_async(user_input, step)
+            if self.timing.updates:
+                self._redraw.set()
+
+    async def update_async(self, user_input: Input, delta: float) -> None:
+        """Update the state once. (update_time includes whatever else ran while the Module awaited.)"""
+        if self.recorder is not None:
+            self.recorder.record(user_input, delta)
+        start = self.clock()
+        with PROFILER.span("module.update"):
+            self.state = await self.module.update_async(self.state, user_input, delta)
+        self.updated = True
+        self.timing.updates += 1
+        self.timing.update_time += self.clock() - start
+
+    async def _render(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._redraw.wait(), self.resize_poll)
+            except TimeoutError:
+                pass
+            self._redraw.clear()
+            if not self.draw_due():
+                continue
+            start = self.clock()
+            self.output.begin_frame()
+            with PROFILER.span("module.draw"):
+                await self.module.draw_async(self.state, self.output)
+            self.output.clear_offset()  # just incase someone forgot to pop
+            self.output.end_frame()
+            self.timing.draw_time = self.clock() - start
+            self._drawn(start)
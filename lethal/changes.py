@@ -0,0 +1,183 @@
+"""Change tracking: which Entities had Components of some kinds added, removed or changed, tick by tick.
+
+    tracker = ChangeTracker.of(estore, Loc, Health)   # opt in (once per store and set of kinds)
+    reader = tracker.reader()                          # a consumer's own cursor
+    for ent in reader.read().entities():               # everything that changed since its last read
+        ...
+
+    tracker = ChangeTracker.of(estore, Loc, Health, by_tick=True)
+    tracker.last[Loc].changed                          # Entities whose Loc was assigned during the last tick
+
+Field assignments are recorded as they happen (see Component). Changes the store can't see, like appending to a
+list field in place, are recorded by marking them: mark_changed(estore, ent, kind). The Scheduler ends a tick after
+every run (see end_tick). Stores without a tracker pay nothing.
+
+What's recorded is held until it's let go of: a reader's changes until it reads them (or is dropped), and a by_tick
+tracker's until its tick is ended. So read what you keep a reader for, and only ask for by_tick where ticks are ended.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Type
+from weakref import WeakSet
+
+from .ecs import Component, Entity, EntityStore, EntityStoreListener, Handle, component_kinds
+
+
+@dataclass
+class KindChanges:
+    """The Entities whose Components of one kind were added, removed or changed (by Handle).
+    An Entity can be in more than one of them (eg. added, then changed): check what it holds now."""
+
+    added: dict[Handle, Entity] = field(default_factory=dict)
+    removed: dict[Handle, Entity] = field(default_factory=dict)  # (including Entities destroyed)
+    changed: dict[Handle, Entity] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+class Changes:
+    """KindChanges by kind"""
+
+    kinds: dict[Type[Component], KindChanges]
+
+    def __init__(self) -> None:
+        self.kinds = {}
+
+    def __getitem__(self, kind: Type[Component]) -> KindChanges:
+        """The changes to kind (empty if none)"""
+        return self.kinds.get(kind) or KindChanges()
+
+    def __iter__(self) -> Iterator[Type[Component]]:
+        return iter(self.kinds)
+
+    def __bool__(self) -> bool:
+        return any(self.kinds.values())
+
+    def entities(self) -> list[Entity]:
+        """Every Entity with a change of any kind, once each"""
+        found: dict[Handle, Entity] = {}
+        for kind_changes in self.kinds.values():
+            found.update(kind_changes.added)
+            found.update(kind_changes.removed)
+            found.update(kind_changes.changed)
+        return list(found.values())
+
+    def _record(self, what: str, kind: Type[Component], ent: Entity) -> None:
+        kind_changes = self.kinds.get(kind)
+        if kind_changes is None:
+            kind_changes = self.kinds[kind] = KindChanges()
+        getattr(kind_changes, what)[ent.handle] = ent
+
+
+class ChangeReader:
+    """A consumer's view of a ChangeTracker: the changes since its last read"""
+
+    pending: Changes
+
+    def __init__(self) -> None:
+        self.pending = Changes()
+
+    def read(self) -> Changes:
+        """The changes since the last read (or since the reader was made), forgotten as they're returned"""
+        changes, self.pending = self.pending, Changes()
+        return changes
+
+
+class ChangeTracker(EntityStoreListener):
+    """Records the changes to Components of the given kinds (and their subclasses) for its readers.
+    Readers made by reader() each collect the changes since their own last read.
+    If by_tick, it also keeps them by tick: `current` as the tick goes on, and `last` once it's over (see end_tick).
+    Otherwise those stay empty, so a tracker nobody ends ticks for doesn't collect changes (and Entities) forever.
+    Entities already in the store when the tracker is added count as added in its first tick."""
+
+    tick: int
+    by_tick: bool
+    current: Changes
+    last: Changes
+    readers: "WeakSet[ChangeReader]"
+
+    def __init__(self, kinds: tuple[Type[Component], ...], by_tick: bool = False):
+        self.kinds = kinds
+        self.tick = 0
+        self.by_tick = by_tick
+        self.current = Changes()
+        self.last = Changes()
+        self.readers = WeakSet()
+        self._tracked: dict[type, list[Type[Component]]] = {}
+
+    @classmethod
+    def of(cls, estore: EntityStore, *kinds: Type[Component], by_tick: bool = False) -> "ChangeTracker":
+        """Return the estore's ChangeTracker for these kinds, starting it on first use.
+        by_tick=True makes it keep changes by tick (from the current tick on, if it was already started)."""
+        tracker = estore.index((cls, frozenset(kinds)), lambda: cls(kinds, by_tick))
+        tracker.by_tick = tracker.by_tick or by_tick
+        return tracker
+
+    def reader(self) -> ChangeReader:
+        """A new reader, collecting changes from now on (for as long as it's kept)"""
+        reader = ChangeReader()
+        self.readers.add(reader)
+        return reader
+
+    def end_tick(self) -> None:
+        """The current tick's changes become `last`, and a new tick starts"""
+        self.last = self.current
+        self.current = Changes()
+        self.tick += 1
+
+    def mark(self, ent: Entity, kind: Type[Component]) -> None:
+        """Record a change to ent's Component(s) of kind made behind the store's back (eg. a list field appended to)"""
+        for tracked in self._tracked_kinds(kind):
+            self._record("changed", tracked, ent)
+
+    def entity_created(self, ent: Entity) -> None:
+        for comp in ent.components:
+            self.component_added(ent, comp)
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        for comp in ent.components:
+            self.component_removed(ent, comp)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        for kind in self._tracked_kinds(type(comp)):
+            self._record("added", kind, ent)
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        for kind in self._tracked_kinds(type(comp)):
+            self._record("removed", kind, ent)
+
+    def component_changed(self, ent: Entity, comp: Component, field: str, old: Any) -> None:
+        for kind in self._tracked_kinds(type(comp)):
+            self._record("changed", kind, ent)
+
+    def _tracked_kinds(self, comp_class: type) -> list[Type[Component]]:
+        """The tracked kinds a Component class answers to"""
+        kinds = self._tracked.get(comp_class)
+        if kinds is None:
+            kinds = self._tracked[comp_class] = [k for k in component_kinds(comp_class) if k in self.kinds]
+        return kinds
+
+    def _record(self, what: str, kind: Type[Component], ent: Entity) -> None:
+        # pylint: disable=protected-access
+        if self.by_tick:
+            self.current._record(what, kind, ent)
+        for reader in self.readers:
+            reader.pending._record(what, kind, ent)
+
+
+def trackers(estore: EntityStore) -> list[ChangeTracker]:
+    """The ChangeTrackers started on estore"""
+    return [index for index in estore.indexes.values() if isinstance(index, ChangeTracker)]
+
+
+def end_tick(estore: EntityStore) -> None:
+    """End the tick of every ChangeTracker on estore (the Scheduler does, after running its Systems)"""
+    for tracker in trackers(estore):
+        tracker.end_tick()
+
+
+def mark_changed(estore: EntityStore, ent: Entity, kind: Type[Component]) -> None:
+    """Record a change to ent's kind Component(s) in every ChangeTracker on estore (see ChangeTracker.mark)"""
+    for tracker in trackers(estore):
+        tracker.mark(ent, kind)
@@ -0,0 +1,195 @@
+"""Columnar storage: numeric Component fields kept in NumPy arrays.
+
+    columns = ColumnStore.of(estore, Loc, Health)
+    ent[Loc].x += 1                   # per-entity access still works, via the Component itself
+    locs = columns[Loc]
+    locs.assign("x", np.clip(locs.view("x") + 1, 0, ROOM_WIDTH - 1))   # whole-world, vectorized
+"""
+
+from typing import Any, Iterable, Type, get_type_hints
+
+import numpy as np
+
+from .ecs import Component, Entity, EntityStore, EntityStoreListener, kind_of
+from .slots import ComponentMeta, tracked_class
+
+DTYPES: dict[type, Any] = {int: np.int64, float: np.float64, bool: np.bool_}
+
+
+def numeric_fields(kind: Type[Component]) -> dict[str, Any]:
+    """The fields of kind declared as plain int, float or bool, with their dtypes.
+    Optional ones (int | None etc) aren't: an array can't hold None, so they stay in the Component."""
+    hints = get_type_hints(kind)
+    found = {}
+    for name in kind.__component_fields__:
+        annotation = hints.get(name)
+        if annotation in DTYPES:
+            found[name] = DTYPES[annotation]
+    return found
+
+
+class Columns:
+    """The arrays for one Component kind. Each Component stored here owns a slot (an index into every array).
+    Slots of removed Components are recycled; `live` marks the slots in use.
+
+    Arrays may be read and written directly. Writes made that way aren't seen by EntityStore listeners
+    (indexes etc); use assign() to write and report the values that actually changed."""
+
+    kind: Type[Component]
+    dtypes: dict[str, Any]
+    arrays: dict[str, np.ndarray]
+    live: np.ndarray
+    owners: list[Component | None]
+    free: list[int]
+    proxy_class: type
+
+    def __init__(self, kind: Type[Component], capacity: int = 64):
+        self.kind = kind
+        self.dtypes = numeric_fields(kind)
+        if not self.dtypes:
+            raise ValueError(f"{kind.__name__} has no int, float or bool fields to store in columns")
+        self.arrays = {name: np.zeros(capacity, dtype) for name, dtype in self.dtypes.items()}
+        self.live = np.zeros(capacity, np.bool_)
+        self.owners = []
+        self.free = []
+        self.proxy_class = _make_proxy_class(self)
+
+    def __len__(self) -> int:
+        return len(self.owners) - len(self.free)
+
+    @property
+    def size(self) -> int:
+        """Slots handed out so far (the high-water mark). Arrays are valid up to here."""
+        return len(self.owners)
+
+    def view(self, field: str) -> np.ndarray:
+        """The array for field, trimmed to size"""
+        return self.arrays[field][: self.size]
+
+    def slots(self) -> np.ndarray:
+        """Indices of the slots in use"""
+        return np.flatnonzero(self.live[: self.size])
+
+    def slot_of(self, comp: Component) -> int:
+        """The slot owned by a Component stored here"""
+        return comp._store_slot  # pylint: disable=protected-access
+
+    def slots_of(self, ents: Iterable[Entity]) -> np.ndarray:
+        """The slots of the given Entities' Components of this kind (Entities without one are skipped)"""
+        return np.array(
+            [self.slot_of(ent[self.kind]) for ent in ents if ent.has_any(self.kind)],
+            dtype=np.intp,
+        )
+
+    def assign(self, field: str, values: Any, slots: np.ndarray | None = None, notify: bool = True) -> np.ndarray:
+        """Write values (an array or scalar) into field at slots (default: every slot in use).
+        Returns the slots whose value changed. Unless notify=False, listeners are told about each of them
+        (which costs a Python call per change: skip it when no index depends on this field)."""
+        if slots is None:
+            slots = self.slots()
+        array = self.arrays[field]
+        old = array[slots]
+        array[slots] = values
+        mask = old != array[slots]
+        changed = slots[mask]
+        if not notify:
+            return changed
+        for slot, old_value in zip(changed.tolist(), old[mask].tolist()):
+            owner = self.owners[slot]
+            if owner is not None:
+                owner._changed(field, old_value)  # pylint: disable=protected-access
+        return changed
+
+    def adopt(self, comp: Component) -> None:
+        """Move comp's numeric values into the arrays and switch it to the proxy class"""
+        values = {name: getattr(comp, name) for name in self.dtypes}
+        if self.free:
+            slot = self.free.pop()
+            self.owners[slot] = comp
+        else:
+            slot = len(self.owners)
+            self.owners.append(comp)
+            if slot >= len(self.live):
+                self._grow()
+        for name, value in values.items():
+            self.arrays[name][slot] = value
+        self.live[slot] = True
+        object.__setattr__(comp, "_store_slot", slot)
+        object.__setattr__(comp, "__class__", self.proxy_class)
+
+    def release(self, comp: Component) -> None:
+        """Move comp's values back into the Component, switch it back to its own class, recycle its slot"""
+        slot = self.slot_of(comp)
+        values = {name: getattr(comp, name) for name in self.dtypes}
+        object.__setattr__(comp, "__class__", tracked_class(self.kind))
+        for name, value in values.items():
+            object.__setattr__(comp, name, value)
+        self.owners[slot] = None
+        self.live[slot] = False
+        self.free.append(slot)
+
+    def _grow(self) -> None:
+        capacity = len(self.live) * 2
+        for name, array in self.arrays.items():
+            self.arrays[name] = np.concatenate([array, np.zeros(capacity - len(array), array.dtype)])
+        self.live = np.concatenate([self.live, np.zeros(capacity - len(self.live), np.bool_)])
+
+
+def _make_proxy_class(columns: Columns) -> type:
+    """A subclass of columns.kind's tracked class whose numeric fields are properties reading and writing
+    the arrays. Same slots, so an attached Component can switch class in place. It answers to the same kinds
+    as the original (see ecs.component_kinds), and everything else (eq, clone, to_dict...) goes through getattr."""
+    kind = columns.kind
+    arrays = columns.arrays
+
+    def column_property(name: str) -> property:
+        def get(self) -> Any:
+            return arrays[name][self._store_slot].item()
+
+        def put(self, value: Any) -> None:
+            arrays[name][self._store_slot] = value
+
+        return property(get, put)
+
+    namespace: dict[str, Any] = {name: column_property(name) for name in columns.dtypes}
+    namespace.update({"__lethal_proxy__": True, "__module__": kind.__module__, "kind": kind.kind})
+    return ComponentMeta(f"{kind.__name__}Column", (tracked_class(kind),), namespace)
+
+
+class ColumnStore(EntityStoreListener):
+    """Keeps the numeric fields of the chosen Component kinds in NumPy arrays.
+    Components of those (exact) kinds are adopted as they're added to the store: they stay the
+    same objects, so ent[Loc].x and every index keep working, but their numbers live in columns[Loc]
+    where they can be updated for many entities at once. Removed Components get their values back."""
+
+    columns: dict[Type[Component], Columns]
+
+    def __init__(self, *kinds: Type[Component]):
+        self.kinds = kinds
+        self.columns = {kind: Columns(kind) for kind in kinds}
+
+    @classmethod
+    def of(cls, estore: EntityStore, *kinds: Type[Component]) -> "ColumnStore":
+        """Return the estore's ColumnStore for these kinds, creating it on first use"""
+        return estore.index((cls, *kinds), lambda: cls(*kinds))
+
+    def __getitem__(self, kind: Type[Component]) -> Columns:
+        return self.columns[kind]
+
+    def entity_created(self, ent: Entity) -> None:
+        for comp in ent.components:
+            self.component_added(ent, comp)
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        for comp in ent.components:
+            self.component_removed(ent, comp)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        columns = self.columns.get(kind_of(comp))
+        if columns is not None:
+            columns.adopt(comp)
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        for columns in self.columns.values():
+            if type(comp) is columns.proxy_class:
+                columns.release(comp)
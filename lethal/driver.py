@@ -1,50 +1,260 @@
 """Dungeon game: main"""
 
-from typing import Generic, TypeVar
+import time
+from dataclasses import dataclass
+from typing import Generic, Iterator, TypeVar
 
 from blessed import Terminal
 
 from .input import Input
-from .output import Output
+from .output import FramebufferOutput, Output
+from .profiling import PROFILER
+from .recording import InputRecorder
 
 
 M = TypeVar("M")
 S = TypeVar("S")
 
 
+@dataclass
+class FrameTiming:
+    """How the last frame went. Times are in seconds."""
+
+    updates: int = 0  # Module.update calls (fixed steps, in tick mode)
+    update_time: float = 0.0
+    draw_time: float = 0.0
+    dropped: float = 0.0  # simulation time skipped because updates couldn't keep up
+
+
 class Driver(Generic[M, S]):
-    """Terminal game driver"""
+    """Terminal game driver.
+    By default the loop blocks for each key, and updates once per key with delta=0.
+    Given a tick_rate (updates per second), it runs a fixed-timestep loop instead: Module.update is called every
+    1/tick_rate seconds of real time with delta=1/tick_rate and the keys pressed since the previous update (maybe none).
+    When updates fall behind, up to max_updates are run back to back before drawing, and the rest of the lag is
+    dropped. When they're ahead, the driver waits for keys until the next update is due.
+    A frame is only drawn when there's something new to show (see draw_due): an idle game draws nothing, and (with
+    a FramebufferOutput) writes nothing, but for a refresh every refresh_interval seconds.
+    The profile key (F12) shows or hides the timings of lethal.profiling over the game (it isn't passed on to the
+    Module). Given a profile path, timings are collected from the start, and written there on exit."""
 
     module: M
     state: S
     term: Terminal
     output: Output
+    tick_rate: float | None
+    max_updates: int
+    timing: FrameTiming
+    lag: float  # real time not yet simulated
+    pending_keys: list[str]
+    recorder: InputRecorder | None
+    profile: str | None
+    profiling_was: bool  # PROFILER.enabled before this Driver, put back by finish()
+    refresh_interval: float | None  # seconds: the longest to go without drawing (None: forever)
+    force_draw: bool  # draw the next frame, whatever the Module says
+    updated: bool  # Module.update has run since the last frame
+    drawn_at: float  # clock() of the last frame
+    drawn_size: tuple[int, int] | None  # terminal size at the last frame
+    sized_at: float  # clock() of the last check for a resize (it costs a couple of ioctls)
+
+    clock = staticmethod(time.perf_counter)
+    profile_key = "KEY_F12"
+    resize_poll = 0.25  # seconds between checks for a resized terminal, while waiting for keys
 
-    def __init__(self, module: M):
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        module: M,
+        output_class: type[Output] = FramebufferOutput,
+        tick_rate: float | None = None,
+        max_updates: int = 5,
+        record: str | None = None,
+        term: Terminal | None = None,
+        profile: str | None = None,
+        refresh_interval: float | None = 5.0,
+    ):
         self.module = module
         self.state = self.module.create()
-        self.term = Terminal()
-        self.output = Output(self.term)
+        self.term = term if term is not None else Terminal()
+        self.output = output_class(self.term)
+        self.tick_rate = tick_rate
+        self.max_updates = max_updates
+        self.timing = FrameTiming()
+        self.lag = 0.0
+        self.pending_keys = []
+        # Every Input given to the Module goes to the recording file, if any (see lethal.recording)
+        self.recorder = None
+        if record is not None:
+            module_class = type(module)
+            self.recorder = InputRecorder(
+                record, module=f"{module_class.__module__}.{module_class.__qualname__}", tick_rate=tick_rate
+            )
+        self.profile = profile
+        self.profiling_was = PROFILER.enabled
+        if profile is not None:
+            PROFILER.enabled = True
+        self.refresh_interval = refresh_interval
+        self.force_draw = False
+        self.updated = False
+        self.drawn_at = 0.0
+        self.drawn_size = None
+        self.sized_at = 0.0
 
     def loop(self) -> None:
         """i/o loop"""
         term = self.term
-        with term.cbreak(), term.fullscreen(), term.hidden_cursor():
-            while True:
-                # Render
-                print(term.home + term.clear, end="")
-                self.module.draw(self.state, self.output)
-                self.output.clear_offset()  # just incase someone forgot to pop
+        try:
+            with term.cbreak(), term.fullscreen(), term.hidden_cursor():
+                if self.tick_rate is None:
+                    self._loop_per_key()
+                else:
+                    self._loop_fixed(1.0 / self.tick_rate)
+        finally:
+            self.finish()
+
+    def finish(self) -> None:
+        """Let the Module finish with the state, close the recording and write the profile, if any.
+        Profiling goes back to what it was before the Driver."""
+        self.module.finish(self.state)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.profile is not None:
+            PROFILER.dump(self.profile)
+        PROFILER.enabled = self.profiling_was
+
+    def toggle_profile(self) -> None:
+        """Show or hide the profiling overlay.
+        Timings are collected while it's shown (or a profile is to be written)."""
+        if self.output.overlay is None:
+            PROFILER.enabled = True
+            self.output.overlay = PROFILER
+        else:
+            PROFILER.enabled = self.profile is not None or self.profiling_was
+            self.output.overlay = None
+            self.output.refresh()
+        self.force_draw = True
+
+    def _loop_per_key(self) -> None:
+        while True:
+            # Render
+            if self.draw_due():
+                self.timing = FrameTiming()
+                self.draw()
+
+            key_str = self._next_key_str(self.resize_poll)
+            if not key_str:
+                continue
+
+            if key_str == "KEY_ESCAPE":
+                # Exit on ESC
+                break
+            if key_str == self.profile_key:
+                self.toggle_profile()
+                continue
+
+            # Update State
+            self.update(Input([key_str]), 0)
+
+    def _loop_fixed(self, step: float) -> None:
+        self.timing = FrameTiming()
+        self.draw()
+        last = self.clock()
+        while True:
+            # Wait for keys, but no longer than until the next update is due
+            due = step - self.lag - (self.clock() - last)
+            keys = self._read_keys(min(max(due, 0.0), self.resize_poll))
+            if "KEY_ESCAPE" in keys:
+                break
+            if self.profile_key in keys:
+                self.toggle_profile()
+                keys = [key for key in keys if key != self.profile_key]
+            self.pending_keys.extend(keys)
+
+            now = self.clock()
+            self.lag += now - last
+            last = now
+            self.advance(step)
+            if self.draw_due():
+                self.draw()
+
+    def advance(self, step: float) -> int:
+        """Run an update for every whole step of lag (up to max_updates), starting a new frame's timing.
+        Returns the number of updates run."""
+        for user_input in self._due_updates(step):
+            self.update(user_input, step)
+        return self.timing.updates
+
+    def _due_updates(self, step: float) -> Iterator[Input]:
+        """The Input for each update due (see advance), consuming lag and pending keys as they're taken"""
+        timing = self.timing = FrameTiming()
+        while self.lag >= step:
+            if timing.updates == self.max_updates:
+                # Too far behind to catch up: give up on the whole steps left
+                timing.dropped = self.lag - self.lag % step
+                self.lag %= step
+                break
+            keys, self.pending_keys = self.pending_keys, []
+            yield Input(keys)
+            self.lag -= step
+
+    def update(self, user_input: Input, delta: float) -> None:
+        """Update the state once"""
+        if self.recorder is not None:
+            self.recorder.record(user_input, delta)
+        start = self.clock()
+        with PROFILER.span("module.update"):
+            self.state = self.module.update(self.state, user_input, delta)
+        self.updated = True
+        self.timing.updates += 1
+        self.timing.update_time += self.clock() - start
+
+    def draw_due(self) -> bool:
+        """Whether to draw a frame now: if updates have run and the Module has something new to show from them
+        (Module.needs_redraw, or the profiling overlay is up), the terminal was resized, or it's been refresh_interval
+        since the last frame. (A resize has the Module draw everything, see Output.refresh; a refresh repaints the
+        whole screen, see Output.redraw.)"""
+        if self.force_draw or self.drawn_size is None:
+            return True
+        now = self.clock()
+        if now - self.sized_at >= self.resize_poll:
+            self.sized_at = now
+            if (self.term.width, self.term.height) != self.drawn_size:
+                self.output.refresh()
+                return True
+        if self.refresh_interval is not None and now - self.drawn_at >= self.refresh_interval:
+            self.output.redraw()
+            return True
+        return self.updated and (self.output.overlay is not None or self.module.needs_redraw(self.state))
 
-                key_str = self._next_key_str()
+    def draw(self) -> None:
+        """Draw a frame"""
+        start = self.clock()
+        self.output.begin_frame()
+        with PROFILER.span("module.draw"):
+            self.module.draw(self.state, self.output)
+        self.output.clear_offset()  # just incase someone forgot to pop
+        self.output.end_frame()
+        self.timing.draw_time = self.clock() - start
+        self._drawn(start)
 
-                if key_str == "KEY_ESCAPE":
-                    # Exit on ESC
-                    break
+    def _drawn(self, at: float) -> None:
+        """Note a frame was drawn (at clock() time at), for draw_due"""
+        self.force_draw = False
+        self.updated = False
+        self.drawn_at = at
+        self.drawn_size = (self.term.width, self.term.height)
+        self.sized_at = at
 
-                # Update State
-                self.state = self.module.update(self.state, Input([key_str]), 0)
+    def _next_key_str(self, timeout: float | None = None) -> str:
+        """The next key pressed (within timeout seconds, if given), or ''"""
+        key = self.term.inkey(timeout=timeout)
+        return Input.key_to_str(key) if key else ""
 
-    def _next_key_str(self) -> str:
-        key = self.term.inkey()
-        return Input.key_to_str(key)
+    def _read_keys(self, timeout: float) -> list[str]:
+        """Keys pressed within timeout seconds (waiting only for the first one), possibly none"""
+        keys = []
+        key = self.term.inkey(timeout=timeout)
+        while key:
+            keys.append(Input.key_to_str(key))
+            key = self.term.inkey(timeout=0)
+        return keys
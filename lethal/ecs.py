@@ -1,11 +1,54 @@
 """Lethal ECS"""
-from typing import Type, TypedDict, TypeVar, cast
+from copy import copy, deepcopy
+from functools import cache
+from threading import RLock
+from typing import Any, BinaryIO, Callable, ClassVar, Hashable, Iterable, Iterator, Self, Type, TypedDict, TypeVar, cast
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 from .input import Input
+from .slots import ATOMIC, ComponentMeta, FieldSpec, tracked_class, validator_model
 
 EntityId = str
+# An Entity's id within its EntityStore: a slot number (low SLOT_BITS) and the generation of that slot.
+# Destroying an Entity bumps its slot's generation and frees the slot for reuse, so handles of destroyed
+# Entities go stale instead of pointing at whoever gets the slot next.
+Handle = int
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+
+def make_handle(slot: int, generation: int) -> Handle:
+    """Pack a slot and generation into a Handle"""
+    return (generation << SLOT_BITS) | slot
+
+
+def handle_slot(handle: Handle) -> int:
+    """The slot part of a Handle"""
+    return handle & SLOT_MASK
+
+
+def handle_generation(handle: Handle) -> int:
+    """The generation part of a Handle"""
+    return handle >> SLOT_BITS
+
+
+def eid_of(handle: Handle) -> EntityId:
+    """The string form of a Handle: "e<slot>", or "e<slot>.<generation>" once the slot has been reused"""
+    generation = handle >> SLOT_BITS
+    if generation:
+        return f"e{handle & SLOT_MASK}.{generation}"
+    return f"e{handle & SLOT_MASK}"
+
+
+def handle_of(eid: EntityId) -> Handle:
+    """Parse the string form of a Handle (see eid_of). Raises ValueError if eid isn't one."""
+    if not eid.startswith("e"):
+        raise ValueError(f"Not an entity id: {eid!r}")
+    slot, _, generation = eid[1:].partition(".")
+    if not slot.isdigit() or not (generation.isdigit() or generation == ""):
+        raise ValueError(f"Not an entity id: {eid!r}")
+    return make_handle(int(slot), int(generation or 0))
 
 
 class EcsError(RuntimeError):
@@ -26,47 +69,241 @@ class NoEntityError(EcsError):
         super(NoEntityError, self).__init__(f"EntityStore has no Entity with eid {eid}")
 
 
-class Component(BaseModel):
-    """A Component has an entity id (eid) and a kind (auto-set to the name of the class)"""
+class StaleEntityError(NoEntityError):
+    """Raised when looking up an Entity by the id of one that has been destroyed (its slot may have been reused)"""
+
+    def __init__(self, eid: "EntityId"):
+        super(NoEntityError, self).__init__(f"Entity {eid} has been destroyed")
+
+
+class AttachedComponentError(EcsError):
+    """Raised when taking a Component that already belongs to an Entity"""
+
+    def __init__(self, comp: "Component", ent: "Entity"):
+        super(AttachedComponentError, self).__init__(
+            f"{comp.kind} already belongs to Entity {ent.eid}; remove it first, or add() a copy"
+        )
+
+
+class DuplicateKeyError(EcsError):
+    """Raised when a unique FieldIndex would file two Entities under the same value"""
+
+    def __init__(self, index: "FieldIndex", value: Any, eid: "EntityId | None"):
+        whose = f"Entity {eid}" if eid is not None else "a new Entity"
+        super(DuplicateKeyError, self).__init__(
+            f"{index.kind.__name__}.{index.field} {value!r} of {whose} is already taken"
+        )
+
+
+class DuplicateKindError(EcsError):
+    """Raised when a Component class (or alias) claims a kind name already registered to another class"""
+
+    def __init__(self, name: str, existing: type, newcomer: type):
+        super(DuplicateKindError, self).__init__(
+            f"Component kind {name!r} is already taken by {existing.__module__}.{existing.__qualname__}"
+            f" (while registering {newcomer.__module__}.{newcomer.__qualname__})"
+        )
+
+
+class UnknownKindError(EcsError):
+    """Raised when deserializing a Component whose kind isn't registered"""
+
+    def __init__(self, name: Any):
+        super(UnknownKindError, self).__init__(f"No Component class is registered for kind {name!r}")
+
+
+class NoMatchError(EcsError):
+    """Raised when a FieldIndex has no Entity filed under the requested value"""
+
+    def __init__(self, index: "FieldIndex", value: Any):
+        super(NoMatchError, self).__init__(f"No Entity has {index.kind.__name__}.{index.field} == {value!r}")
+
+
+class Component(metaclass=ComponentMeta):
+    """A Component has an entity id (eid) and a kind (the name of the class, shared by all instances).
+
+    Declare fields like a pydantic model:
+
+        class Health(Component):
+            max: int
+            current: int
+            poisoned: bool | None = Field(default=False)
+
+    Instances are plain slotted objects: construction does no validation.
+    Pydantic validation happens at the edges: to_dict, from_dict and the model_* helpers.
+    While a Component is attached to an Entity, assigning its fields is reported to the Entity's store.
+
+    Each subclass is registered under its kind as it's defined (see find_class), so kinds must be unique.
+    A renamed class can keep loading old data by listing its former kinds: __kind_aliases__ = ("OldName",)"""
+
+    # _entity: the Entity this Component has been added to, if any. Field changes are reported through it.
+    # _store_slot: for storage backends that park the Component's values elsewhere (see lethal.columns).
+    __private_slots__ = ("_entity", "_store_slot")
+
+    __component_fields__: ClassVar[dict[str, FieldSpec]]
+    kind: ClassVar[str]
 
     eid: EntityId | None = Field(default=None)
-    kind: str | None = Field(default=None)
 
-    def __init__(self, **data):
-        if data.get("kind") is None:
-            data["kind"] = type(self).__name__
-        super().__init__(**data)
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if not cls.__dict__.get("__lethal_proxy__"):
+            register_kind(cls.kind, cls)
+            for alias in cls.__dict__.get("__kind_aliases__", ()):
+                register_kind(alias, cls)
+
+    def _attach(self, ent: "Entity") -> None:
+        """Start reporting field changes through ent (switches to the tracked class)"""
+        object.__setattr__(self, "_entity", ent)
+        tracked = _tracked_kind(type(self))
+        if type(self) is not tracked:
+            object.__setattr__(self, "__class__", tracked)
+
+    def _detach(self) -> None:
+        """Stop reporting field changes (switches back to the plain class)"""
+        object.__setattr__(self, "__class__", kind_of(self))
+        object.__setattr__(self, "_entity", None)
+
+    def _check_change(self, name: str, value: Any) -> None:
+        """Called before a field assignment: raises (eg. DuplicateKeyError) if the store can't take it,
+        before anything has changed"""
+        # pylint: disable=protected-access
+        ent = self._entity
+        if ent is not None and ent._store is not None and ent._store.unique_indexes:
+            ent._store.check_change(ent, self, name, value)
+
+    def _changed(self, name: str, old: Any) -> None:
+        """Report a field assignment to the store of the Entity holding this Component, if any"""
+        # pylint: disable=protected-access
+        ent = self._entity
+        if ent is not None and ent._store is not None:
+            ent._store.component_changed(ent, self, name, old)
+
+    def _values(self) -> dict[str, Any]:
+        """Field name -> value"""
+        return {name: getattr(self, name) for name in self.__component_fields__}
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Component) or kind_of(self) is not kind_of(other):
+            return False
+        return all(getattr(self, name) == getattr(other, name) for name in self.__component_fields__)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self._values().items())
+        return f"{self.kind}({fields})"
+
+    def __copy__(self) -> Self:
+        return kind_of(self)(**self._values())  # type: ignore[return-value]
 
-    def clone(self, eid=None) -> "Component":
-        """Create a deep copy of this component.
+    def __deepcopy__(self, memo: dict) -> Self:
+        return self.clone()
+
+    def __reduce__(self):
+        # Only the values travel: a copy made by pickling is a plain, detached Component
+        return (_rebuild_component, (kind_of(self), self._values()))
+
+    def clone(self, eid=None) -> Self:
+        """Create a deep copy of this component, detached from any Entity.
         If optional eid is given, the cloned component will have its eid updated."""
-        copy = self.model_copy(deep=True)
+        values: dict[str, Any] = {
+            name: value if isinstance(value, ATOMIC) else deepcopy(value) for name, value in self._values().items()
+        }
         if eid:
-            copy.eid = eid
-        return copy
+            values["eid"] = eid
+        return kind_of(self)(**values)  # type: ignore[return-value]
 
-    def to_dict(self):
-        """Return a dict representation of this Component"""
+    def to_dict(self) -> dict[str, Any]:
+        """Return a dict representation of this Component (validated)"""
         return self.model_dump()
 
     @classmethod
-    def from_dict(cls, d):
-        """Given a dict of component data, return a Component of the proper subclass"""
-        subclass = cls.find_class(d["kind"])
-
+    def from_dict(cls, d, trusted: bool = False):
+        """Given a dict of component data, return a Component of the proper subclass.
+        The data is validated (and coerced) by pydantic unless trusted=True, eg. when loading data we wrote."""
+        subclass = KINDS.get(d["kind"])
+        if subclass is None:
+            raise UnknownKindError(d["kind"])
+        if trusted:
+            fields = subclass.__component_fields__
+            return subclass(**{k: v for k, v in d.items() if k in fields})
         return subclass.model_validate(d)
 
     @classmethod
-    def find_class(cls, name):
-        """Given a Component kind name, find the matching Component subclass"""
+    def find_class(cls, name: str) -> "Type[Component] | None":
+        """Given a Component kind name (or alias), find the matching Component subclass"""
+        return KINDS.get(name)
+
+    # Pydantic-style helpers (these validate)
+
+    def model_dump(self, **kwargs) -> dict[str, Any]:
+        """Validate and dump to a dict, like pydantic's BaseModel.model_dump"""
+        return validator_model(kind_of(self)).model_validate(self._values()).model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        """Validate and dump to JSON, like pydantic's BaseModel.model_dump_json"""
+        return validator_model(kind_of(self)).model_validate(self._values()).model_dump_json(**kwargs)
+
+    @classmethod
+    def model_validate(cls, data: dict[str, Any]) -> Self:
+        """Build a Component of this class from validated data"""
+        model = validator_model(cls).model_validate(data)
+        return cls(**{name: getattr(model, name) for name in cls.__component_fields__})
+
+    @classmethod
+    def model_validate_json(cls, data: str | bytes) -> Self:
+        """Build a Component of this class from validated JSON"""
+        model = validator_model(cls).model_validate_json(data)
+        return cls(**{name: getattr(model, name) for name in cls.__component_fields__})
+
+    def model_copy(self, deep: bool = False) -> Self:
+        """Copy this Component (detached), like pydantic's BaseModel.model_copy"""
+        return self.clone() if deep else copy(self)
+
+
+# kind name (or alias) -> Component class. Filled in as Component classes are defined.
+KINDS: dict[str, Type[Component]] = {"Component": Component}
+
+
+def register_kind(name: str, comp_class: Type[Component]) -> None:
+    """File comp_class under name for find_class/from_dict. Raises DuplicateKindError if name belongs to
+    another class. (A class re-defined in the same module, eg. by importlib.reload, replaces the old one.)"""
+    existing = KINDS.get(name)
+    if existing is not None and existing is not comp_class:
+        if (existing.__module__, existing.__qualname__) != (comp_class.__module__, comp_class.__qualname__):
+            raise DuplicateKindError(name, existing, comp_class)
+    KINDS[name] = comp_class
+
+
+def _rebuild_component(cls: Type[Component], values: dict[str, Any]) -> Component:
+    """For unpickling"""
+    return cls(**values)
 
-        if cls.__name__ == name:
-            return cls
-        for subc in cls.__subclasses__():
-            x = subc.find_class(name)
-            if x:
-                return x
-        return None
+
+@cache
+def component_kinds(comp_class: Type[Component]) -> tuple[Type[Component], ...]:
+    """The kinds a Component class answers to: itself plus its Component ancestors.
+    Eg. if Loc3 extends Loc2, a Loc3 is found by ent[Loc3], ent[Loc2] and ent[Component].
+    Storage proxy classes (marked __lethal_proxy__, see lethal.columns) answer as the kind they stand in for."""
+    return tuple(
+        c
+        for c in comp_class.__mro__
+        if isinstance(c, type) and issubclass(c, Component) and not c.__dict__.get("__lethal_proxy__")
+    )
+
+
+def kind_of(comp: Component) -> Type[Component]:
+    """The most specific kind a Component answers to (normally just its class)"""
+    return component_kinds(type(comp))[0]
+
+
+@cache
+def _tracked_kind(comp_class: type) -> type:
+    """The tracked class of the kind a Component class answers as (see Component._attach)"""
+    return tracked_class(component_kinds(comp_class)[0])
 
 
 class EntityDict(TypedDict):
@@ -83,73 +320,159 @@ class Entity(BaseModel):
     """An Entity is just an ID and a bunch of Components,
     with some added conveniences."""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     eid: EntityId
     components: list[Component]
+    # Assigned by the EntityStore (0 for Entities living outside one). Not serialized: eid carries the same id.
+    handle: Handle = Field(default=0, exclude=True)
+
+    # Components keyed by every kind they answer to (see component_kinds), in add order.
+    _index: dict[Type[Component], list[Component]] = PrivateAttr(default_factory=dict)
+    # The EntityStore this Entity lives in (if any), notified as components come and go.
+    _store: "EntityStore | None" = PrivateAttr(default=None)
 
     def __init__(self, **data):
         # Any components passed to the constructor are:
-        #   - deep-copied
+        #   - deep-copied (unless copy_components=False, in which case they're taken as-is, see take())
         #   - given the eid of the Entity
-        data["components"] = [comp.clone(data["eid"]) for comp in data.get("components", [])]
+        if data.pop("copy_components", True):
+            data["components"] = [comp.clone(data["eid"]) for comp in data.get("components", [])]
+        else:
+            data["components"] = list(data.get("components", []))
+            for comp in data["components"]:
+                _check_detached(comp)
+                comp.eid = data["eid"]
         super().__init__(**data)
+        # pylint: disable=not-an-iterable
+        for comp in self.components:
+            self._index_component(comp)
 
     def add(self, comp: Component):
-        """Add the Component to this entity. eid will be assigned. deep-copy"""
+        """Add the Component to this entity. eid will be assigned. deep-copy
+        (Handy for stamping out entities from a prefab. If the Component is single-use, take() it instead.)"""
+        self.take(comp.clone(self.eid))
+
+    def take(self, comp: C) -> C:
+        """Add the Component itself to this entity, without copying: ownership moves to the Entity.
+        eid will be assigned. Returns comp.
+        Raises AttachedComponentError if comp already belongs to an Entity, or DuplicateKeyError if a unique
+        FieldIndex of the store would file this Entity under a value already taken (leaving everything as it was)."""
+        _check_detached(comp)
+        store = self._store
+        if store is not None and store.unique_indexes:
+            store.check_add(self, comp)
+        comp.eid = self.eid
         # pylint: disable=no-member
-        self.components.append(comp.clone(self.eid))
+        self.components.append(comp)
+        self._index_component(comp)
+        if store is not None:
+            store.component_added(self, comp)
+        return comp
 
     def remove(self, comp: Component) -> Component | None:
         """
         Delete the Component from this Entity.
         If found, deletes comp from components, sets eid=None, returns comp
         If not, returns None.
+        Components are matched by identity, not equality.
         """
-        ret = None
-        while self.contains(comp):
-            # (looping to doubly ensure comp didn't somehow make in the list twice)
-            # pylint: disable=no-member
-            self.components.remove(comp)
-            ret = comp
-            ret.eid = None
-        return ret
+        if not self.contains(comp):
+            return None
+        store = self._store
+        if store is not None and store.unique_indexes:
+            store.check_remove(self, comp)
+        index = self._index
+        for kind in component_kinds(type(comp)):
+            _remove_identical(index[kind], comp)
+            if not index[kind]:
+                del index[kind]
+        _remove_identical(self.components, comp)
+        if store is not None:
+            store.component_removed(self, comp)
+        comp._detach()  # pylint: disable=protected-access
+        comp.eid = None
+        return comp
 
     def contains(self, comp: Component) -> bool:
-        """Returns true if this Entity contains the precise component"""
-        # pylint: disable=no-member
-        return self.components.count(comp) > 0
+        """Returns true if this Entity contains the precise component (identity, not equality)"""
+        return any(c is comp for c in self._index.get(kind_of(comp), ()))
 
     def has_any(self, kind: Type[Component]) -> bool:
         """Returns True if Entity contains any Components of the given type"""
-        # TODO: DO THIS SMARTER
-        try:
-            _ = self[kind]
-            return True
-        except NoComponentError:
-            return False
+        return kind in self._index
 
     def has_all(self, kinds: list[Type[Component]]) -> bool:
         """Returns True if this Entity has a Component of each kind"""
-        for kind in kinds:
-            hits = self.select(kind)
-            if len(hits) == 0:
-                return False
-        return True
+        index = self._index
+        return all(kind in index for kind in kinds)
 
     def select(self, kind: Type[Component]) -> list[Component]:
         """Get a list of components matching the given kind"""
-        # pylint: disable=not-an-iterable
-        return [comp for comp in self.components if isinstance(comp, kind)]
+        return list(self._index.get(kind, ()))
 
     def __getitem__(self, kind: Type[C]) -> C:
         """Return the Component of given type.
         If Entity has multiple like-kind Components, the first is returned.
         If Entity has no matching Components, NoComponentError is raised.
         """
-        hits = self.select(kind)
-        if len(hits) > 0:
+        hits = self._index.get(kind)
+        if hits:
             return cast(C, hits[0])
         raise NoComponentError(self, kind)
 
+    def __eq__(self, other: object) -> bool:
+        # (BaseModel.__eq__ would also compare the private index and store)
+        return isinstance(other, Entity) and self.eid == other.eid and self.components == other.components
+
+    @classmethod
+    def _assemble(cls, eid: EntityId, handle: Handle, components: list[Component]) -> "Entity":
+        """Build an Entity around detached Components that already carry its eid, without validation.
+        For the EntityStore and loaders, which know their inputs are sound."""
+        index: dict[Type[Component], list[Component]] = {}
+        ent = cls._from_state(eid, handle, list(components), index)
+        for comp in components:
+            comp._attach(ent)  # pylint: disable=protected-access
+            for kind in component_kinds(type(comp)):
+                hits = index.get(kind)
+                if hits is None:
+                    index[kind] = [comp]
+                else:
+                    hits.append(comp)
+        return ent
+
+    @classmethod
+    def _from_state(
+        cls,
+        eid: EntityId,
+        handle: Handle,
+        components: list[Component],
+        index: dict[Type[Component], list[Component]],
+        store: "EntityStore | None" = None,
+    ) -> "Entity":
+        """An Entity holding exactly the given state; the caller attaches the Components.
+        Skips pydantic's __init__: the state is set the way unpickling sets it, for half the cost."""
+        ent = cls.__new__(cls)
+        ent.__setstate__(
+            {
+                "__dict__": {"eid": eid, "components": components, "handle": handle},
+                "__pydantic_fields_set__": {"eid", "components", "handle"},
+                "__pydantic_extra__": None,
+                "__pydantic_private__": {"_index": index, "_store": store},
+            }
+        )
+        return ent
+
+    def _index_component(self, comp: Component) -> None:
+        comp._attach(self)  # pylint: disable=protected-access
+        index = self._index
+        for kind in component_kinds(type(comp)):
+            hits = index.get(kind)
+            if hits is None:
+                index[kind] = [comp]
+            else:
+                hits.append(comp)
+
     def to_dict(self) -> EntityDict:
         """Eases serialization"""
         return {
@@ -158,56 +481,476 @@ class Entity(BaseModel):
         }
 
     @classmethod
-    def from_dict(cls, ed: EntityDict) -> "Entity":
-        """Given a dictionary w entity data, return an Entity"""
+    def from_dict(cls, ed: EntityDict, trusted: bool = False) -> "Entity":
+        """Given a dictionary w entity data, return an Entity.
+        Component data is validated unless trusted=True (see Component.from_dict)."""
         return cls(
             eid=ed["eid"],
-            components=[Component.from_dict(cd) for cd in ed["components"]],
+            components=[Component.from_dict(cd, trusted) for cd in ed["components"]],
+            copy_components=False,
         )
 
 
+def _check_detached(comp: Component) -> None:
+    ent = getattr(comp, "_entity", None)
+    if ent is not None:
+        raise AttachedComponentError(comp, ent)
+
+
+def _remove_identical(comps: list[Component], comp: Component) -> None:
+    """Remove comp from the list by identity. (list.remove would compare models field by field.)"""
+    for i, c in enumerate(comps):
+        if c is comp:
+            del comps[i]
+            return
+
+
 # Entity.remove_all ?
 
 # Entity.remove_all(kind) ?
 
 
-class EntityStore:
-    """EntityStore creates, holds and finds Entities"""
+class EntityStoreListener:
+    """Base class for things that track the contents of an EntityStore incrementally.
+    Component notifications are only delivered for Components answering to one of the listed kinds.
+    (Use kinds=(Component,) to hear about everything.)"""
+
+    kinds: tuple[Type[Component], ...] = ()
+
+    def entity_created(self, ent: Entity) -> None:
+        """An Entity joined the store (also replayed for existing Entities when the listener is added)"""
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        """An Entity left the store"""
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        """A Component was added to an Entity in the store"""
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        """A Component was removed from an Entity in the store"""
+
+    def component_changed(self, ent: Entity, comp: Component, field: str, old: Any) -> None:
+        """A field of a Component in the store was assigned a new value (old is the previous value)"""
+
+
+class Query(EntityStoreListener):
+    """A live view of the Entities having Components of all the given kinds.
+    Kept up to date as Entities and Components come and go, so iterating costs O(matches).
+    Iterate a copy (eg. list(query)) if you'll be adding/removing while iterating."""
+
+    matches: dict[Handle, Entity]
+
+    def __init__(self, kinds: tuple[Type[Component], ...]):
+        self.kinds = kinds
+        self.matches = {}
+        self._kind_list = list(kinds)
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self.matches.values())
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def __contains__(self, ent: Entity) -> bool:
+        return ent.handle in self.matches
+
+    def entity_created(self, ent: Entity) -> None:
+        if ent.has_all(self._kind_list):
+            self.matches[ent.handle] = ent
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        self.matches.pop(ent.handle, None)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        if ent.handle not in self.matches and ent.has_all(self._kind_list):
+            self.matches[ent.handle] = ent
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        if ent.handle in self.matches and not ent.has_all(self._kind_list):
+            del self.matches[ent.handle]
+
 
-    entities: dict[EntityId, Entity]
-    eid_counter: int
+class FieldIndex(EntityStoreListener):
+    """Finds Entities by the value of a Component field, eg. Door.door_id.
+    Entities are filed by their first Component of the kind (ie. ent[kind]).
+    A unique index raises DuplicateKeyError rather than file two Entities under one value: the store checks with it
+    before a change is made (see check), so a change it refuses leaves the Entity, and every listener, as they were."""
+
+    kind: Type[Component]
+    field: str
+    unique: bool
+    entries: dict[Any, dict[Handle, Entity]]
+    values: dict[Handle, Any]
+
+    def __init__(self, kind: Type[Component], field: str, unique: bool = False):
+        self.kind = kind
+        self.field = field
+        self.unique = unique
+        self.kinds = (kind,)
+        self.entries = {}
+        self.values = {}
+
+    def find(self, value: Any) -> list[Entity]:
+        """All Entities filed under value"""
+        hits = self.entries.get(value)
+        return list(hits.values()) if hits else []
+
+    def get(self, value: Any) -> Entity | None:
+        """The (first) Entity filed under value, or None"""
+        hits = self.entries.get(value)
+        return next(iter(hits.values())) if hits else None
+
+    def __getitem__(self, value: Any) -> Entity:
+        """The (first) Entity filed under value. Raises NoMatchError if there isn't one."""
+        ent = self.get(value)
+        if ent is None:
+            raise NoMatchError(self, value)
+        return ent
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self.entries
+
+    def check(self, value: Any, handle: Handle = 0, eid: "EntityId | None" = None) -> None:
+        """Raises DuplicateKeyError if this is a unique index, and value is filed under an Entity other than handle"""
+        hits = self.entries.get(value)
+        if self.unique and hits and handle not in hits:
+            raise DuplicateKeyError(self, value, eid)
+
+    def entity_created(self, ent: Entity) -> None:
+        self._refile(ent)
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        self._unfile(ent)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        self._refile(ent)
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        self._refile(ent)
+
+    def component_changed(self, ent: Entity, comp: Component, field: str, old: Any) -> None:
+        if field == self.field:
+            self._refile(ent)
+
+    def _refile(self, ent: Entity) -> None:
+        if not ent.has_any(self.kind):
+            self._unfile(ent)
+            return
+        value = getattr(ent[self.kind], self.field)
+        if ent.handle in self.values and self.values[ent.handle] == value:
+            return
+        self.check(value, ent.handle, ent.eid)
+        self._unfile(ent)
+        self.values[ent.handle] = value
+        self.entries.setdefault(value, {})[ent.handle] = ent
+
+    def _unfile(self, ent: Entity) -> None:
+        if ent.handle not in self.values:
+            return
+        value = self.values.pop(ent.handle)
+        hits = self.entries[value]
+        del hits[ent.handle]
+        if not hits:
+            del self.entries[value]
+
+
+L = TypeVar("L", bound=EntityStoreListener)
+
+
+class EntityStore:
+    """EntityStore creates, holds and finds Entities.
+    Entities are keyed by Handle; eid strings are accepted wherever a Handle is (see handle_of)."""
+
+    entities: dict[Handle, Entity]
+    # The current generation of each slot (slot 0 is never used, so eids start at "e1")
+    generations: list[int]
+    free_slots: list[int]
+    listeners: list[EntityStoreListener]
+    queries: dict[frozenset[Type[Component]], Query]
+    indexes: dict[Hashable, EntityStoreListener]
+    # Checked before any change that would file an Entity under a new value (see FieldIndex.check)
+    unique_indexes: list[FieldIndex]
+    # Held while listeners hear of Component changes, when set (eg. by a Scheduler, while Systems run on threads)
+    dispatch_lock: "RLock | None"
+    # Component class -> listeners interested in it, built lazily
+    _dispatch: dict[type, list[EntityStoreListener]]
 
     def __init__(self):
         self.entities = {}
-        self.eid_counter = 0
-
-    def create_entity(self) -> Entity:
-        """Create a new empty Entity with the next eid"""
-        ent = Entity(eid=self._next_eid())
+        self.generations = [0]
+        self.free_slots = []
+        self.listeners = []
+        self.queries = {}
+        self.indexes = {}
+        self.unique_indexes = []
+        self.dispatch_lock = None
+        self._dispatch = {}
+
+    def create_entity(self, components: Iterable[Component] = ()) -> Entity:
+        """Create a new Entity, in a recycled slot if one is free, taking the given Components (see Entity.take).
+        Listeners hear of it once, components and all. Raises DuplicateKeyError (creating nothing) if a unique
+        FieldIndex would file it under a value already taken."""
+        comps = list(components)
+        for comp in comps:
+            _check_detached(comp)
+        for index in self.unique_indexes:
+            first = next((comp for comp in comps if isinstance(comp, index.kind)), None)
+            if first is not None:
+                index.check(getattr(first, index.field))
+        handle = self._next_handle()
+        eid = eid_of(handle)
+        for comp in comps:
+            comp.eid = eid
+        ent = Entity._assemble(eid, handle, comps)
         # pylint: disable=unsupported-assignment-operation
-        self.entities[ent.eid] = ent
+        self.entities[handle] = ent
+        ent._store = self  # pylint: disable=protected-access
+        for listener in self.listeners:
+            listener.entity_created(ent)
         return ent
 
     def destroy_entity(self, entity: Entity) -> None:
-        """Remove the given entity"""
-        del self.entities[entity.eid]
+        """Remove the given entity. Its slot is freed, and its Handle/eid go stale."""
+        del self.entities[entity.handle]
+        slot = handle_slot(entity.handle)
+        self.generations[slot] += 1
+        self.free_slots.append(slot)
+        entity._store = None  # pylint: disable=protected-access
+        for listener in self.listeners:
+            listener.entity_destroyed(entity)
+
+    def _next_handle(self) -> Handle:
+        """Claim a slot: a freed one if any, else a new one"""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.generations)
+            self.generations.append(0)
+        return make_handle(slot, self.generations[slot])
 
     def _next_eid(self) -> EntityId:
-        """Generate the next eid"""
-        self.eid_counter += 1
-        return f"e{self.eid_counter}"
-
-    def __getitem__(self, eid: EntityId) -> Entity:
-        """Returns an Entity given an eid.
-        Raises NoEntityError if not found."""
-        ent = self.entities.get(eid)  # pylint: disable=no-member
-        if not ent:
-            raise NoEntityError(eid)
-        return ent
+        """Claim a slot, return its eid"""
+        return eid_of(self._next_handle())
+
+    def get(self, eid: Handle | EntityId) -> Entity | None:
+        """Returns the Entity with the given Handle or eid, or None"""
+        if isinstance(eid, str):
+            try:
+                eid = handle_of(eid)
+            except ValueError:
+                return None
+        return self.entities.get(eid)
+
+    def is_stale(self, eid: Handle | EntityId) -> bool:
+        """True if eid is the id of an Entity this store has since destroyed"""
+        handle = handle_of(eid) if isinstance(eid, str) else eid
+        slot = handle_slot(handle)
+        return slot < len(self.generations) and handle_generation(handle) < self.generations[slot]
+
+    def __getitem__(self, eid: Handle | EntityId) -> Entity:
+        """Returns an Entity given a Handle or eid.
+        Raises NoEntityError if not found (StaleEntityError if it was destroyed)."""
+        ent = self.get(eid)
+        if ent is not None:
+            return ent
+        if isinstance(eid, int):
+            eid = eid_of(eid)
+        try:
+            stale = self.is_stale(eid)
+        except ValueError:
+            stale = False
+        raise StaleEntityError(eid) if stale else NoEntityError(eid)
+
+    def save(self, file: "str | BinaryIO", compress: bool = False) -> None:
+        """Write a binary snapshot of this store to file (a path or binary file object), see lethal.snapshot"""
+        from .snapshot import save_snapshot  # pylint: disable=import-outside-toplevel,cyclic-import
+
+        save_snapshot(self, file, compress)
+
+    @classmethod
+    def load(cls, path: str) -> "EntityStore":
+        """Read a new EntityStore from a snapshot file written by save()"""
+        from .snapshot import Snapshot  # pylint: disable=import-outside-toplevel,cyclic-import
+
+        with Snapshot.open(path) as snap:
+            return snap.restore()
 
     def select(self, *kinds: Type[Component]) -> list[Entity]:
-        """Return a list of all Entities containing Components of all the given kinds"""
-        return [ent for _, ent in self.entities.items() if ent.has_all(list(kinds))]
+        """Return a list of all Entities containing Components of all the given kinds, in store order.
+        Scans every Entity: for kinds you'll look for again and again (eg. every tick), keep a query() instead."""
+        kind_list = list(kinds)
+        return [ent for ent in self.entities.values() if ent.has_all(kind_list)]
+
+    def query(self, *kinds: Type[Component]) -> Query:
+        """Return the live Query for the given kinds, registering it on first use."""
+        key = frozenset(kinds)
+        query = self.queries.get(key)
+        if query is None:
+            query = self.add_listener(Query(kinds))
+            self.queries[key] = query
+        return query
+
+    def field_index(self, kind: Type[Component], field: str, unique: bool = False) -> FieldIndex:
+        """Return the FieldIndex on kind.field, registering it on first use.
+        Eg. estore.field_index(Door, "door_id", unique=True)[door_id]"""
+        return self.index((FieldIndex, kind, field, unique), lambda: FieldIndex(kind, field, unique))
+
+    def index(self, key: Hashable, factory: Callable[[], L]) -> L:
+        """Return the listener registered under key, creating and adding it with factory() on first use.
+        Eg. SpatialIndex.of(estore, ...) keeps one index per configuration this way."""
+        found = self.indexes.get(key)
+        if found is None:
+            found = self.indexes[key] = self.add_listener(factory())
+        return cast(L, found)
+
+    def add_listener(self, listener: L) -> L:
+        """Start notifying listener of changes to this store.
+        Entities already in the store are replayed to it via entity_created. If that raises (eg. a unique FieldIndex
+        over Entities already sharing a value), the listener isn't added."""
+        self.listeners.append(listener)
+        self._dispatch.clear()
+        try:
+            for ent in self.entities.values():
+                listener.entity_created(ent)
+        except Exception:
+            self.remove_listener(listener)
+            raise
+        if isinstance(listener, FieldIndex) and listener.unique:
+            self.unique_indexes.append(listener)
+        return listener
+
+    def remove_listener(self, listener: EntityStoreListener) -> None:
+        """Stop notifying listener"""
+        self.listeners.remove(listener)
+        self._dispatch.clear()
+        if listener in self.unique_indexes:
+            self.unique_indexes.remove(listener)
+        for key, query in list(self.queries.items()):
+            if query is listener:
+                del self.queries[key]
+        for index_key, index in list(self.indexes.items()):
+            if index is listener:
+                del self.indexes[index_key]
+
+    def check_add(self, ent: Entity, comp: Component) -> None:
+        """Called by Entity.take before comp joins ent: raises DuplicateKeyError if a unique index would refuse it"""
+        for index in self.unique_indexes:
+            if isinstance(comp, index.kind) and not ent.has_any(index.kind):
+                index.check(getattr(comp, index.field), ent.handle, ent.eid)
+
+    def check_remove(self, ent: Entity, comp: Component) -> None:
+        """Called by Entity.remove before comp leaves ent: the next Component of the kind (if any) takes its place
+        in the unique indexes, and might be refused"""
+        for index in self.unique_indexes:
+            if isinstance(comp, index.kind) and ent[index.kind] is comp:
+                rest = ent.select(index.kind)
+                if len(rest) > 1:
+                    index.check(getattr(rest[1], index.field), ent.handle, ent.eid)
+
+    def check_change(self, ent: Entity, comp: Component, field: str, value: Any) -> None:
+        """Called before a field of comp (in ent) is assigned value: raises DuplicateKeyError if a unique index
+        would refuse it"""
+        for index in self.unique_indexes:
+            if index.field == field and isinstance(comp, index.kind) and ent[index.kind] is comp:
+                index.check(value, ent.handle, ent.eid)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        """Called by Entity.add"""
+        if self.dispatch_lock is not None:
+            with self.dispatch_lock:
+                for listener in self._listeners_for(type(comp)):
+                    listener.component_added(ent, comp)
+            return
+        for listener in self._listeners_for(type(comp)):
+            listener.component_added(ent, comp)
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        """Called by Entity.remove"""
+        if self.dispatch_lock is not None:
+            with self.dispatch_lock:
+                for listener in self._listeners_for(type(comp)):
+                    listener.component_removed(ent, comp)
+            return
+        for listener in self._listeners_for(type(comp)):
+            listener.component_removed(ent, comp)
+
+    def component_changed(self, ent: Entity, comp: Component, field: str, old: Any) -> None:
+        """Called when a field of a Component in this store is assigned"""
+        if self.dispatch_lock is not None:
+            with self.dispatch_lock:
+                for listener in self._listeners_for(type(comp)):
+                    listener.component_changed(ent, comp, field, old)
+            return
+        for listener in self._listeners_for(type(comp)):
+            listener.component_changed(ent, comp, field, old)
+
+    def _listeners_for(self, comp_class: type) -> list[EntityStoreListener]:
+        hits = self._dispatch.get(comp_class)
+        if hits is None:
+            kinds = component_kinds(comp_class)
+            hits = [lis for lis in self.listeners if any(k in kinds for k in lis.kinds)]
+            self._dispatch[comp_class] = hits
+        return hits
+
+
+class CommandBuffer:
+    """Structural changes (creating and destroying Entities, adding and removing Components) recorded to be made
+    later, at a sync point where nothing is iterating the store: eg. by the Scheduler between stages.
+    apply() makes them in the order recorded."""
+
+    commands: list[tuple[str, Entity | None, Any]]
+
+    def __init__(self):
+        self.commands = []
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def create(self, *components: Component) -> None:
+        """Create an Entity with these Components (taken, see Entity.take)"""
+        self.commands.append(("create", None, components))
+
+    def destroy(self, ent: Entity) -> None:
+        """Destroy ent"""
+        self.commands.append(("destroy", ent, None))
+
+    def add(self, ent: Entity, comp: Component) -> None:
+        """Add a copy of comp to ent (see Entity.add)"""
+        self.commands.append(("take", ent, comp.clone()))
+
+    def take(self, ent: Entity, comp: Component) -> None:
+        """Add comp itself to ent (see Entity.take)"""
+        self.commands.append(("take", ent, comp))
+
+    def remove(self, ent: Entity, comp: Component) -> None:
+        """Remove comp from ent (see Entity.remove)"""
+        self.commands.append(("remove", ent, comp))
+
+    def apply(self, estore: EntityStore) -> None:
+        """Make the recorded changes to estore, and forget them.
+        Changes to an Entity destroyed in the same batch are dropped (so indexes hear only of its destruction), and
+        so are repeat destroys and changes to Entities no longer in the store.
+        If a change raises (eg. DuplicateKeyError), it's dropped and the error passes on; the changes recorded after
+        it are kept, for the next apply()."""
+        commands, self.commands = self.commands, []
+        doomed = {ent.handle for op, ent, _ in commands if op == "destroy" and ent is not None}
+        for i, (op, ent, arg) in enumerate(commands):
+            try:
+                if ent is None:
+                    estore.create_entity(arg)
+                elif ent._store is not estore:  # pylint: disable=protected-access
+                    continue
+                elif op == "destroy":
+                    estore.destroy_entity(ent)
+                elif ent.handle in doomed:
+                    continue
+                elif op == "take":
+                    ent.take(arg)
+                else:
+                    ent.remove(arg)
+            except Exception:
+                self.commands[:0] = commands[i + 1 :]
+                raise
 
 
 class SideEffect(BaseModel):
@@ -215,16 +958,37 @@ class SideEffect(BaseModel):
 
 
 class System:
-    """ECS System base class"""
+    """ECS System base class.
+    A System is made once and run every tick by a Scheduler, or on its own with run_standalone(). Declare the Component
+    kinds it reads and writes, so the Scheduler knows what it can run alongside."""
+
+    reads: ClassVar[tuple[Type["Component"], ...]] = ()
+    writes: ClassVar[tuple[Type["Component"], ...]] = ()
 
     estore: EntityStore
     user_input: Input
     side_effects: list[SideEffect]
+    # Structural changes to make once update is over (the Scheduler applies them after the System's stage)
+    commands: CommandBuffer
+
+    def __init__(self):
+        self.user_input = Input([])
+        self.side_effects = []
+        self.commands = CommandBuffer()
 
-    def __init__(self, estore: EntityStore, user_input: Input):
+    def run(self, estore: EntityStore, user_input: Input) -> list[SideEffect]:
+        """Update with this tick's estore and input, returning the side effects. Commands are left to the caller."""
         self.estore = estore
         self.user_input = user_input
         self.side_effects = []
+        self.update()
+        return self.side_effects
+
+    def run_standalone(self, estore: EntityStore, user_input: Input) -> list[SideEffect]:
+        """Run without a Scheduler: update, then make the structural changes recorded in commands"""
+        side_effects = self.run(estore, user_input)
+        self.commands.apply(estore)
+        return side_effects
 
     def update(self) -> None:
         """Default behavior: No-op"""
@@ -0,0 +1,119 @@
+"""In-memory character cell grid, and the diff between two of them"""
+
+import re
+from typing import Iterable, Iterator
+
+# Splits text around terminal escape sequences (kept, at odd indexes): CSI (eg. colors, "\x1b[38;5;248m"),
+# charset selection ("\x1b(B") and the rest
+ESCAPES = re.compile(r"(\x1b(?:\[[0-?]*[ -/]*[@-~]|[()][0-9A-Za-z]|.))")
+
+BLANK = " "
+
+# A run of changed cells in one row: (x, y, chars, styles)
+Run = tuple[int, int, list[str], list[str]]
+# Row -> [lo, hi): the columns written since the last reset of FrameBuffer.touched
+Spans = dict[int, list[int]]
+
+
+class FrameBuffer:
+    """A width x height grid of cells, each a character plus the style (escape sequences) it's drawn with.
+    Rows are kept as parallel lists of chars and styles, so unchanged rows compare at C speed.
+    The span of columns written in each row is kept in `touched`, until the owner resets it."""
+
+    width: int
+    height: int
+    blank: str
+    chars: list[list[str]]
+    styles: list[list[str]]
+    touched: Spans
+
+    def __init__(self, width: int, height: int, blank: str = BLANK):
+        self.width = width
+        self.height = height
+        self.blank = blank
+        self.chars = [[blank] * width for _ in range(height)]
+        self.styles = [[""] * width for _ in range(height)]
+        self.touched = {}
+
+    def clear(self) -> None:
+        """Blank every cell"""
+        self.fill(0, 0, self.width, self.height)
+
+    # pylint: disable=invalid-name,too-many-arguments
+    def fill(self, x: int, y: int, width: int, height: int, char: str | None = None, style: str = "") -> None:
+        """Set every cell of a rectangle (clipped to the grid) to char (default: blank)"""
+        lo, hi = max(x, 0), min(x + width, self.width)
+        if lo >= hi:
+            return
+        chars = [self.blank if char is None else char] * (hi - lo)
+        styles = [style] * (hi - lo)
+        for row in range(max(y, 0), min(y + height, self.height)):
+            self.chars[row][lo:hi] = chars
+            self.styles[row][lo:hi] = styles
+            self._touch(row, lo, hi)
+
+    def _touch(self, y: int, lo: int, hi: int) -> None:
+        span = self.touched.get(y)
+        if span is None:
+            self.touched[y] = [lo, hi]
+        else:
+            span[0] = min(span[0], lo)
+            span[1] = max(span[1], hi)
+
+    # pylint: disable=invalid-name
+    def put(self, x: int, y: int, text: str, style: str = "", reset: str = "") -> tuple[int, int]:
+        """Write text starting at x,y, clipped to the grid. A newline continues at x on the next row.
+        Escape sequences embedded in text change the style of the cells that follow; `reset` (the terminal's
+        "normal" sequence) clears it. Returns the x,y just past the end of the text."""
+        start_x = x
+        for i, part in enumerate(ESCAPES.split(text) if "\x1b" in text else (text,)):
+            if i % 2:
+                style = "" if part == reset else style + part
+                continue
+            for n, line in enumerate(part.split("\n")):
+                if n:
+                    x = start_x
+                    y += 1
+                if line and 0 <= y < self.height:
+                    lo = max(x, 0)
+                    hi = min(x + len(line), self.width)
+                    if lo < hi:
+                        self.chars[y][lo:hi] = line[lo - x : hi - x]
+                        self.styles[y][lo:hi] = [style] * (hi - lo)
+                        self._touch(y, lo, hi)
+                x += len(line)
+        return x, y
+
+    def text(self) -> str:
+        """The characters of the grid, one line per row (styles left out). Handy for tests."""
+        return "\n".join("".join(row) for row in self.chars)
+
+    def diff(self, before: "FrameBuffer", bridge: int = 0, spans: Spans | None = None) -> Iterator[Run]:
+        """Yield the runs of cells that differ from before (a grid of the same size), row by row.
+        Runs in a row separated by no more than `bridge` unchanged cells are merged, since rewriting a few
+        cells can be cheaper than moving the cursor past them.
+        If spans are given (eg. touched), only those cells are compared: the rest are known to be the same."""
+        rows = sorted(spans) if spans is not None else range(self.height)
+        for y in rows:
+            chars, styles = self.chars[y], self.styles[y]
+            old_chars, old_styles = before.chars[y], before.styles[y]
+            lo, hi = spans[y] if spans is not None else (0, self.width)
+            if chars[lo:hi] == old_chars[lo:hi] and styles[lo:hi] == old_styles[lo:hi]:
+                continue
+            start = end = -1
+            for x in range(lo, hi):
+                if chars[x] != old_chars[x] or styles[x] != old_styles[x]:
+                    if start < 0:
+                        start = x
+                    elif x - end > bridge + 1:
+                        yield (start, y, chars[start : end + 1], styles[start : end + 1])
+                        start = x
+                    end = x
+            if start >= 0:
+                yield (start, y, chars[start : end + 1], styles[start : end + 1])
+
+    def copy_rows(self, other: "FrameBuffer", rows: Iterable[int]) -> None:
+        """Make the given rows of this grid the same as other's (same size)"""
+        for y in rows:
+            self.chars[y][:] = other.chars[y]
+            self.styles[y][:] = other.styles[y]
@@ -0,0 +1,101 @@
+"""Replaying recorded sessions without a terminal"""
+
+import io
+import os
+import time
+from dataclasses import dataclass
+from typing import TypeVar
+
+from blessed import Terminal
+
+from .driver import Driver, FrameTiming
+from .output import FramebufferOutput, Output
+from .recording import Recording
+
+
+M = TypeVar("M")
+S = TypeVar("S")
+
+
+@dataclass
+class ReplayReport:
+    """How a replay went. Times are in seconds."""
+
+    ticks: int = 0  # Module.update calls
+    frames: int = 0
+    elapsed: float = 0.0
+    update_time: float = 0.0
+    draw_time: float = 0.0
+    bytes_out: int = 0
+
+    @property
+    def ticks_per_second(self) -> float:
+        """Updates per second of the replay"""
+        return self.ticks / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        ticks, frames = max(self.ticks, 1), max(self.frames, 1)
+        return (
+            f"{self.ticks} ticks, {self.frames} frames in {self.elapsed:.3f}s: {self.ticks_per_second:.1f} ticks/s\n"
+            f"  update {self.update_time / ticks * 1e6:8.1f}us/tick\n"
+            f"  draw   {self.draw_time / frames * 1e6:8.1f}us/frame, {self.bytes_out / frames:.0f} bytes/frame"
+        )
+
+
+class HeadlessDriver(Driver[M, S]):
+    """Plays a Recording (see lethal.recording) against a Module, without a terminal: as fast as it goes, or at the
+    pace it was recorded (realtime=True). A frame is drawn after every update, into an Output writing to /dev/null,
+    unless draw=False. The Module's state is left in `state`, eg. to compare runs for determinism.
+    Given a profile path, the lethal.profiling timings of the replay are written there at the end."""
+
+    recording: Recording
+    realtime: bool
+    draw_frames: bool
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        module: M,
+        recording: Recording | str,
+        output_class: type[Output] = FramebufferOutput,
+        realtime: bool = False,
+        draw: bool = True,
+        profile: str | None = None,
+    ):
+        term = Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO())
+        super().__init__(module, output_class, term=term, profile=profile)
+        self.recording = recording if isinstance(recording, Recording) else Recording.load(recording)
+        self.realtime = realtime
+        self.draw_frames = draw
+
+    def loop(self) -> None:
+        """Replay (see run)"""
+        self.run()
+
+    def run(self) -> ReplayReport:
+        """Replay the whole recording, returning the timings"""
+        report = ReplayReport()
+        inputs = self.recording.inputs
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            self.output.stream = sink
+            start = self.clock()
+            if self.draw_frames:
+                self.draw()
+                report.draw_time += self.timing.draw_time
+            for recorded in inputs:
+                if self.realtime:
+                    wait = recorded.t - inputs[0].t - (self.clock() - start)
+                    if wait > 0:
+                        time.sleep(wait)
+                self.timing = FrameTiming()
+                self.update(recorded.to_input(), recorded.delta)
+                if self.draw_frames:
+                    self.draw()
+                report.update_time += self.timing.update_time
+                report.draw_time += self.timing.draw_time
+            report.elapsed = self.clock() - start
+        self.finish()
+        report.ticks = len(inputs)
+        report.frames = self.output.stats.frames
+        report.bytes_out = self.output.stats.total_bytes
+        return report
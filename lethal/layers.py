@@ -0,0 +1,120 @@
+"""Retained-mode drawing in layers: only cells that changed are redrawn.
+
+    compositor = Compositor()
+    board = compositor.add(Layer(0, 0, 40, 20))
+    sprites = compositor.add(Layer(0, 0, 40, 20, z=1))
+    ...
+    sprites.erase(3, 4)         # uncovers whatever board has there
+    sprites.put(4, 4, "@")
+    compositor.compose(output)  # sends just those two cells
+
+Set output.retain so the Output keeps the previous frame on screen (see Output.cleared).
+"""
+
+from .framebuffer import FrameBuffer, Spans
+from .output import Output
+from .pos import Pos
+
+# The char of a cell nothing has been drawn in: layers below show through
+TRANSPARENT = ""
+
+
+class Layer:
+    """A sheet of cells at a fixed place on the screen, transparent until drawn on.
+    Coordinates given to put/erase are relative to the layer. Cells drawn or erased are remembered
+    (cells.touched) until the Compositor has sent them."""
+
+    x: int
+    y: int
+    z: int
+    cells: FrameBuffer
+
+    # pylint: disable=invalid-name,too-many-arguments
+    def __init__(self, x: int, y: int, width: int, height: int, z: int = 0):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.cells = FrameBuffer(width, height, blank=TRANSPARENT)
+
+    @property
+    def width(self) -> int:
+        """Width in cells"""
+        return self.cells.width
+
+    @property
+    def height(self) -> int:
+        """Height in cells"""
+        return self.cells.height
+
+    def put(self, x: int, y: int, text: str, style: str = "") -> None:
+        """Draw text (which may span lines, see FrameBuffer.put) in the given style"""
+        self.cells.put(x, y, text, style)
+
+    def erase(self, x: int, y: int, width: int = 1, height: int = 1) -> None:
+        """Make a rectangle transparent again"""
+        self.cells.fill(x, y, width, height)
+
+    def clear(self) -> None:
+        """Make the whole layer transparent"""
+        self.cells.clear()
+
+
+class Compositor:
+    """Stacks Layers (higher z on top) and sends their changed cells to an Output"""
+
+    layers: list[Layer]
+
+    def __init__(self) -> None:
+        self.layers = []
+
+    def add(self, layer: Layer) -> Layer:
+        """Add a layer to the stack, return it"""
+        self.layers.append(layer)
+        self.layers.sort(key=lambda lay: lay.z)
+        return layer
+
+    def compose(self, output: Output) -> int:
+        """Draw every cell touched in any layer since the last compose (or every cell of every layer, if the
+        output starts this frame cleared). Returns the number of cells drawn."""
+        spans: Spans = {}
+        for layer in self.layers:
+            touched = (
+                {y: [0, layer.width] for y in range(layer.height)} if output.cleared else layer.cells.touched
+            )
+            for y, (lo, hi) in touched.items():
+                span = spans.get(y + layer.y)
+                if span is None:
+                    spans[y + layer.y] = [lo + layer.x, hi + layer.x]
+                else:
+                    span[0] = min(span[0], lo + layer.x)
+                    span[1] = max(span[1], hi + layer.x)
+            layer.cells.touched = {}
+        drawn = 0
+        for y, (lo, hi) in sorted(spans.items()):
+            output.print_at(Pos(lo, y), self._row_text(output, y, lo, hi))
+            drawn += hi - lo
+        return drawn
+
+    def _row_text(self, output: Output, y: int, lo: int, hi: int) -> str:
+        """Cells lo..hi of screen row y, as the top-most layer has them, with style sequences"""
+        rows = [
+            (layer.x, layer.x + layer.width, layer.cells.chars[y - layer.y], layer.cells.styles[y - layer.y])
+            for layer in reversed(self.layers)
+            if layer.y <= y < layer.y + layer.height
+        ]
+        normal = output.codes.normal
+        out = []
+        style = ""
+        for x in range(lo, hi):
+            char, cell_style = " ", ""
+            for left, right, chars, styles in rows:
+                if left <= x < right and chars[x - left] != TRANSPARENT:
+                    char, cell_style = chars[x - left], styles[x - left]
+                    break
+            if cell_style != style:
+                out.append(normal + cell_style)
+                style = cell_style
+            out.append(char)
+        if style:
+            out.append(normal)
+        return "".join(out)
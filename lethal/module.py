@@ -22,3 +22,19 @@ class Module(Generic[T]):
 
     def draw(self, state: T, output: Output):
         """Computes the next state based in inputs"""
+
+    def needs_redraw(self, state: T) -> bool:
+        """Whether draw would show anything different from the last frame. The Driver skips frames that wouldn't.
+        By default: always."""
+        return True
+
+    def finish(self, state: T) -> None:
+        """Release what the state holds (open files and such), when the Driver is done with it"""
+
+    async def update_async(self, state: T, user_input: Input, delta: float) -> T:
+        """What AsyncDriver calls instead of update. Override to await I/O while updating."""
+        return self.update(state, user_input, delta)
+
+    async def draw_async(self, state: T, output: Output):
+        """What AsyncDriver calls instead of draw. Override to await I/O while drawing."""
+        self.draw(state, output)
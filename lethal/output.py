@@ -1,8 +1,15 @@
 """Lethal Output"""
 # from dataclasses import dataclass
 # from typing import TypeVar, Generic, Any
+import os
+import sys
+from typing import ClassVar, TextIO
+from weakref import WeakKeyDictionary
+
 from blessed import Terminal
+from .framebuffer import FrameBuffer
 from .pos import Pos
+from .profiling import PROFILER, Profiler
 
 
 class OutputOffsetMgr:
@@ -23,15 +30,174 @@ class OutputOffsetMgr:
         self.output.pop()
 
 
+class OutputStats:
+    """Bytes and writes (syscalls) sent to the terminal, for the last frame and overall"""
+
+    frames: int
+    frame_bytes: int
+    frame_writes: int
+    total_bytes: int
+    total_writes: int
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.frame_bytes = 0
+        self.frame_writes = 0
+        self.total_bytes = 0
+        self.total_writes = 0
+
+    def start_frame(self) -> None:
+        """Zero the per-frame counts"""
+        self.frame_bytes = 0
+        self.frame_writes = 0
+
+    def record(self, size: int, writes: int = 1) -> None:
+        """Count a write"""
+        self.frame_bytes += size
+        self.total_bytes += size
+        self.frame_writes += writes
+        self.total_writes += writes
+
+    def __repr__(self) -> str:
+        return (
+            f"OutputStats(frames={self.frames}, frame_bytes={self.frame_bytes}, frame_writes={self.frame_writes},"
+            f" total_bytes={self.total_bytes}, total_writes={self.total_writes})"
+        )
+
+
+class TermCodes:
+    """The escape sequences of a Terminal, each worked out once.
+    (blessed formats a new string on every move_xy() call, and resolves styles by name.)"""
+
+    _by_term: ClassVar["WeakKeyDictionary[Terminal, TermCodes]"] = WeakKeyDictionary()
+
+    term: Terminal
+    normal: str
+    home: str
+    clear: str
+
+    def __init__(self, term: Terminal):
+        self.term = term
+        self.normal = term.normal
+        self.home = term.home
+        self.clear = term.clear
+        self._moves: dict[tuple[int, int], str] = {}
+        self._styles: dict[str, str] = {}
+
+    @classmethod
+    def of(cls, term: Terminal) -> "TermCodes":
+        """The TermCodes of term, shared by everything drawing to it"""
+        codes = cls._by_term.get(term)
+        if codes is None:
+            codes = cls._by_term[term] = cls(term)
+        return codes
+
+    # pylint: disable=invalid-name
+    def move(self, x: int, y: int) -> str:
+        """term.move_xy(x, y)"""
+        code = self._moves.get((x, y))
+        if code is None:
+            code = self._moves[(x, y)] = self.term.move_xy(x, y)
+        return code
+
+    def style(self, name: str) -> str:
+        """A style by name, eg. style("darkgray") is term.darkgray"""
+        code = self._styles.get(name)
+        if code is None:
+            code = self._styles[name] = str(getattr(self.term, name))
+        return code
+
+
 class Output:
-    """For drawing to the screen, passed the Module.draw"""
+    """For drawing to the screen, passed the Module.draw.
+    This one draws immediately: each frame clears the screen, and every print goes straight out
+    (one write each). See BufferedOutput and FramebufferOutput for the alternatives.
+
+    A Module that keeps track of what it has drawn can set `retain`: frames then start from what the
+    last one left on screen, and only need to draw what changed. `cleared` tells it when a frame starts
+    blank anyway (the first one, after a resize, or after refresh()) and everything must be drawn.
+
+    Given an `overlay` (a Profiler), every frame ends with its table drawn in the top right corner."""
 
     term: Terminal
+    codes: TermCodes
     offset_stack: list[Pos]
+    stream: TextIO | None  # (None: whatever sys.stdout is at the time)
+    stats: OutputStats
+    retain: bool
+    cleared: bool
+    overlay: Profiler | None
 
-    def __init__(self, term: Terminal):
+    def __init__(self, term: Terminal, stream: TextIO | None = None):
         self.term = term
+        self.codes = TermCodes.of(term)
         self.offset_stack = []
+        self.stream = stream
+        self.stats = OutputStats()
+        self.retain = False
+        self.cleared = True
+        self.overlay = None
+
+    def begin_frame(self) -> None:
+        """Called by the Driver before Module.draw"""
+        self.stats.start_frame()
+        self.cleared = not self.retain or self.cleared
+        if self.cleared:
+            self._write(self.codes.home + self.codes.clear)
+
+    def end_frame(self) -> None:
+        """Called by the Driver after Module.draw"""
+        if self.overlay is not None:
+            self._draw_overlay(self.overlay)
+        with PROFILER.span("output.flush"):
+            self._flush()
+        self.stats.frames += 1
+        self.cleared = False
+
+    def refresh(self) -> None:
+        """Have the next frame start blank (see cleared), eg. to get rid of something drawn over the Module's frame"""
+        self.cleared = True
+
+    def redraw(self) -> None:
+        """Repaint the whole screen next frame (eg. if something else wrote to the terminal).
+        This one clears the screen on a refresh anyway."""
+        self.refresh()
+
+    def _draw_overlay(self, profiler: Profiler) -> None:
+        lines = profiler.lines()
+        width = max(len(line) for line in lines)
+        x = max(self.term.width - width, 0)
+        style, normal = self.codes.style("reverse"), self.codes.normal
+        self.clear_offset()
+        for y, line in enumerate(lines):
+            self.print_at(Pos(x, y), style + line.ljust(width) + normal)
+
+    def _flush(self) -> None:
+        """Send what's left of the frame. Here: nothing, it all went out as it was drawn."""
+
+    def _write(self, data: str) -> None:
+        """Called with everything drawn. Here: sent right away."""
+        self._send(data)
+
+    def _send(self, data: str) -> None:
+        """Write data to the terminal and flush: a single syscall if the stream is backed by a file
+        (unless the OS takes it in pieces), counted in stats"""
+        stream = self.stream or sys.stdout
+        try:
+            fd = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = -1
+        if fd < 0:
+            stream.write(data)
+            stream.flush()
+            self.stats.record(len(data.encode()))
+            return
+        stream.flush()  # (anything print()ed earlier goes first)
+        view = memoryview(data.encode())
+        while view:
+            written = os.write(fd, view)
+            self.stats.record(written)
+            view = view[written:]
 
     def push(self, pos: Pos) -> Pos:
         """Push an offset onto the stack"""
@@ -64,10 +230,114 @@ class Output:
 
     def print(self, thing: str) -> None:
         """Print a string in the view"""
-        print(thing, end="")
+        self._write(thing)
 
     # pylint: disable=invalid-name
     def print_at(self, pos: Pos, thing: str) -> None:
         """Print a string in the view at a specific location"""
         rel = self.get_offset().add(pos)
-        print(self.term.move_xy(rel.x, rel.y) + thing)
+        self._write(self.codes.move(rel.x, rel.y) + thing + "\n")
+
+
+class BufferedOutput(Output):
+    """Like Output, but the whole frame is collected and sent in one write at the end"""
+
+    pending: list[str]
+
+    def __init__(self, term: Terminal, stream: TextIO | None = None):
+        super().__init__(term, stream)
+        self.pending = []
+
+    def _write(self, data: str) -> None:
+        self.pending.append(data)
+
+    def _flush(self) -> None:
+        if self.pending:
+            self._send("".join(self.pending))
+            self.pending.clear()
+
+
+class FramebufferOutput(Output):
+    """Draws into an in-memory grid of cells instead of the terminal (see lethal.framebuffer).
+    At the end of each frame only the cells that differ from the previous frame are sent (in one write), so an
+    unchanged screen costs nothing and nothing flickers.
+
+    print_at(pos, text): a newline in text continues at pos.x on the next row.
+    print(text) continues where the last print/print_at left off."""
+
+    # Unchanged cells between two changed ones are rewritten rather than jumped over, up to this many
+    # (a cursor move costs ~8 bytes)
+    BRIDGE = 6
+
+    back: FrameBuffer  # being drawn
+    front: FrameBuffer  # on the terminal
+    cursor: Pos  # where print() continues
+    full_redraw: bool
+    # Rows where back and front differ since the last swap (to catch back up, when retaining)
+    stale_rows: set[int]
+
+    def __init__(self, term: Terminal, stream: TextIO | None = None):
+        super().__init__(term, stream)
+        self._resize()
+
+    def _resize(self) -> None:
+        self.back = FrameBuffer(self.term.width, self.term.height)
+        self.front = FrameBuffer(self.term.width, self.term.height)
+        self.cursor = Pos(0, 0)
+        self.full_redraw = True
+        self.stale_rows = set()
+        self.cleared = True
+
+    def begin_frame(self) -> None:
+        self.stats.start_frame()
+        if (self.term.width, self.term.height) != (self.back.width, self.back.height):
+            self._resize()
+        self.cleared = not self.retain or self.cleared
+        if self.cleared:
+            self.back.clear()
+        else:
+            self.back.copy_rows(self.front, self.stale_rows)
+            self.back.touched = {}
+        self.cursor = Pos(0, 0)
+
+    def _flush(self) -> None:
+        codes = self.codes
+        out = []
+        full_redraw = self.full_redraw
+        if full_redraw:
+            out.append(codes.home + codes.clear)
+            self.front.clear()
+            self.full_redraw = False
+        style = ""
+        at = None  # where the terminal cursor is, if known
+        spans = None if full_redraw else self.back.touched
+        stale_rows = self.stale_rows = set()
+        for x, y, chars, styles in self.back.diff(self.front, self.BRIDGE, spans):
+            stale_rows.add(y)
+            if at != (x, y):
+                out.append(codes.move(x, y))
+            for char, cell_style in zip(chars, styles):
+                if cell_style != style:
+                    out.append(codes.normal + cell_style)
+                    style = cell_style
+                out.append(char)
+            at = (x + len(chars), y)
+        if style:
+            out.append(codes.normal)
+        if out:
+            self._send("".join(out))
+        self.front, self.back = self.back, self.front
+
+    def redraw(self) -> None:
+        """Repaint the whole screen at the end of this frame (eg. if something else wrote to the terminal)"""
+        self.full_redraw = True
+
+    def print(self, thing: str) -> None:
+        self._put(self.cursor, thing)
+
+    # pylint: disable=invalid-name
+    def print_at(self, pos: Pos, thing: str) -> None:
+        self._put(self.get_offset().add(pos), thing)
+
+    def _put(self, pos: Pos, thing: str) -> None:
+        self.cursor = Pos(*self.back.put(pos.x, pos.y, thing, reset=self.codes.normal))
@@ -0,0 +1,144 @@
+"""Timing spans, for finding out where a frame's time goes.
+
+    with PROFILER.span("system.PlayerSystem"):
+        ...
+
+Each span keeps its last `window` durations, for percentiles over recent frames, plus running totals. The Driver,
+Scheduler and Output time their phases this way: module.update, system.<System class>, module.draw, output.flush.
+While PROFILER.enabled is off (the default), span() hands back a shared do-nothing context manager.
+See Driver(profile=...) for the overlay (F12) and the dump on exit.
+"""
+
+import json
+import math
+import time
+from collections import deque
+from typing import Any
+
+
+class SpanStats:
+    """The durations of one span. Times are in seconds."""
+
+    name: str
+    samples: deque[float]  # the last `window` of them
+    count: int
+    total: float
+    worst: float
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record a duration"""
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+
+    def percentile(self, p: float) -> float:
+        """The p-th percentile (0 < p <= 100) of the recent samples (nearest rank), or 0 without any"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    @property
+    def p50(self) -> float:
+        """Median of the recent samples"""
+        return self.percentile(50)
+
+    @property
+    def p99(self) -> float:
+        """99th percentile of the recent samples"""
+        return self.percentile(99)
+
+    def to_dict(self) -> dict[str, Any]:
+        """The stats, as JSON-ready values"""
+        return {
+            "name": self.name,
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.p50,
+            "p99": self.p99,
+            "max": self.worst,
+        }
+
+
+class Span:
+    """Times a with block into a SpanStats"""
+
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats: SpanStats):
+        self.stats = stats
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stats.add(time.perf_counter() - self.start)
+
+
+class NoSpan:
+    """What span() returns while profiling is off"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NoSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NO_SPAN = NoSpan()
+
+
+class Profiler:
+    """Collects SpanStats by name, in the order the spans were first seen"""
+
+    enabled: bool
+    window: int
+    spans: dict[str, SpanStats]
+
+    def __init__(self, enabled: bool = False, window: int = 512):
+        self.enabled = enabled
+        self.window = window
+        self.spans = {}
+
+    def span(self, name: str) -> Span | NoSpan:
+        """A context manager timing its block as `name` (if enabled)"""
+        if not self.enabled:
+            return NO_SPAN
+        stats = self.spans.get(name)
+        if stats is None:
+            stats = self.spans[name] = SpanStats(name, self.window)
+        return Span(stats)
+
+    def reset(self) -> None:
+        """Forget everything recorded"""
+        self.spans = {}
+
+    def lines(self) -> list[str]:
+        """A table of p50 and p99 per span, in ms (as the overlay shows it)"""
+        lines = [f"{'span':<26}{'p50 ms':>8}{'p99 ms':>8}"]
+        for stats in list(self.spans.values()):
+            lines.append(f"{stats.name[:26]:<26}{stats.p50 * 1e3:8.3f}{stats.p99 * 1e3:8.3f}")
+        return lines
+
+    def dump(self, path: str) -> None:
+        """Write every span's stats to a JSON file"""
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump({"spans": [stats.to_dict() for stats in list(self.spans.values())]}, out, indent=1)
+
+
+# The one the Driver, Scheduler and Output record into
+PROFILER = Profiler()
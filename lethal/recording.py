@@ -0,0 +1,84 @@
+"""Recordings of the Input a Driver fed its Module: one JSON object per line.
+
+    {"lethal_recording": 1, "module": "dungeon.dungeon_module.DungeonModule", "tick_rate": null}
+    {"t": 0.0, "keys": ["KEY_LEFT"], "delta": 0}
+    {"t": 0.48, "keys": ["KEY_LEFT"], "delta": 0}
+    ...
+
+t is seconds since recording started. See Driver(record=...) and HeadlessDriver.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, TextIO
+
+from .input import Input
+
+VERSION = 1
+
+
+class RecordingError(ValueError):
+    """Raised when reading something that isn't a recording (of a version we know)"""
+
+
+@dataclass
+class RecordedInput:
+    """One Module.update call"""
+
+    t: float  # seconds since the recording started
+    keys: list[str]
+    delta: float
+
+    def to_input(self) -> Input:
+        """The Input as it was given"""
+        return Input(list(self.keys))
+
+
+@dataclass
+class Recording:
+    """A recorded session"""
+
+    inputs: list[RecordedInput]
+    header: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        """Read a recording file"""
+        with open(path, encoding="utf-8") as src:
+            lines = [line for line in src if line.strip()]
+        if not lines:
+            raise RecordingError(f"{path} is empty")
+        header = json.loads(lines[0])
+        if header.get("lethal_recording") != VERSION:
+            raise RecordingError(f"{path} is not a lethal recording (version {VERSION})")
+        return cls([RecordedInput(**json.loads(line)) for line in lines[1:]], header)
+
+    @property
+    def duration(self) -> float:
+        """Seconds from the first input to the last"""
+        return self.inputs[-1].t - self.inputs[0].t if self.inputs else 0.0
+
+
+class InputRecorder:
+    """Writes each Input to a file as it's used, flushing line by line (so a crash loses nothing recorded)"""
+
+    stream: TextIO
+    start: float
+
+    def __init__(self, path: str, **header: Any):
+        self.stream = open(path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        self.start = time.perf_counter()
+        self._write({"lethal_recording": VERSION, **header})
+
+    def record(self, user_input: Input, delta: float) -> None:
+        """Append an Input"""
+        self._write({"t": round(time.perf_counter() - self.start, 6), "keys": user_input.keys, "delta": delta})
+
+    def close(self) -> None:
+        """Finish the file"""
+        self.stream.close()
+
+    def _write(self, obj: dict[str, Any]) -> None:
+        self.stream.write(json.dumps(obj) + "\n")
+        self.stream.flush()
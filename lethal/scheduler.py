@@ -0,0 +1,130 @@
+"""Runs long-lived Systems in an order worked out from the Component kinds they read and write"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+from typing import Iterable, Type
+
+from .changes import end_tick
+from .ecs import Component, EcsError, EntityStore, SideEffect, System
+from .input import Input
+from .profiling import PROFILER
+
+
+class ScheduleError(EcsError):
+    """Raised when the Systems' reads and writes can't all be satisfied by one order"""
+
+    def __init__(self, systems: Iterable[System]):
+        super(ScheduleError, self).__init__(
+            "Systems depend on each other in a cycle: " + ", ".join(type(s).__name__ for s in systems)
+        )
+
+
+def _kinds(kinds: Iterable[Type[Component]]) -> set[Type[Component]]:
+    """kinds, plus every Component class extending one of them (reading a base class reads its subclasses too)"""
+    found = set()
+    for kind in kinds:
+        found.add(kind)
+        pending = [kind]
+        while pending:
+            for sub in pending.pop().__subclasses__():
+                found.add(sub)
+                pending.append(sub)
+    return found
+
+
+class Scheduler:
+    """Orders Systems, registered once, into stages:
+      - a System writing a kind another reads runs before it (unless they each read what the other writes:
+        then, like two Systems writing the same kind, they run in the order registered)
+      - Systems that don't conflict (neither writes what the other reads or writes) share a stage,
+        as early as the ones they depend on allow
+    With threads > 0, the Systems of a stage run on a thread pool of that size. That pays off on free-threaded
+    Python builds, for Systems that stay within their declared kinds. Listeners (indexes, ChangeTrackers...) on the
+    kinds they write hear of changes one thread at a time, under the store's dispatch_lock.
+    Side effects come back in stage order, then registration order.
+    Systems make structural changes through their CommandBuffer (System.commands): they're applied after each stage,
+    so no System sees the store's structure change under it.
+    With lethal.profiling on, each System's run is timed as "system.<its class name>".
+    A run is a tick for the store's ChangeTrackers (see lethal.changes): it ends theirs when it's done."""
+
+    systems: list[System]
+    stages: list[list[System]]
+    threads: int
+
+    def __init__(self, systems: Iterable[System] = (), threads: int = 0):
+        self.systems = list(systems)
+        self.threads = threads
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = RLock()
+        self.stages = self._plan()
+
+    def add(self, system: System) -> System:
+        """Register a System, return it"""
+        self.systems.append(system)
+        self.stages = self._plan()
+        return system
+
+    def run(self, estore: EntityStore, user_input: Input) -> list[SideEffect]:
+        """Run every System once, stage by stage"""
+        side_effects: list[SideEffect] = []
+        for stage in self.stages:
+            if self.threads > 0 and len(stage) > 1:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="lethal-system")
+                was, estore.dispatch_lock = estore.dispatch_lock, self._lock
+                try:
+                    results = list(self._pool.map(lambda s: self._run_system(s, estore, user_input), stage))
+                finally:
+                    estore.dispatch_lock = was
+            else:
+                results = [self._run_system(system, estore, user_input) for system in stage]
+            for effects in results:
+                side_effects.extend(effects)
+            # Sync point: the stage's structural changes are made, for the next stage to see
+            for system in stage:
+                system.commands.apply(estore)
+        end_tick(estore)
+        return side_effects
+
+    @staticmethod
+    def _run_system(system: System, estore: EntityStore, user_input: Input) -> list[SideEffect]:
+        if not PROFILER.enabled:
+            return system.run(estore, user_input)
+        with PROFILER.span(f"system.{type(system).__name__}"):
+            return system.run(estore, user_input)
+
+    def close(self) -> None:
+        """Shut down the thread pool, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _plan(self) -> list[list[System]]:
+        systems = self.systems
+        reads = [_kinds(type(s).reads) for s in systems]
+        writes = [_kinds(type(s).writes) for s in systems]
+
+        # after[j]: the Systems that must run before System j
+        after: list[set[int]] = [set() for _ in systems]
+        for j in range(len(systems)):
+            for i in range(j):
+                i_feeds_j = bool(writes[i] & reads[j])
+                j_feeds_i = bool(writes[j] & reads[i])
+                if j_feeds_i and not i_feeds_j:
+                    after[i].add(j)
+                elif i_feeds_j or j_feeds_i or writes[i] & writes[j]:
+                    after[j].add(i)
+
+        # Each System's stage is one past the latest stage of those it runs after
+        stage_of: dict[int, int] = {}
+        while len(stage_of) < len(systems):
+            ready = [j for j in range(len(systems)) if j not in stage_of and after[j] <= stage_of.keys()]
+            if not ready:
+                raise ScheduleError(systems[j] for j in range(len(systems)) if j not in stage_of)
+            for j in ready:
+                stage_of[j] = max((stage_of[i] + 1 for i in after[j]), default=0)
+
+        stages: list[list[System]] = [[] for _ in range(max(stage_of.values(), default=-1) + 1)]
+        for j, system in enumerate(systems):
+            stages[stage_of[j]].append(system)
+        return stages
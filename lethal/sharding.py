@@ -0,0 +1,248 @@
+"""Simulate an EntityStore split by zone (eg. Room.room_id) across worker processes.
+
+    sim = ShardedSimulation(estore, setup, Room, "room_id", workers=4)
+    side_effects = sim.tick(Input(keys))   # every shard runs its Systems, in parallel
+    world = sim.gather()                   # a merged copy, eg. for drawing or saving
+    sim.close()
+
+Each worker holds the Entities of the zones it owns in an EntityStore of its own, prepared by `setup`, which also
+returns the Scheduler of Systems to tick it with. An Entity whose zone field changes to a zone the worker doesn't own
+leaves at the end of the tick, and joins the owner's store before the next one: that exchange at the tick boundary is
+all the workers share. Systems must not count on finding other zones' Entities (see DungeonModule for a door leading
+into another zone).
+
+eids are per-store: a migrating Entity gets a new one, as does every Entity in gather()'s merged store. Identify
+Entities by their fields (eg. with a unique FieldIndex).
+"""
+
+import multiprocessing
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Hashable, Type
+
+from .ecs import Component, Entity, EntityStore, EntityStoreListener, SideEffect
+from .input import Input
+from .scheduler import Scheduler
+
+# A migrating Entity: its Components (pickled detached)
+Parcel = list[Component]
+Setup = Callable[[EntityStore], Scheduler]
+
+
+@dataclass
+class ShardStats:
+    """How a shard's last tick went"""
+
+    entities: int = 0
+    tick_time: float = 0.0  # seconds spent running Systems
+    arrived: int = 0
+    departed: int = 0
+
+
+class ZoneWatch(EntityStoreListener):
+    """Notes the Entities whose zone Component was added or assigned, to check where they belong after the tick"""
+
+    moved: dict[int, Entity]
+
+    def __init__(self, zone_kind: Type[Component]):
+        self.kinds = (zone_kind,)
+        self.moved = {}
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        self.moved[ent.handle] = ent
+
+    def component_changed(self, ent: Entity, comp: Component, field: str, old: Any) -> None:
+        self.moved[ent.handle] = ent
+
+    def entity_created(self, ent: Entity) -> None:
+        self.moved[ent.handle] = ent
+
+
+class Shard:
+    """One worker's part of the world (runs in the worker process)"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, setup: Setup, zone_kind: Type[Component], zone_field: str, zones: set[Hashable]):
+        self.estore = EntityStore()
+        self.systems = setup(self.estore)
+        self.zone_kind = zone_kind
+        self.zone_field = zone_field
+        self.zones = zones
+        self.watch = self.estore.add_listener(ZoneWatch(zone_kind))
+
+    def zone_of(self, ent: Entity) -> Hashable | None:
+        """ent's zone, or None if it has no zone Component"""
+        return getattr(ent[self.zone_kind], self.zone_field) if ent.has_any(self.zone_kind) else None
+
+    def admit(self, parcels: list[Parcel]) -> None:
+        """Take in Entities (that belong here)"""
+        for comps in parcels:
+            ent = self.estore.create_entity(comps)
+            zone = self.zone_of(ent)
+            if zone is not None:
+                self.zones.add(zone)
+        self.watch.moved.clear()
+
+    def tick(self, user_input: Input, arrivals: list[Parcel]) -> tuple[list[SideEffect], list[Parcel], ShardStats]:
+        """Admit arrivals, run the Systems, and hand back side effects and the Entities that left"""
+        self.admit(arrivals)
+        start = time.perf_counter()
+        side_effects = self.systems.run(self.estore, user_input)
+        tick_time = time.perf_counter() - start
+
+        departures = []
+        for ent in self.watch.moved.values():
+            if ent._store is self.estore:  # pylint: disable=protected-access
+                zone = self.zone_of(ent)
+                if zone is not None and zone not in self.zones:
+                    departures.append(self.release(ent))
+        self.watch.moved.clear()
+        stats = ShardStats(len(self.estore.entities), tick_time, len(arrivals), len(departures))
+        return side_effects, departures, stats
+
+    def release(self, ent: Entity) -> Parcel:
+        """Take ent out of the store, returning its Components"""
+        comps = list(ent.components)
+        self.estore.destroy_entity(ent)
+        for comp in comps:
+            ent.remove(comp)
+        return comps
+
+
+def _serve(conn: Connection, setup: Setup, zone_kind: Type[Component], zone_field: str) -> None:
+    """Worker process main loop: answer the coordinator's requests until told to stop"""
+    shard: Shard | None = None
+    while True:
+        request, *args = conn.recv()
+        if request == "start":
+            zones, parcels = args
+            shard = Shard(setup, zone_kind, zone_field, zones)
+            shard.admit(parcels)
+            conn.send(None)
+        elif request == "tick":
+            assert shard is not None
+            conn.send(shard.tick(*args))
+        elif request == "gather":
+            assert shard is not None
+            conn.send([list(ent.components) for ent in shard.estore.entities.values()])
+        else:
+            conn.close()
+            return
+
+
+class ShardedSimulation:
+    """Ticks the zones of an EntityStore in worker processes (see the module docs).
+    Zones are dealt out largest first to the least loaded worker; Entities without a zone go to the first.
+    A zone none of the workers has seen yet is given to the least loaded one when an Entity first moves into it."""
+
+    workers: int
+    owners: dict[Hashable, int]  # zone -> worker
+    loads: list[int]  # Entities per worker, as of the last tick
+    stats: list[ShardStats]  # per worker, for the last tick
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        estore: EntityStore,
+        setup: Setup,
+        zone_kind: Type[Component],
+        zone_field: str,
+        workers: int | None = None,
+        context: Any = None,
+    ):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.zone_kind = zone_kind
+        self.zone_field = zone_field
+        self.owners = {}
+        self.loads = [0] * self.workers
+        self.stats = [ShardStats() for _ in range(self.workers)]
+        self._arrivals: list[list[Parcel]] = [[] for _ in range(self.workers)]
+
+        # Deal out the zones
+        by_zone: dict[Hashable | None, list[Parcel]] = {}
+        for ent in estore.entities.values():
+            zone = getattr(ent[zone_kind], zone_field) if ent.has_any(zone_kind) else None
+            by_zone.setdefault(zone, []).append(list(ent.components))  # (pickled detached)
+        parcels: list[list[Parcel]] = [[] for _ in range(self.workers)]
+        zones: list[set[Hashable]] = [set() for _ in range(self.workers)]
+        parcels[0].extend(by_zone.pop(None, []))
+        self.loads[0] = len(parcels[0])
+        for zone, members in sorted(by_zone.items(), key=lambda item: -len(item[1])):
+            worker = self._least_loaded()
+            self.owners[zone] = worker
+            zones[worker].add(zone)
+            parcels[worker].extend(members)
+            self.loads[worker] += len(members)
+
+        ctx = context or multiprocessing.get_context()
+        self._conns: list[Connection] = []
+        self._procs = []
+        for worker in range(self.workers):
+            here, there = ctx.Pipe()
+            proc = ctx.Process(target=_serve, args=(there, setup, zone_kind, zone_field), daemon=True)
+            proc.start()
+            there.close()
+            self._conns.append(here)
+            self._procs.append(proc)
+        for conn, worker_zones, worker_parcels in zip(self._conns, zones, parcels):
+            conn.send(("start", worker_zones, worker_parcels))
+        for conn in self._conns:
+            conn.recv()
+
+    def __enter__(self) -> "ShardedSimulation":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _least_loaded(self) -> int:
+        return min(range(self.workers), key=lambda w: self.loads[w])
+
+    def tick(self, user_input: Input) -> list[SideEffect]:
+        """Run one tick in every worker at once. Returns the side effects, in worker order.
+        Entities that changed zones are passed to their new owners, to join them before the next tick."""
+        arrivals, self._arrivals = self._arrivals, [[] for _ in range(self.workers)]
+        for conn, parcels in zip(self._conns, arrivals):
+            conn.send(("tick", user_input, parcels))
+
+        side_effects: list[SideEffect] = []
+        for worker, conn in enumerate(self._conns):
+            effects, departures, stats = conn.recv()
+            side_effects.extend(effects)
+            self.stats[worker] = stats
+            self.loads[worker] = stats.entities
+            for comps in departures:
+                self._route(comps)
+        return side_effects
+
+    def _route(self, comps: Parcel) -> None:
+        zone = next(getattr(c, self.zone_field) for c in comps if isinstance(c, self.zone_kind))
+        worker = self.owners.get(zone)
+        if worker is None:
+            worker = self.owners[zone] = self._least_loaded()
+        self._arrivals[worker].append(comps)
+        self.loads[worker] += 1
+
+    def gather(self) -> EntityStore:
+        """A new EntityStore holding (copies of) every Entity in the simulation, including any in transit"""
+        estore = EntityStore()
+        for conn in self._conns:
+            conn.send(("gather",))
+        for conn, arriving in zip(self._conns, self._arrivals):
+            for comps in conn.recv() + [[c.clone() for c in parcel] for parcel in arriving]:
+                estore.create_entity(comps)
+        return estore
+
+    def close(self) -> None:
+        """Stop the workers"""
+        for conn in self._conns:
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc in self._procs:
+            proc.join()
+        self._conns = []
+        self._procs = []
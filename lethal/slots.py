@@ -0,0 +1,167 @@
+"""Slotted class runtime behind lethal.ecs.Component.
+
+Components are declared like pydantic models (annotated fields, optional pydantic.Field defaults), but
+ComponentMeta turns each declaration into a plain __slots__ class with a generated keyword-only __init__:
+no validation, no per-instance __dict__. Pydantic is only brought in at the serialization boundary,
+via a model built on demand from the same declaration (see validator_model).
+
+While attached to an Entity, a Component is switched (in place) to its class's tracked_class, whose
+__setattr__ reports field changes. Detached Components don't pay for that.
+"""
+
+from copy import deepcopy
+from dataclasses import MISSING
+from functools import cache
+from typing import Any, Callable, ClassVar, dataclass_transform, get_origin, get_type_hints
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
+
+# Default values that can be shared between instances as-is
+ATOMIC = (int, float, bool, str, bytes, type(None), tuple, frozenset)
+
+
+class FieldSpec:
+    """A declared Component field"""
+
+    __slots__ = ("name", "annotation", "default", "default_factory", "owner")
+
+    def __init__(self, name: str, annotation: Any, default: Any, default_factory: Callable[[], Any] | None, owner):
+        self.name = name
+        self.annotation = annotation
+        self.default = default
+        self.default_factory = default_factory
+        self.owner = owner
+
+    @property
+    def required(self) -> bool:
+        """True if the field has neither a default nor a default factory"""
+        return self.default is MISSING and self.default_factory is None
+
+
+def _is_classvar(annotation: Any) -> bool:
+    if isinstance(annotation, str):
+        return annotation.startswith(("ClassVar", "typing.ClassVar"))
+    return annotation is ClassVar or get_origin(annotation) is ClassVar
+
+
+def _field_default(value: Any) -> tuple[Any, Callable[[], Any] | None]:
+    """Split a class-body value (plain default or pydantic Field) into (default, default_factory)"""
+    if isinstance(value, FieldInfo):
+        if value.default_factory is not None:
+            return MISSING, value.default_factory  # type: ignore[return-value]
+        value = MISSING if value.default is PydanticUndefined else value.default
+    if value is not MISSING and not isinstance(value, ATOMIC):
+        return MISSING, lambda: deepcopy(value)
+    return value, None
+
+
+@dataclass_transform(kw_only_default=True, field_specifiers=(Field,))
+class ComponentMeta(type):
+    """Builds slotted Component classes from pydantic-style declarations.
+    Each class gets:
+      __component_fields__  name -> FieldSpec, inherited fields first
+      kind                  the class name, shared by all instances (unless given explicitly)
+      __init__              generated, keyword-only (inherited as-is if the class adds no fields)
+      __slots__             one per new field, plus any names listed in __private_slots__"""
+
+    __component_fields__: dict[str, FieldSpec]
+    kind: str
+
+    def __new__(mcs, name: str, bases: tuple[type, ...], namespace: dict[str, Any], **kwargs: Any):
+        fields: dict[str, FieldSpec] = {}
+        for base in reversed(bases):
+            fields.update(getattr(base, "__component_fields__", {}))
+
+        own: list[tuple[str, Any, Any]] = []
+        for field_name, annotation in namespace.get("__annotations__", {}).items():
+            if field_name.startswith("_") or _is_classvar(annotation):
+                continue
+            own.append((field_name, annotation, namespace.pop(field_name, MISSING)))
+
+        namespace.setdefault("kind", name)
+        namespace["__slots__"] = tuple(n for n, _, _ in own if n not in fields) + namespace.pop("__private_slots__", ())
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        for field_name, annotation, value in own:
+            default, factory = _field_default(value)
+            fields[field_name] = FieldSpec(field_name, annotation, default, factory, cls)
+        cls.__component_fields__ = fields
+        if own:
+            cls.__init__ = _make_init(cls, fields)  # type: ignore[misc]
+        return cls
+
+
+def _make_init(cls: type, fields: dict[str, FieldSpec]) -> Callable[..., None]:
+    """Generate `def __init__(self, *, a, b=<default>, ...)` assigning straight to the slots"""
+    scope: dict[str, Any] = {"MISSING": MISSING}
+    params = []
+    body = []
+    for name, spec in fields.items():
+        if spec.default_factory is not None:
+            scope[f"factory_{name}"] = spec.default_factory
+            params.append(f"{name}=MISSING")
+            body.append(f"    if {name} is MISSING:\n        {name} = factory_{name}()")
+        elif spec.default is not MISSING:
+            scope[f"default_{name}"] = spec.default
+            params.append(f"{name}=default_{name}")
+        else:
+            params.append(name)
+        body.append(f"    self.{name} = {name}")
+    source = f"def __init__(self, *, {', '.join(params)}):\n" + "\n".join(body)
+    exec(source, scope)  # pylint: disable=exec-used
+    init = scope["__init__"]
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    return init
+
+
+@cache
+def tracked_class(cls: ComponentMeta) -> ComponentMeta:
+    """The subclass a Component of cls switches to while attached to an Entity.
+    Assigning a field reports the change through the Component's _changed()."""
+    fields = cls.__component_fields__
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in fields:
+            object.__setattr__(self, name, value)
+            return
+        old = getattr(self, name)
+        if old == value:
+            object.__setattr__(self, name, value)
+            return
+        self._check_change(name, value)
+        object.__setattr__(self, name, value)
+        self._changed(name, old)
+
+    namespace = {
+        "__lethal_proxy__": True,
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__setattr__": __setattr__,
+        "kind": cls.kind,
+    }
+    return ComponentMeta(cls.__name__, (cls,), namespace)
+
+
+def validator_model(cls: ComponentMeta) -> type[BaseModel]:
+    """The pydantic model equivalent of a Component class (built on first use, then cached on the class).
+    It also carries `kind`, and ignores unknown keys."""
+    model = cls.__dict__.get("__validator_model__")
+    if model is None:
+        hints = get_type_hints(cls)
+        definitions: dict[str, Any] = {"kind": (str, cls.kind)}
+        for name, spec in cls.__component_fields__.items():
+            if spec.default_factory is not None:
+                definitions[name] = (hints.get(name, Any), Field(default_factory=spec.default_factory))
+            elif spec.default is not MISSING:
+                definitions[name] = (hints.get(name, Any), spec.default)
+            else:
+                definitions[name] = (hints.get(name, Any), ...)
+        model = create_model(  # type: ignore[call-overload]
+            f"{cls.__name__}Model",
+            __config__=ConfigDict(extra="ignore", arbitrary_types_allowed=True),
+            **definitions,
+        )
+        setattr(cls, "__validator_model__", model)
+    return model
@@ -0,0 +1,429 @@
+"""Binary snapshots of an EntityStore.
+
+A snapshot is laid out by Component kind: for each kind, one column per field. Columns of ints, floats or
+bools are stored as fixed-width arrays; other values as a JSON list, one per column, dumped and validated
+(when read back) as the field's type, like Component.to_dict/from_dict. Nothing in a snapshot is executable.
+Each column may be zlib-compressed. The file starts with a small JSON directory of the columns, so a reader
+can find any column without touching the rest:
+
+    estore.save("world.snap", compress=True)
+    estore = EntityStore.load("world.snap")
+
+    with Snapshot.open("world.snap") as snap:      # memory-mapped; nothing is decoded up front
+        xs = snap.column(Loc, "x")                  # decoded on first access (zero-copy if uncompressed)
+        ent = snap.entity("e42")                    # built on demand, just this one
+"""
+
+import gc
+import json
+import mmap
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import cache
+from itertools import accumulate, chain, repeat
+from operator import attrgetter
+from typing import IO, Annotated, Any, BinaryIO, Iterator, Type
+
+from pydantic import TypeAdapter, ValidationError
+
+from .ecs import KINDS, Component, Entity, EntityId, EntityStore, Handle, component_kinds, eid_of, handle_of, kind_of
+from .slots import tracked_class, validator_model
+
+MAGIC = b"LETHSNAP"
+VERSION = 2
+# magic, version, directory length
+PREAMBLE = struct.Struct("<8sII")
+ALIGN = 8
+
+# Typecodes (as read by memoryview.cast) of the fixed-width column types
+INT, FLOAT, BOOL, JSON = "q", "d", "?", "json"
+# Per-component bookkeeping columns: the row of the owning entity, and the position among its components
+# (plus, per entity, how many components it has)
+OWNER, POSITION, SIZE = "I", "I", "I"
+
+
+class SnapshotError(RuntimeError):
+    """Raised when reading something that isn't a (supported) snapshot"""
+
+
+def _column_type(values: list[Any]) -> str:
+    """The narrowest column type holding all the values exactly"""
+    if not values:
+        return JSON
+    first = type(values[0])
+    if first in (int, float, bool) and all(type(v) is first for v in values):
+        return {int: INT, float: FLOAT, bool: BOOL}[first]
+    return JSON
+
+
+@cache
+def _field_adapter(comp_class: type, name: str) -> TypeAdapter:
+    """Dumps and validates a list of comp_class.name values, as the Component's validator model would the field"""
+    info = validator_model(comp_class).model_fields[name]  # type: ignore[arg-type]
+    item = Annotated[(info.annotation, *info.metadata)] if info.metadata else info.annotation
+    return TypeAdapter(list[item])  # type: ignore[valid-type]
+
+
+@cache
+def _numbers_fit(comp_class: type, name: str, ctype: str) -> bool:
+    """Whether comp_class.name is declared as the column's number type (or that | None), so needs no validating"""
+    number = {INT: int, FLOAT: float, BOOL: bool}[ctype]
+    fits: tuple[Any, ...] = (number, number | None)
+    return validator_model(comp_class).model_fields[name].annotation in fits  # type: ignore[arg-type]
+
+
+class _Writer:
+    """Accumulates aligned column blocks and their directory entries"""
+
+    def __init__(self, compress: bool):
+        self.compress = compress
+        self.blocks: list[Any] = []
+        self.size = 0
+
+    def add(self, ctype: str, values: Any) -> dict[str, Any]:
+        """Append a column block (values: numbers, or JSON bytes), return its directory entry.
+        Raises OverflowError for ints too big for 64 bits."""
+        if ctype == JSON:
+            data = values
+        else:
+            data = values if isinstance(values, array) else array("B" if ctype == BOOL else ctype, values)
+        codec = "raw"
+        if self.compress:
+            data = zlib.compress(data, 1)
+            codec = "zlib"
+        length = memoryview(data).nbytes
+        entry = {"type": ctype, "codec": codec, "offset": self.size, "length": length}
+        self.blocks.append(data)
+        self.size += length
+        padding = -self.size % ALIGN
+        if padding:
+            self.blocks.append(bytes(padding))
+            self.size += padding
+        return entry
+
+    def add_field(self, kind: type, name: str, values: list[Any]) -> dict[str, Any]:
+        """Append the column of kind.name, return its directory entry"""
+        ctype = _column_type(values)
+        if ctype != JSON:
+            try:
+                return self.add(ctype, values)
+            except OverflowError:  # ints too big for 64 bits
+                pass
+        return self.add(JSON, _field_adapter(kind, name).dump_json(values))
+
+
+def save_snapshot(estore: EntityStore, file: str | BinaryIO, compress: bool = False) -> None:
+    """Write the Entities of estore (and its id allocation state) to file, a path or binary file object"""
+    owners: dict[type, array] = {}
+    positions: dict[type, array] = {}
+    members: dict[type, list[Component]] = {}
+    # class -> (components, owners, positions) of its kind (several classes may map to one kind, see kind_of)
+    tables: dict[type, tuple[list[Component], array, array]] = {}
+    for row, ent in enumerate(estore.entities.values()):
+        for pos, comp in enumerate(ent.components):
+            table = tables.get(type(comp))
+            if table is None:
+                kind = kind_of(comp)
+                if kind not in members:
+                    members[kind] = []
+                    owners[kind] = array(OWNER)
+                    positions[kind] = array(POSITION)
+                table = tables[type(comp)] = (members[kind], owners[kind], positions[kind])
+            table[0].append(comp)
+            table[1].append(row)
+            table[2].append(pos)
+
+    writer = _Writer(compress)
+    directory: dict[str, Any] = {
+        "entities": len(estore.entities),
+        "handles": writer.add(INT, list(estore.entities)),
+        "sizes": writer.add(SIZE, [len(ent.components) for ent in estore.entities.values()]),
+        "generations": writer.add(INT, estore.generations),
+        "free_slots": writer.add(INT, estore.free_slots),
+        "kinds": [],
+    }
+    for kind, comps in members.items():
+        columns = {"_owner": writer.add(OWNER, owners[kind]), "_position": writer.add(POSITION, positions[kind])}
+        for name in kind.__component_fields__:
+            if name == "eid":  # it's the owner's
+                continue
+            columns[name] = writer.add_field(kind, name, list(map(attrgetter(name), comps)))
+        directory["kinds"].append({"kind": kind.kind, "rows": len(comps), "columns": columns})
+
+    header = json.dumps(directory).encode()
+    header += b" " * (-(PREAMBLE.size + len(header)) % ALIGN)
+    if isinstance(file, str):
+        with open(file, "wb") as out:
+            _write(out, header, writer.blocks)
+    else:
+        _write(file, header, writer.blocks)
+
+
+def _write(out: IO[bytes], header: bytes, blocks: list[Any]) -> None:
+    out.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+    out.write(header)
+    for block in blocks:
+        out.write(block)
+
+
+class Snapshot:
+    """Read access to a snapshot, decoding only what's asked for.
+    Columns are decoded on first access and kept; Entities and Components are built each time they're asked for.
+    Numeric columns come back as memoryviews (into the mapped file, if it's uncompressed): don't keep them
+    past close()."""
+
+    def __init__(self, data: Any, closer: Any = None):
+        self._data = memoryview(data)
+        self._closer = closer
+        magic, version, header_len = PREAMBLE.unpack_from(self._data)
+        if magic != MAGIC:
+            raise SnapshotError("Not a lethal snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+        self.directory = json.loads(bytes(self._data[PREAMBLE.size : PREAMBLE.size + header_len]))
+        self._base = PREAMBLE.size + header_len
+        self._kinds = {entry["kind"]: entry for entry in self.directory["kinds"]}
+        self._decoded: dict[tuple, Any] = {}
+        self._rows: dict[Handle, int] | None = None
+
+    @classmethod
+    def open(cls, path: str) -> "Snapshot":
+        """Memory-map the snapshot at path"""
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, mapped)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Snapshot":
+        """Read a snapshot held in memory"""
+        return cls(data)
+
+    def close(self) -> None:
+        """Release the mapped file. (If views into it are still referenced, it's unmapped once they're gone.)"""
+        self._decoded.clear()
+        self._rows = None
+        try:
+            self._data.release()
+            if self._closer is not None:
+                self._closer.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.directory["entities"]
+
+    @property
+    def kinds(self) -> list[str]:
+        """The kinds of Component in the snapshot"""
+        return list(self._kinds)
+
+    def rows(self, kind: Type[Component] | str) -> int:
+        """How many Components of kind the snapshot holds"""
+        return self._kind_entry(kind)["rows"]
+
+    def handles(self) -> Any:
+        """The Handle of every Entity, in row order"""
+        return self._decode(self.directory["handles"])
+
+    def column(self, kind: Type[Component] | str, field: str) -> Any:
+        """The values of kind.field, one per Component of kind (in entity order).
+        A memoryview for numeric columns (bools read as 0/1), else a list (validated, if the class still has the field).
+        Raises SnapshotError if the values aren't valid for the field."""
+        entry = self._kind_entry(kind)
+        columns = entry["columns"]
+        if field not in columns:
+            raise KeyError(f"{kind} has no {field} column in this snapshot")
+        comp_class = KINDS.get(entry["kind"])
+        if comp_class is None or field not in comp_class.__component_fields__:
+            return self._decode(columns[field])
+        return self._field_values(comp_class, field, columns[field])
+
+    def component(self, kind: Type[Component] | str, row: int) -> Component:
+        """Build the row'th Component of kind"""
+        entry = self._kind_entry(kind)
+        comp_class = KINDS[entry["kind"]]
+        handle = self.handles()[self._decode(entry["columns"]["_owner"])[row]]
+        return self._build(comp_class, entry, row, eid_of(handle))
+
+    def components(self, kind: Type[Component] | str) -> Iterator[Component]:
+        """Build each Component of kind, in entity order"""
+        for row in range(self.rows(kind)):
+            yield self.component(kind, row)
+
+    def entity(self, eid: Handle | EntityId) -> Entity:
+        """Build the Entity with the given Handle or eid (detached: it belongs to no store).
+        Raises KeyError if the snapshot doesn't have it."""
+        handle = handle_of(eid) if isinstance(eid, str) else eid
+        if self._rows is None:
+            self._rows = {h: row for row, h in enumerate(self.handles())}
+        return self._entity(self._rows[handle], handle)
+
+    def entities(self) -> Iterator[Entity]:
+        """Build each Entity, in row order"""
+        for row, handle in enumerate(self.handles()):
+            yield self._entity(row, handle)
+
+    def restore(self) -> EntityStore:
+        """Build a new EntityStore holding every Entity in the snapshot, with the same Handles.
+        (The cyclic garbage collector is paused meanwhile: it would otherwise rescan the growing world
+        over and over, to find nothing.)"""
+        paused = gc.isenabled()
+        gc.disable()
+        try:
+            return self._restore()
+        finally:
+            if paused:
+                gc.enable()
+
+    def _restore(self) -> EntityStore:
+        estore = EntityStore()
+        estore.generations = self._decode(self.directory["generations"]).tolist()
+        estore.free_slots = self._decode(self.directory["free_slots"]).tolist()
+        handles = self.handles()
+        eids = [eid_of(handle) for handle in handles]
+        # Every Component in one list, by entity then position: row's are flat[starts[row] : starts[row + 1]]
+        starts = list(accumulate(self._decode(self.directory["sizes"]), initial=0))
+        flat: list[Any] = [None] * starts[-1]
+        for entry in self.directory["kinds"]:
+            owners = self._decode(entry["columns"]["_owner"])
+            positions = self._decode(entry["columns"]["_position"])
+            comps = self._build_all(KINDS[entry["kind"]], entry, [eids[owner] for owner in owners])
+            for owner, position, comp in zip(owners, positions, comps):
+                flat[starts[owner] + position] = comp
+        # Entities spawned alike share a layout: the positions of their Components under each kind
+        layouts: dict[tuple[type, ...], list[tuple[type, list[int]]]] = {}
+        for row, handle in enumerate(handles):
+            comps = flat[starts[row] : starts[row + 1]]
+            classes = tuple(map(type, comps))
+            layout = layouts.get(classes)
+            if layout is None:
+                layout = layouts[classes] = _index_layout(classes)
+            index = {kind: [comps[i] for i in at] for kind, at in layout}
+            # pylint: disable-next=protected-access
+            estore.entities[handle] = Entity._from_state(eids[row], handle, comps, index, estore)
+        attach = Component._entity.__set__  # type: ignore[attr-defined]  # (its slot, see Component._attach)
+        owners = chain.from_iterable(map(repeat, estore.entities.values(), self._decode(self.directory["sizes"])))
+        for comp, ent in zip(flat, owners):
+            attach(comp, ent)
+        return estore
+
+    def _kind_entry(self, kind: Type[Component] | str) -> dict[str, Any]:
+        name = kind if isinstance(kind, str) else kind.kind
+        entry = self._kinds.get(name)
+        if entry is None:  # maybe saved under a former name
+            comp_class = KINDS.get(name)
+            entry = next((e for e in self._kinds.values() if KINDS.get(e["kind"]) is comp_class), None)
+        if entry is None:
+            raise KeyError(f"No {name} Components in this snapshot")
+        return entry
+
+    def _decode(self, column: dict[str, Any]) -> Any:
+        """The values of a column, decoded on first use (JSON columns unvalidated: see _field_values)"""
+        key = (column["offset"], column["length"])  # (empty columns share offsets)
+        found = self._decoded.get(key)
+        if found is None:
+            raw = self._raw(column)
+            found = json.loads(raw) if column["type"] == JSON else memoryview(raw).cast(column["type"])
+            self._decoded[key] = found
+        return found
+
+    def _raw(self, column: dict[str, Any]) -> Any:
+        """The bytes of a column (a view into the snapshot, unless compressed)"""
+        start = self._base + column["offset"]
+        raw: Any = self._data[start : start + column["length"]]
+        return zlib.decompress(raw) if column["codec"] == "zlib" else raw
+
+    def _field_values(self, comp_class: type, name: str, column: dict[str, Any]) -> Any:
+        """The values of comp_class.name's column, validated as the field on first use.
+        (Numeric columns of fields declared as that number are taken as they are.)"""
+        key = (column["offset"], column["length"], name)
+        found = self._decoded.get(key)
+        if found is None:
+            try:
+                if column["type"] == JSON:
+                    found = _field_adapter(comp_class, name).validate_json(bytes(self._raw(column)))
+                elif _numbers_fit(comp_class, name, column["type"]):
+                    found = self._decode(column)
+                else:
+                    found = _field_adapter(comp_class, name).validate_python(self._decode(column).tolist())
+            except ValidationError as err:
+                raise SnapshotError(f"Invalid {comp_class.__name__}.{name} column: {err}") from err
+            self._decoded[key] = found
+        return found
+
+    def _field_columns(self, comp_class: type, entry: dict[str, Any]) -> list[tuple[str, Any]]:
+        """(field name, validated column) for each stored field the class still has.
+        Fields added to the class since the snapshot was written get their defaults."""
+        fields = comp_class.__component_fields__  # type: ignore[attr-defined]
+        return [
+            (name, self._field_values(comp_class, name, column))
+            for name, column in entry["columns"].items()
+            if name in fields and not name.startswith("_")
+        ]
+
+    def _build_all(self, comp_class: type, entry: dict[str, Any], eids: list[EntityId]) -> list[Component]:
+        """Every Component of entry's kind, given the eid of each, ready to attach (of the tracked class).
+        Built a field at a time, straight into the slots (rather than one __init__ call each)."""
+        stored = dict(self._field_columns(comp_class, entry))
+        tracked: Any = tracked_class(comp_class)
+        comps: list[Any] = [object.__new__(tracked) for _ in eids]
+        for name, spec in comp_class.__component_fields__.items():  # type: ignore[attr-defined]
+            if name == "eid":
+                values: Any = eids
+            elif name in stored:
+                values = stored[name]
+            elif spec.default_factory is not None:
+                values = (spec.default_factory() for _ in comps)
+            elif not spec.required:
+                values = repeat(spec.default)
+            else:
+                raise SnapshotError(f"No {entry['kind']}.{name} column in this snapshot")
+            # Straight into the field's slot (the tracked class's __setattr__ would report each as a change)
+            put = getattr(tracked, name).__set__
+            for comp, value in zip(comps, values):
+                put(comp, value)
+        return comps
+
+    def _entity(self, row: int, handle: Handle) -> Entity:
+        return Entity._assemble(eid_of(handle), handle, self._components_of(row))  # pylint: disable=protected-access
+
+    def _components_of(self, owner: int) -> list[Component]:
+        found: list[tuple[int, Component]] = []
+        handle = self.handles()[owner]
+        for entry in self.directory["kinds"]:
+            owners = self._decode(entry["columns"]["_owner"])
+            lo = bisect_left(owners, owner)
+            hi = bisect_right(owners, owner, lo)
+            if lo == hi:
+                continue
+            positions = self._decode(entry["columns"]["_position"])
+            comp_class = KINDS[entry["kind"]]
+            for row in range(lo, hi):
+                found.append((positions[row], self._build(comp_class, entry, row, eid_of(handle))))
+        return [comp for _, comp in sorted(found, key=_first)]
+
+    def _build(self, comp_class: type, entry: dict[str, Any], row: int, eid: EntityId) -> Component:
+        fields = self._field_columns(comp_class, entry)
+        return comp_class(eid=eid, **{name: column[row] for name, column in fields})
+
+
+def _first(pair: tuple[int, Any]) -> int:
+    return pair[0]
+
+
+def _index_layout(classes: tuple[type, ...]) -> list[tuple[type, list[int]]]:
+    """For an Entity whose Components are of these classes: each kind it's indexed under, with the positions of
+    the Components answering to it (see Entity._index)"""
+    layout: dict[type, list[int]] = {}
+    for position, comp_class in enumerate(classes):
+        for kind in component_kinds(comp_class):
+            layout.setdefault(kind, []).append(position)
+    return list(layout.items())
@@ -0,0 +1,119 @@
+"""Spatial index: find Entities by zone and x,y"""
+
+from typing import Any, Hashable, Type
+
+from .ecs import Component, Entity, EntityStore, EntityStoreListener, Handle
+from .loc import Loc
+
+CellKey = tuple[Hashable, int, int]
+
+
+class SpatialIndex(EntityStoreListener):
+    """Files every Entity having both a Loc and a zone Component under (zone, x, y).
+    The zone is a field of the zone Component, eg. Room.room_id, so entities in different
+    rooms never collide.  Kept in sync as Locs and zones are added, removed or assigned."""
+
+    zone_kind: Type[Component]
+    zone_field: str
+    loc_kind: Type[Loc]
+    cells: dict[CellKey, dict[Handle, Entity]]
+    zones: dict[Hashable, dict[Handle, Entity]]
+    keys: dict[Handle, CellKey]
+
+    def __init__(self, zone_kind: Type[Component], zone_field: str, loc_kind: Type[Loc] = Loc):
+        self.zone_kind = zone_kind
+        self.zone_field = zone_field
+        self.loc_kind = loc_kind
+        self.kinds = (loc_kind, zone_kind)
+        self.cells = {}
+        self.zones = {}
+        self.keys = {}
+
+    @classmethod
+    def of(
+        cls, estore: EntityStore, zone_kind: Type[Component], zone_field: str, loc_kind: Type[Loc] = Loc
+    ) -> "SpatialIndex":
+        """Return the estore's SpatialIndex for this configuration, creating it on first use"""
+        return estore.index((cls, zone_kind, zone_field, loc_kind), lambda: cls(zone_kind, zone_field, loc_kind))
+
+    def at(self, zone: Hashable, x: int, y: int) -> list[Entity]:  # pylint: disable=invalid-name
+        """Entities at the given point"""
+        cell = self.cells.get((zone, x, y))
+        return list(cell.values()) if cell else []
+
+    # pylint: disable=invalid-name,too-many-arguments
+    def in_rect(self, zone: Hashable, x: int, y: int, width: int, height: int) -> list[Entity]:
+        """Entities within the rectangle whose top-left is x,y.
+        Probes cells or walks the zone, whichever is smaller."""
+        members = self.zones.get(zone)
+        if not members or width <= 0 or height <= 0:
+            return []
+        if width * height <= len(members):
+            cells = self.cells
+            hits: list[Entity] = []
+            for cy in range(y, y + height):
+                for cx in range(x, x + width):
+                    cell = cells.get((zone, cx, cy))
+                    if cell:
+                        hits.extend(cell.values())
+            return hits
+        keys = self.keys
+        return [
+            ent
+            for handle, ent in members.items()
+            if x <= keys[handle][1] < x + width and y <= keys[handle][2] < y + height
+        ]
+
+    def in_radius(self, zone: Hashable, x: int, y: int, radius: int) -> list[Entity]:  # pylint: disable=invalid-name
+        """Entities within radius (euclidean) of x,y"""
+        keys = self.keys
+        r2 = radius * radius
+        return [
+            ent
+            for ent in self.in_rect(zone, x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)
+            if (keys[ent.handle][1] - x) ** 2 + (keys[ent.handle][2] - y) ** 2 <= r2
+        ]
+
+    def entity_created(self, ent: Entity) -> None:
+        self._refile(ent)
+
+    def entity_destroyed(self, ent: Entity) -> None:
+        self._unfile(ent)
+
+    def component_added(self, ent: Entity, comp: Component) -> None:
+        self._refile(ent)
+
+    def component_removed(self, ent: Entity, comp: Component) -> None:
+        self._refile(ent)
+
+    def component_changed(self, ent: Entity, comp: Component, field: str, old: Any) -> None:
+        self._refile(ent)
+
+    def _key_for(self, ent: Entity) -> CellKey | None:
+        if not ent.has_all([self.loc_kind, self.zone_kind]):
+            return None
+        loc = ent[self.loc_kind]
+        return (getattr(ent[self.zone_kind], self.zone_field), loc.x, loc.y)
+
+    def _refile(self, ent: Entity) -> None:
+        key = self._key_for(ent)
+        if key == self.keys.get(ent.handle):
+            return
+        self._unfile(ent)
+        if key is not None:
+            self.keys[ent.handle] = key
+            self.cells.setdefault(key, {})[ent.handle] = ent
+            self.zones.setdefault(key[0], {})[ent.handle] = ent
+
+    def _unfile(self, ent: Entity) -> None:
+        key = self.keys.pop(ent.handle, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        del cell[ent.handle]
+        if not cell:
+            del self.cells[key]
+        zone = self.zones[key[0]]
+        del zone[ent.handle]
+        if not zone:
+            del self.zones[key[0]]
@@ -10,13 +10,11 @@ def test_Controller():
     e.add(Controller(name="controller1"))
 
     inp = Input(keys=["KEY_RIGHT"])
-    system = ControllerSystem(estore=estore, user_input=inp)
-    system.update()
+    ControllerSystem().run_standalone(estore, inp)
     assert e[Controller].left is False
     assert e[Controller].right is True
 
     inp = Input(keys=["KEY_LEFT"])
-    system = ControllerSystem(estore=estore, user_input=inp)
-    system.update()
+    ControllerSystem().run_standalone(estore, inp)
     assert e[Controller].left is True
     assert e[Controller].right is False
@@ -0,0 +1,49 @@
+# pylint: disable-all
+from dungeon.message_log import MessageLog
+
+
+def test_MessageLog_coalesces_repeats():
+    log = MessageLog(["Welcome"])
+    for _ in range(12):
+        log.append("Bonk!")
+    log.append("Ouch")
+    log.append("Bonk!")
+    assert list(log) == ["Welcome", "Bonk! (x12)", "Ouch", "Bonk!"]
+    assert log.latest(2) == ["Bonk!", "Ouch"]
+    assert log[1] == "Bonk! (x12)" and log[-2:] == ["Ouch", "Bonk!"]
+    assert "Ouch" in log and len(log) == 4
+
+
+def test_MessageLog_is_bounded_and_spills(tmp_path):
+    spill = tmp_path / "messages.log"
+    log = MessageLog(capacity=3, spill=str(spill))
+    for i in range(10):
+        log.append(f"m{i}")
+        log.append(f"m{i}")
+    assert list(log) == ["m7 (x2)", "m8 (x2)", "m9 (x2)"]
+    assert spill.read_text().splitlines() == [f"m{i} (x2)" for i in range(7)]
+    assert log.latest(5) == ["m9 (x2)", "m8 (x2)", "m7 (x2)"]
+    log.close()
+
+
+def test_MessageLog_keeps_its_spill_file_open(tmp_path):
+    spill = tmp_path / "messages.log"
+    log = MessageLog(capacity=1, spill=str(spill))
+    log.append("a")
+    assert log._out is None  # (nothing spilled yet)
+    log.append("b")
+    out = log._out
+    log.append("c")
+    assert log._out is out and not out.closed
+    assert spill.read_text().splitlines() == ["a", "b"]
+    log.close()
+    assert out.closed and log._out is None
+    log.append("d")  # (reopened, appending)
+    log.close()
+    assert spill.read_text().splitlines() == ["a", "b", "c"]
+
+
+def test_MessageLog_without_spill_drops_oldest():
+    log = MessageLog(["a", "b", "c"], capacity=2)
+    assert list(log) == ["b", "c"]
+    assert log == MessageLog(["b", "c"]) and log != MessageLog(["b", "c", "c"])
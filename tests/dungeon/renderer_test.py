@@ -0,0 +1,32 @@
+# pylint: disable-all
+import io
+
+from blessed import Terminal
+
+from lethal import FramebufferOutput, Input
+from dungeon.dungeon_module import DungeonModule
+
+
+def test_needs_redraw_only_after_visible_changes():
+    term = Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO())
+    output = FramebufferOutput(term, io.StringIO())
+    module = DungeonModule()
+    state = module.create()
+    assert module.needs_redraw(state)
+
+    def frame():
+        output.begin_frame()
+        module.draw(state, output)
+        output.end_frame()
+
+    frame()
+    state = module.update(state, Input([]), 0.1)
+    assert not module.needs_redraw(state)
+
+    state = module.update(state, Input(["KEY_LEFT"]), 0.1)
+    assert module.needs_redraw(state)
+    frame()
+    assert not module.needs_redraw(state)
+
+    state.messages.append("Hello")
+    assert module.needs_redraw(state)
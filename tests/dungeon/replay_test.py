@@ -0,0 +1,31 @@
+# pylint: disable-all
+from lethal import Input, Recording
+from lethal.recording import RecordedInput
+from dungeon.dungeon_comps import Player
+from dungeon.dungeon_module import DungeonModule
+from dungeon.replay import DungeonReplay
+
+WALK = ["KEY_RIGHT"] * 5 + ["KEY_DOWN"] * 4 + [" "] + ["KEY_DOWN"] * 3 + ["KEY_LEFT"] * 2 + ["KEY_UP"] * 6
+
+
+def replay(recording):
+    driver = DungeonReplay(DungeonModule(), recording)
+    report = driver.run()
+    return driver.state, report
+
+
+def test_replays_are_deterministic():
+    recording = Recording([RecordedInput(t=i * 0.1, keys=[key], delta=0) for i, key in enumerate(WALK)])
+    first, report = replay(recording)
+    second, _ = replay(recording)
+
+    assert report.ticks == len(WALK)
+    assert first.messages == second.messages
+    assert list(first.estore.entities.values()) == list(second.estore.entities.values())
+
+    module = DungeonModule()
+    state = module.create()
+    for key in WALK:
+        state = module.update(state, Input([key]), 0)
+    assert list(first.estore.entities.values()) == list(state.estore.entities.values())
+    assert "Opened door door1" in first.messages
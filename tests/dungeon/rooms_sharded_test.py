@@ -0,0 +1,32 @@
+# pylint: disable-all
+from lethal import Input, Loc
+from lethal.sharding import ShardedSimulation
+from dungeon.dungeon_comps import Player, Room
+from dungeon.dungeon_module import DungeonModule
+from dungeon.message_log import MessageLog
+
+# Walk to the door out of room1, go through, and take a few steps in room2
+WALK = ["KEY_RIGHT"] * 5 + ["KEY_DOWN"] * 4 + [" "] + ["KEY_DOWN"] * 3 + ["KEY_RIGHT"] * 2
+
+
+def where(estore):
+    player = next(iter(estore.select(Player)))
+    return player[Room].room_id, player[Loc].x, player[Loc].y
+
+
+def test_rooms_sharded_play_the_same():
+    module = DungeonModule()
+    state = module.create()
+    with ShardedSimulation(state.estore, DungeonModule.setup_shard, Room, "room_id", workers=2) as sim:
+        assert sim.owners["room1"] != sim.owners["room2"]
+        sharded_messages = []
+        for key in WALK:
+            sharded_messages.extend(e.text for e in sim.tick(Input([key])))
+        world = sim.gather()
+
+    for key in WALK:
+        state = module.update(state, Input([key]), 0)
+
+    assert where(world) == where(state.estore) == ("room2", 6, 3)
+    assert list(MessageLog(sharded_messages)) == state.messages[2:]
+    assert len(world.entities) == len(state.estore.entities)
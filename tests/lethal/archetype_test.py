@@ -0,0 +1,88 @@
+# pylint: disable-all
+from lethal import ArchetypeStorage, Component, EntityStore
+
+
+class Spot(Component):
+    x: int
+    y: int
+
+
+class SubSpot(Spot):
+    ...
+
+
+class Tag(Component):
+    name: str
+
+
+def make_an_entity_store():
+    estore = EntityStore()
+    e1 = estore.create_entity()
+    e1.add(Spot(x=1, y=1))
+    e2 = estore.create_entity()
+    e2.add(Spot(x=2, y=2))
+    e2.add(Tag(name="two"))
+    e3 = estore.create_entity()
+    e3.add(Tag(name="three"))
+    e3.add(SubSpot(x=3, y=3))
+    return estore
+
+
+def test_ArchetypeStorage_iter():
+    estore = make_an_entity_store()
+    storage = ArchetypeStorage.of(estore)
+    assert ArchetypeStorage.of(estore) is storage
+    assert len(storage.tables) == 3
+
+    assert sorted(loc.x for (loc,) in storage.iter(Spot)) == [1, 2, 3]
+    assert sorted((tag.name, loc.x) for loc, tag in storage.iter(Spot, Tag)) == [("three", 3), ("two", 2)]
+    assert [loc.x for (loc,) in storage.iter(SubSpot)] == [3]
+    assert sorted(e.eid for e in storage.entities(Tag)) == ["e2", "e3"]
+
+    # Columns hold the Entity's own Components
+    e2 = estore["e2"]
+    loc, tag = next(storage.iter(Spot, Tag))
+    assert loc is e2[Spot] and tag is e2[Tag]
+
+
+def test_ArchetypeStorage_moves_entities_between_tables():
+    estore = make_an_entity_store()
+    storage = ArchetypeStorage.of(estore)
+    e1, e2 = estore["e1"], estore["e2"]
+    assert storage.table_of(e1) is not storage.table_of(e2)
+
+    e1.add(Tag(name="one"))
+    assert storage.table_of(e1) is storage.table_of(e2)
+    assert sorted(tag.name for (tag,) in storage.iter(Tag)) == ["one", "three", "two"]
+
+    e2.remove(e2[Tag])
+    assert sorted(tag.name for (tag,) in storage.iter(Tag)) == ["one", "three"]
+    assert [e.eid for e in storage.table_of(e1).entities] == ["e1"]
+
+    estore.destroy_entity(e1)
+    assert sorted(tag.name for (tag,) in storage.iter(Tag)) == ["three"]
+
+
+def test_ArchetypeStorage_like_kind_components():
+    estore = EntityStore()
+    storage = ArchetypeStorage.of(estore)
+    ent = estore.create_entity()
+    ent.add(Spot(x=1, y=1))
+    ent.add(Spot(x=2, y=2))
+    assert [loc.x for (loc,) in storage.iter(Spot)] == [1]
+    ent.remove(ent[Spot])
+    assert [loc.x for (loc,) in storage.iter(Spot)] == [2]
+
+
+def test_ArchetypeStorage_columns_agree_with_getitem():
+    estore = EntityStore()
+    storage = ArchetypeStorage.of(estore)
+    ent = estore.create_entity()
+    ent.add(SubSpot(x=1, y=1))
+    ent.add(Spot(x=2, y=2))
+    assert ent[Spot].x == 1
+    assert [loc.x for (loc,) in storage.iter(Spot)] == [1]
+    assert [loc.x for (loc,) in storage.iter(SubSpot)] == [1]
+    ent.remove(ent[SubSpot])
+    assert [loc.x for (loc,) in storage.iter(Spot)] == [2]
+    assert list(storage.iter(SubSpot)) == []
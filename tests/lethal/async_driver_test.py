@@ -0,0 +1,52 @@
+# pylint: disable-all
+import asyncio
+import io
+import time
+
+from lethal import AsyncDriver, Input, Module, Output
+
+
+class Recorder(Module[list]):
+    def create(self) -> list:
+        return []
+
+    async def update_async(self, state: list, user_input: Input, delta: float) -> list:
+        await asyncio.sleep(0)
+        state.append(tuple(user_input.keys))
+        return state
+
+
+def make_driver(script, **kwargs):
+    driver = AsyncDriver(Recorder(), **kwargs)
+    driver.output = Output(driver.term, io.StringIO())
+    driver.poll_interval = 0.01
+
+    def read_key(timeout):
+        time.sleep(timeout)
+        return script.pop(0) if script else ""
+
+    driver._read_key = read_key
+    return driver
+
+
+def test_AsyncDriver_per_key():
+    driver = make_driver(["a", "", "b", "KEY_ESCAPE", "c"])
+    asyncio.run(driver.play())
+    assert driver.state == [("a",), ("b",)]
+    assert driver.output.stats.frames >= 1
+
+
+def test_AsyncDriver_ticks_with_background_task():
+    driver = make_driver(["a", "", "", "", "", "", "", "", "", "", "", "", "KEY_ESCAPE"], tick_rate=200)
+    saves = []
+
+    async def autosave():
+        while True:
+            await asyncio.to_thread(time.sleep, 0.02)  # slow i/o, off the loop
+            saves.append(len(driver.state))
+
+    driver.background(autosave(), "autosave")
+    asyncio.run(driver.play())
+    assert ("a",) in driver.state
+    assert len(driver.state) > 10  # updates kept ticking while keys were awaited and saves ran
+    assert saves
@@ -0,0 +1,96 @@
+# pylint: disable-all
+from lethal import ChangeTracker, Component, EntityStore, Input, Loc, Scheduler, System
+from lethal.changes import mark_changed
+
+
+class Vigor(Component):
+    points: int
+
+
+class Pouch(Component):
+    items: list[str]
+
+
+def eids(ents):
+    return sorted(e.eid for e in ents)
+
+
+def test_ChangeTracker_records_by_kind_and_tick():
+    estore = EntityStore()
+    walker = estore.create_entity([Loc(x=0, y=0), Vigor(points=3)])
+    tracker = ChangeTracker.of(estore, Loc, Vigor, by_tick=True)
+    assert ChangeTracker.of(estore, Loc, Vigor) is tracker
+    assert eids(tracker.current[Loc].added.values()) == ["e1"]  # (already there)
+    tracker.end_tick()
+
+    walker[Loc].x = 1
+    rock = estore.create_entity([Loc(x=5, y=5)])
+    walker.remove(walker[Vigor])
+    estore.create_entity([Pouch(items=[])])  # (not tracked)
+    tracker.end_tick()
+
+    last = tracker.last
+    assert set(last) == {Loc, Vigor}
+    assert eids(last[Loc].changed.values()) == ["e1"] and eids(last[Loc].added.values()) == ["e2"]
+    assert eids(last[Vigor].removed.values()) == ["e1"] and not last[Vigor].added
+    assert not tracker.current and tracker.tick == 2
+
+    estore.destroy_entity(rock)
+    assert eids(tracker.current[Loc].removed.values()) == ["e2"]
+
+
+def test_ChangeReader_reads_since_its_last_read():
+    estore = EntityStore()
+    ent = estore.create_entity([Loc(x=0, y=0), Pouch(items=[])])
+    tracker = ChangeTracker.of(estore, Loc, Pouch)
+    first, second = tracker.reader(), tracker.reader()
+    assert not first.read()
+
+    ent[Loc].y = 1
+    assert eids(first.read().entities()) == ["e1"]
+    assert not first.read()
+
+    ent[Pouch].items.append("gem")  # (unseen by the store)
+    mark_changed(estore, ent, Pouch)
+    changes = second.read()
+    assert eids(changes[Loc].changed.values()) == eids(changes[Pouch].changed.values()) == ["e1"]
+    assert eids(first.read()[Pouch].changed.values()) == ["e1"]
+
+    del first
+    assert len(tracker.readers) == 1  # (dropped readers stop collecting)
+    assert not tracker.current and not tracker.last  # (not kept by tick)
+
+
+def test_ChangeTracker_by_tick_is_opt_in():
+    estore = EntityStore()
+    tracker = ChangeTracker.of(estore, Vigor)
+    reader = tracker.reader()
+    for _ in range(3):
+        estore.destroy_entity(estore.create_entity([Vigor(points=1)]))
+    assert not tracker.current
+    assert len(reader.read()[Vigor].removed) == 3
+
+    assert ChangeTracker.of(estore, Vigor, by_tick=True) is tracker and tracker.by_tick
+    ent = estore.create_entity([Vigor(points=2)])
+    assert list(tracker.current[Vigor].added.values()) == [ent]
+    tracker.end_tick()
+    assert list(tracker.last[Vigor].added.values()) == [ent] and not tracker.current
+
+
+class Heal(System):
+    reads = (Vigor,)
+    writes = (Vigor,)
+
+    def update(self) -> None:
+        for ent in self.estore.query(Vigor):
+            ent[Vigor].points += 1
+
+
+def test_Scheduler_ends_ticks():
+    estore = EntityStore()
+    estore.create_entity([Vigor(points=1)])
+    tracker = ChangeTracker.of(estore, Vigor, by_tick=True)
+    Scheduler([Heal()]).run(estore, Input([]))
+    assert tracker.tick == 1
+    assert eids(tracker.last[Vigor].changed.values()) == ["e1"]
+    assert not tracker.current
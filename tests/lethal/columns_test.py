@@ -0,0 +1,129 @@
+# pylint: disable-all
+import numpy as np
+
+from lethal import Component, EntityStore, Loc, SpatialIndex
+from lethal.columns import ColumnStore
+
+
+class Area(Component):
+    zone_id: str
+
+
+class Vitals(Component):
+    max: int
+    current: int
+    poisoned: bool | None = False
+
+
+def make_an_entity_store(n=5):
+    estore = EntityStore()
+    for i in range(n):
+        ent = estore.create_entity()
+        ent.add(Area(zone_id="z1" if i % 2 == 0 else "z2"))
+        ent.add(Loc(x=i, y=i * 10))
+        ent.add(Vitals(max=10, current=10))
+    return estore
+
+
+def test_ColumnStore_per_entity_access():
+    estore = make_an_entity_store()
+    columns = ColumnStore.of(estore, Loc, Vitals)
+    assert ColumnStore.of(estore, Loc, Vitals) is columns
+
+    ent = estore["e3"]
+    loc = ent[Loc]
+    assert isinstance(loc, Loc)
+    assert (loc.x, loc.y) == (2, 20)
+    assert loc == Loc(eid="e3", x=2, y=20)
+    assert loc.to_pos().x == 2
+    assert loc.to_dict() == {"eid": "e3", "kind": "Loc", "x": 2, "y": 20}
+
+    loc.x = 7
+    loc.add(Loc(x=1, y=1))
+    assert columns[Loc].view("x")[columns[Loc].slot_of(loc)] == 8
+    assert ent[Loc] == Loc(eid="e3", x=8, y=21)
+    assert ent[Vitals].poisoned is False
+
+    copy = loc.clone()
+    assert type(copy) is Loc
+    copy.x = 100
+    assert loc.x == 8
+
+
+def test_ColumnStore_bulk_ops():
+    estore = make_an_entity_store()
+    locs = ColumnStore.of(estore, Loc, Vitals)[Loc]
+
+    # move everyone, clamped to the room
+    locs.assign("x", np.clip(locs.view("x") + 3, 0, 5))
+    assert [estore[f"e{i}"][Loc].x for i in range(1, 6)] == [3, 4, 5, 5, 5]
+
+
+def test_ColumnStore_bulk_ops_notify_listeners():
+    estore = make_an_entity_store()
+    spatial = SpatialIndex.of(estore, Area, "zone_id")
+    columns = ColumnStore.of(estore, Loc, Vitals)
+
+    # damage everyone in zone z1
+    vitals = columns[Vitals]
+    z1 = [e for e in estore.select(Area) if e[Area].zone_id == "z1"]
+    vitals.assign("current", vitals.view("current")[vitals.slots_of(z1)] - 3, vitals.slots_of(z1))
+    assert [estore[f"e{i}"][Vitals].current for i in range(1, 6)] == [7, 10, 7, 10, 7]
+
+    locs = columns[Loc]
+    changed = locs.assign("y", 0)
+    assert len(changed) == 4  # e1 was already at y=0
+    assert [e.eid for e in spatial.at("z1", 2, 0)] == ["e3"]
+
+
+def test_ColumnStore_release_and_recycle():
+    estore = make_an_entity_store(2)
+    locs = ColumnStore.of(estore, Loc)[Loc]
+    ent = estore["e1"]
+    loc = ent[Loc]
+    ent.remove(loc)
+    assert type(loc) is Loc
+    assert loc == Loc(x=0, y=0)
+    assert len(locs) == 1
+
+    ent.add(Loc(x=4, y=4))  # reuses the free slot
+    assert locs.size == 2
+    assert ent[Loc].x == 4
+
+    estore.destroy_entity(estore["e2"])
+    assert len(locs) == 1
+
+
+def test_ColumnStore_grows():
+    estore = make_an_entity_store(200)
+    locs = ColumnStore.of(estore, Loc)[Loc]
+    assert len(locs) == 200
+    assert estore["e200"][Loc].y == 1990
+
+
+def test_ColumnStore_assign_without_notify():
+    estore = make_an_entity_store()
+    spatial = SpatialIndex.of(estore, Area, "zone_id")
+    locs = ColumnStore.of(estore, Loc)[Loc]
+    changed = locs.assign("x", 9, notify=False)
+    assert len(changed) == 5
+    assert estore["e1"][Loc].x == 9
+    assert [e.eid for e in spatial.at("z1", 0, 0)] == ["e1"]  # the index wasn't told
+
+
+class Layered(Component):
+    layer: int | None = 0
+    order: int = 0
+
+
+def test_ColumnStore_leaves_optional_fields_in_the_Component():
+    estore = EntityStore()
+    columns = ColumnStore.of(estore, Layered)
+    assert set(columns[Layered].dtypes) == {"order"}
+
+    ent = estore.create_entity()
+    ent.add(Layered(layer=None, order=2))
+    assert ent[Layered].layer is None and ent[Layered].order == 2
+    ent[Layered].layer = 3
+    ent[Layered].layer = None
+    assert ent[Layered] == Layered(eid=ent.eid, layer=None, order=2)
@@ -0,0 +1,132 @@
+# pylint: disable-all
+import io
+
+from blessed import Terminal
+
+from lethal import Driver, FramebufferOutput, Input, Module, Output, Pos
+
+
+class Recorder(Module[list]):
+    def create(self) -> list:
+        return []
+
+    def update(self, state: list, user_input: Input, delta: float) -> list:
+        state.append((tuple(user_input.keys), delta))
+        return state
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_driver(**kwargs):
+    driver = Driver(Recorder(), **kwargs)
+    driver.output = Output(driver.term, io.StringIO())
+    driver.clock = FakeClock()
+    return driver
+
+
+def test_Driver_advance_fixed_steps():
+    driver = make_driver(tick_rate=10)
+    driver.pending_keys = ["KEY_LEFT", "KEY_UP"]
+    driver.lag = 0.25
+    assert driver.advance(0.1) == 2
+    assert driver.state == [(("KEY_LEFT", "KEY_UP"), 0.1), ((), 0.1)]
+    assert abs(driver.lag - 0.05) < 1e-9
+
+    assert driver.advance(0.1) == 0  # not due yet
+
+
+def test_Driver_advance_drops_lag_it_cannot_catch_up():
+    driver = make_driver(tick_rate=10, max_updates=3)
+    driver.lag = 1.05
+    assert driver.advance(0.1) == 3
+    assert abs(driver.timing.dropped - 0.7) < 1e-9
+    assert abs(driver.lag - 0.05) < 1e-9
+
+
+def test_Driver_fixed_loop():
+    driver = make_driver(tick_rate=10)
+    clock = driver.clock
+    waits = []
+    script = [[], ["KEY_RIGHT"], [], ["KEY_ESCAPE"]]
+
+    def read_keys(timeout):
+        waits.append(round(timeout, 9))
+        clock.now += 0.06  # each wait (or key) takes 60ms
+        return script.pop(0)
+
+    driver._read_keys = read_keys
+    driver._loop_fixed(0.1)
+    assert waits == [0.1, 0.04, 0.08, 0.02]
+    assert driver.state == [(("KEY_RIGHT",), 0.1)]  # once 0.1s had passed, at 0.12s
+    assert driver.output.stats.frames == 2  # the first, and after the update
+
+
+class Quiet(Recorder):
+    """Only has something new to show after a key"""
+
+    def needs_redraw(self, state: list) -> bool:
+        return bool(state and state[-1][0])
+
+
+def test_Driver_skips_idle_frames():
+    driver = make_driver(tick_rate=8, refresh_interval=2.0)
+    driver.module = Quiet()
+    clock = driver.clock
+    script = [[]] * 5 + [["KEY_LEFT"]] + [[]] * 5 + [["KEY_ESCAPE"]]
+
+    def read_keys(timeout):
+        clock.now += 0.125
+        return script.pop(0)
+
+    driver._read_keys = read_keys
+    driver._loop_fixed(0.125)
+    assert len(driver.state) == 11 and driver.state[5] == (("KEY_LEFT",), 0.125)
+    assert driver.output.stats.frames == 2  # the first, and after the key
+
+
+def test_Driver_refreshes_periodically_and_on_resize():
+    driver = make_driver(tick_rate=10, refresh_interval=1.0)
+    driver.module = Quiet()
+    driver.draw()
+    driver.update(Input([]), 0.1)
+    assert not driver.draw_due()
+
+    driver.clock.now = 0.5
+    driver.drawn_size = (1, 1)  # (as if the terminal had been resized since)
+    assert driver.draw_due() and driver.output.cleared
+    driver.draw()
+    assert not driver.draw_due()
+
+    driver.clock.now = 1.5
+    assert driver.draw_due() and driver.output.cleared
+
+
+class Still(Quiet):
+    def draw(self, state: list, output: Output):
+        output.retain = True
+        if output.cleared:
+            output.print_at(Pos(0, 0), "still")
+
+
+def test_Driver_periodic_refresh_repaints_every_cell():
+    term = Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO())
+    driver = make_driver(tick_rate=10, refresh_interval=1.0, term=term)
+    driver.module = Still()
+    driver.output = output = FramebufferOutput(driver.term, io.StringIO())
+    driver.draw()
+    driver.update(Input([]), 0.1)
+    driver.draw()
+    assert output.stats.frame_bytes == 0
+
+    driver.clock.now = 1.5
+    assert driver.draw_due()
+    driver.draw()
+    sent = output.stream.getvalue().split(output.term.home + output.term.clear)
+    assert len(sent) == 3 and sent[1] == sent[2]  # (everything, all over again)
+    assert "still" in sent[2]
@@ -1,5 +1,8 @@
 # pylint: disable-all
-from lethal.ecs import EntityStore, Entity, Component, NoComponentError, NoEntityError
+from lethal.ecs import EntityStore, EntityStoreListener, Entity, Component, NoComponentError, NoEntityError
+from lethal.ecs import DuplicateKeyError, NoMatchError, AttachedComponentError, StaleEntityError
+from lethal.ecs import handle_of, handle_slot, handle_generation
+from lethal.ecs import DuplicateKindError, UnknownKindError, CommandBuffer
 from typing import Any
 import pytest
 
@@ -23,7 +26,7 @@ class Obstr(Component):
     blocker: bool
 
 
-class Item(Component):
+class Prop(Component):
     name: str
 
 
@@ -91,11 +94,68 @@ def test_Component__find_class():
     assert Component.find_class("Component") == Component
     assert Component.find_class("Loc2") == Loc2
     assert Component.find_class("Loc3") == Loc3
-    assert Component.find_class("Item") == Item
+    assert Component.find_class("Prop") == Prop
 
     assert Component.find_class("loc") is None
 
 
+def test_Component_kinds_must_be_unique():
+    with pytest.raises(DuplicateKindError):
+
+        class Obstr(Component):  # another module's (or function's) Obstr
+            solid: bool
+
+    assert Component.find_class("Obstr").__module__ == __name__
+
+
+def test_Component_kind_aliases():
+    class Lantern(Component):
+        __kind_aliases__ = ("Lamp",)
+        lit: bool
+
+    assert Component.find_class("Lamp") is Lantern
+    lamp = Component.from_dict({"kind": "Lamp", "eid": "e1", "lit": True})
+    assert lamp == Lantern(eid="e1", lit=True)
+    assert lamp.to_dict()["kind"] == "Lantern"
+
+
+def test_Component_from_dict_unknown_kind():
+    with pytest.raises(UnknownKindError):
+        Component.from_dict({"kind": "Nope", "eid": None})
+
+
+def test_Component_is_slotted():
+    loc = Loc2(x=1, y=2)
+    assert not hasattr(loc, "__dict__")
+    assert Loc2.kind == "Loc2"
+    assert Loc3(x=1, y=2).kind == "Loc3"
+    with pytest.raises(TypeError):
+        Loc2(x=1)  # y is required
+    with pytest.raises(AttributeError):
+        loc.z = 3
+
+
+def test_Component_construction_does_not_validate_but_from_dict_does():
+    assert Loc2(x="1", y=2).x == "1"  # trusted: taken as-is
+    loc = Component.from_dict({"kind": "Loc2", "eid": None, "x": "1", "y": 2})
+    assert loc == Loc2(x=1, y=2)
+    with pytest.raises(ValueError):
+        Component.from_dict({"kind": "Loc2", "x": "one", "y": 2})
+
+    trusted = Component.from_dict({"kind": "Loc2", "eid": "e1", "x": "1", "y": 2}, trusted=True)
+    assert trusted.x == "1"
+    assert trusted.eid == "e1"
+
+
+def test_Component_pickles_detached():
+    import pickle
+
+    ent = Entity(eid="e1", components=[Loc2(x=1, y=2)])
+    loc = pickle.loads(pickle.dumps(ent[Loc2]))
+    assert type(loc) is Loc2
+    assert loc == Loc2(eid="e1", x=1, y=2)
+
+
 #
 # Entity
 #
@@ -137,7 +197,7 @@ def test_Entity_select():
     ent = make_an_entity()
     assert ent.select(Loc2) == [Loc2(eid="e42", x=1, y=2), Loc2(eid="e42", x=3, y=4)]
     assert ent.select(Obstr) == [Obstr(eid="e42", blocker=True)]
-    assert ent.select(Item) == []
+    assert ent.select(Prop) == []
 
 
 def test_Entity_get():
@@ -149,7 +209,7 @@ def test_Entity_get():
 def test_Entity_get_raises_on_miss():
     ent = Entity(eid="e1", components=[Loc2(x=1, y=2)])
     with pytest.raises(NoComponentError) as e_info:
-        ent[Item]
+        ent[Prop]
 
 
 def test_Entity_add():
@@ -178,6 +238,34 @@ def test_Entity_add_deep_copy():
     assert ann_copy.eid == "e6"
 
 
+def test_Entity_take():
+    ann = Annot(notes={"hello": "there"})
+    ent = Entity(eid="e6")
+
+    assert ent.take(ann) is ann
+    assert ent[Annot] is ann
+    assert ann.eid == "e6"
+
+    # Already owned, by this or another Entity:
+    with pytest.raises(AttachedComponentError):
+        ent.take(ann)
+    with pytest.raises(AttachedComponentError):
+        Entity(eid="e7").take(ann)
+
+    # ...until removed
+    ent.remove(ann)
+    assert Entity(eid="e7").take(ann).eid == "e7"
+
+
+def test_Entity_init_without_copy():
+    loc = Loc2(x=1, y=2)
+    ent = Entity(eid="e1", components=[loc], copy_components=False)
+    assert ent[Loc2] is loc
+    assert loc.eid == "e1"
+    with pytest.raises(AttachedComponentError):
+        Entity(eid="e2", components=[loc], copy_components=False)
+
+
 def test_Entity_remove():
     ent = make_an_entity()
     loc1 = ent[Loc2]
@@ -201,15 +289,40 @@ def test_Entity_remove():
 
 def test_Entity_contains():
     ent = make_an_entity()
-    assert ent.contains(Loc2(eid=ent.eid, x=1, y=2)) == True
+    assert ent.contains(ent[Loc2]) == True
+    assert ent.contains(ent[Obstr]) == True
+    # Membership is by identity: an equal-but-distinct component is not contained
+    assert ent.contains(Loc2(eid=ent.eid, x=1, y=2)) == False
     assert ent.contains(Loc2(eid=None, x=1, y=2)) == False
 
 
+def test_Entity_remove_by_identity():
+    ent = Entity(eid="e1", components=[Loc2(x=1, y=2), Loc2(x=1, y=2)])
+    first, second = ent.select(Loc2)
+    assert ent.remove(Loc2(eid="e1", x=1, y=2)) == None  # equal, but not a member
+    assert ent.remove(second) is second
+    assert ent.components == [Loc2(eid="e1", x=1, y=2)]
+    assert ent[Loc2] is first
+
+
+def test_Entity_get_matches_subclasses():
+    ent = Entity(eid="e1", components=[Obstr(blocker=False), Loc3(x=5, y=6)])
+    assert ent[Loc3] == Loc3(eid="e1", x=5, y=6)
+    assert ent[Loc2] is ent[Loc3]
+    assert ent.has_any(Loc2) == True
+    assert ent.has_all([Loc2, Obstr]) == True
+    assert ent.select(Component) == ent.components
+
+    ent.remove(ent[Loc2])
+    assert ent.has_any(Loc2) == False
+    assert ent.has_any(Loc3) == False
+
+
 def test_Entity_has_any():
     ent = make_an_entity()
     assert ent.has_any(Loc2) == True
     assert ent.has_any(Obstr) == True
-    assert ent.has_any(Item) == False
+    assert ent.has_any(Prop) == False
 
 
 def test_Entity_to_dict__from_dict():
@@ -278,12 +391,12 @@ def make_an_entity_store():
 
     e2 = estore.create_entity()
     e2.add(Loc2(x=2, y=2))
-    e2.add(Item(name="Money"))
+    e2.add(Prop(name="Money"))
 
     e3 = estore.create_entity()
     e3.add(Loc2(x=3, y=3))
     e3.add(Obstr(blocker=True))
-    e3.add(Item(name="Fountain"))
+    e3.add(Prop(name="Fountain"))
 
     return estore
 
@@ -292,7 +405,7 @@ def test_EntityStore_get():
     estore = make_an_entity_store()
     ent = estore["e2"]
     assert ent.eid == "e2"
-    assert ent[Item] == Item(eid="e2", name="Money")
+    assert ent[Prop] == Prop(eid="e2", name="Money")
 
 
 def test_EntityStore_destroy_entity():
@@ -307,10 +420,36 @@ def test_EntityStore_destroy_entity():
     assert len(estore.entities) == 2
 
 
+def test_EntityStore_recycles_slots():
+    estore = make_an_entity_store()
+    e2 = estore["e2"]
+    assert estore[e2.handle] is e2
+    assert handle_slot(e2.handle) == 2 and handle_generation(e2.handle) == 0
+
+    estore.destroy_entity(e2)
+    reborn = estore.create_entity()
+    assert handle_slot(reborn.handle) == 2 and handle_generation(reborn.handle) == 1
+    assert reborn.eid == "e2.1"
+    assert estore["e2.1"] is reborn
+    assert handle_of(reborn.eid) == reborn.handle
+
+    # The old id doesn't find the new tenant:
+    assert estore.is_stale("e2") and estore.is_stale(e2.handle)
+    assert estore.get("e2") is None
+    with pytest.raises(StaleEntityError):
+        estore["e2"]
+    with pytest.raises(NoEntityError):
+        estore[e2.handle]
+
+    assert estore.create_entity().eid == "e4"
+
+
 def test_EntityStore_get_NoEntityError():
     estore = make_an_entity_store()
     with pytest.raises(NoEntityError) as e_info:
         estore["nope"]
+    with pytest.raises(NoEntityError) as e_info:
+        estore["e99"]
 
 
 def test_EntityStore_select_when_empty():
@@ -321,17 +460,17 @@ def test_EntityStore_select_when_empty():
 
 def test_EntityStore_select_based_on_single_kind():
     estore = make_an_entity_store()
-    ents = estore.select(Item)
+    ents = estore.select(Prop)
     assert len(ents) == 2
-    assert ents[0][Item].name == "Money"
-    assert ents[1][Item].name == "Fountain"
+    assert ents[0][Prop].name == "Money"
+    assert ents[1][Prop].name == "Fountain"
 
 
 def test_EntityStore_select_based_on_multiple_kinds():
     estore = make_an_entity_store()
-    ents = estore.select(Obstr, Item)
+    ents = estore.select(Obstr, Prop)
     assert len(ents) == 1
-    assert ents[0][Item].name == "Fountain"
+    assert ents[0][Prop].name == "Fountain"
     assert ents[0][Obstr].blocker == True
 
 
@@ -341,10 +480,239 @@ def test_EntityStore_select__all():
     ents = estore.select()
     assert len(ents) == 3
     assert ents[0][Loc2].x == 1
-    assert ents[1][Item].name == "Money"
+    assert ents[1][Prop].name == "Money"
     assert ents[2][Obstr].blocker == True
 
 
+def test_EntityStore_select_is_a_one_off_scan_in_store_order():
+    estore = make_an_entity_store()
+    estore["e1"].add(Prop(name="Late"))
+    assert [ent.eid for ent in estore.select(Prop)] == ["e1", "e2", "e3"]
+    assert estore.queries == {} and estore.listeners == []
+
+
 # def test_EntityStore__serialize():
 #     estore = make_an_entity_store()
 #     x = estore.model_dump()
+
+
+def test_EntityStore_query_is_live():
+    estore = make_an_entity_store()
+    query = estore.query(Loc2, Prop)
+    assert [e.eid for e in query] == ["e2", "e3"]
+    assert estore.query(Prop, Loc2) is query  # same kinds, same view
+
+    e4 = estore.create_entity()
+    assert e4 not in query
+    e4.add(Prop(name="Gem"))
+    assert e4 not in query
+    e4.add(Loc3(x=4, y=4))  # subclasses count
+    assert [e.eid for e in query] == ["e2", "e3", "e4"]
+
+    estore["e2"].remove(estore["e2"][Prop])
+    assert [e.eid for e in query] == ["e3", "e4"]
+
+    estore.destroy_entity(estore["e3"])
+    assert [e.eid for e in query] == ["e4"]
+    assert len(query) == 1
+
+
+def test_EntityStore_query_keeps_matching_while_any_like_kind_remains():
+    estore = EntityStore()
+    ent = estore.create_entity()
+    ent.add(Loc2(x=1, y=1))
+    ent.add(Loc3(x=2, y=2))
+    query = estore.query(Loc2)
+    ent.remove(ent[Loc2])
+    assert ent in query
+    ent.remove(ent[Loc2])
+    assert ent not in query
+
+
+def test_EntityStore_query__all():
+    estore = make_an_entity_store()
+    query = estore.query()
+    assert len(query) == 3
+    estore.create_entity()
+    assert len(query) == 4
+
+
+def test_EntityStore_reports_component_changes():
+    class Recorder(EntityStoreListener):
+        kinds = (Loc2,)
+
+        def __init__(self):
+            self.changes = []
+
+        def component_changed(self, ent, comp, field, old):
+            self.changes.append((ent.eid, field, old, getattr(comp, field)))
+
+    estore = make_an_entity_store()
+    rec = estore.add_listener(Recorder())
+    estore["e1"][Loc2].x = 10
+    estore["e1"][Loc2].x = 10  # no change, no report
+    estore["e3"][Prop].name = "Well"  # not a kind of interest
+    assert rec.changes == [("e1", "x", 1, 10)]
+
+
+def test_EntityStore_field_index():
+    estore = make_an_entity_store()
+    names = estore.field_index(Prop, "name")
+    assert estore.field_index(Prop, "name") is names
+    assert [e.eid for e in names.find("Money")] == ["e2"]
+    assert names["Fountain"].eid == "e3"
+    assert names.get("Gem") is None
+    with pytest.raises(NoMatchError):
+        names["Gem"]
+
+    estore["e2"][Prop].name = "Fountain"
+    assert names.get("Money") is None
+    assert [e.eid for e in names.find("Fountain")] == ["e3", "e2"]  # in filing order
+
+    estore.destroy_entity(estore["e3"])
+    assert [e.eid for e in names.find("Fountain")] == ["e2"]
+    estore["e2"].remove(estore["e2"][Prop])
+    assert "Fountain" not in names
+
+
+def test_EntityStore_unique_field_index():
+    estore = make_an_entity_store()
+    names = estore.field_index(Prop, "name", unique=True)
+    e4 = estore.create_entity()
+    with pytest.raises(DuplicateKeyError):
+        e4.add(Prop(name="Money"))
+    assert names["Money"].eid == "e2"
+
+
+def test_EntityStore_create_entity_with_components():
+    class Recorder(EntityStoreListener):
+        kinds = (Component,)
+
+        def __init__(self):
+            self.events = []
+
+        def entity_created(self, ent):
+            self.events.append(("created", ent.eid, len(ent.components)))
+
+        def component_added(self, ent, comp):
+            self.events.append(("added", ent.eid, comp.kind))
+
+    estore = EntityStore()
+    rec = estore.add_listener(Recorder())
+    loc = Loc2(x=1, y=2)
+    ent = estore.create_entity([loc, Prop(name="Gem")])
+    assert ent[Loc2] is loc and loc.eid == "e1"
+    assert rec.events == [("created", "e1", 2)]  # heard of once
+    assert [e.eid for e in estore.query(Loc2, Prop)] == ["e1"]
+    with pytest.raises(AttachedComponentError):
+        estore.create_entity([loc])
+
+
+def test_CommandBuffer():
+    estore = make_an_entity_store()
+    query = estore.query(Prop)
+    cmds = CommandBuffer()
+    for ent in query:  # (a live view: changing its membership now would upset the loop)
+        cmds.destroy(ent)
+        cmds.take(ent, Obstr(blocker=False))  # dropped: ent is doomed
+    cmds.create(Prop(name="Gem"), Loc2(x=5, y=5))
+    cmds.add(estore["e1"], Prop(name="Key"))
+    cmds.remove(estore["e1"], estore["e1"][Loc2])
+    cmds.destroy(estore["e2"])  # again
+    assert len(cmds) == 8
+    assert [e.eid for e in query] == ["e2", "e3"]
+
+    cmds.apply(estore)
+    assert len(cmds) == 0
+    assert sorted(e.eid for e in query) == ["e1", "e3.1"]
+    assert estore["e3.1"][Loc2].x == 5
+    assert estore["e1"].components == [Prop(eid="e1", name="Key")]
+    assert estore.is_stale("e2") and estore.is_stale("e3")
+
+
+def test_CommandBuffer_keeps_what_follows_a_failed_change():
+    estore = make_an_entity_store()
+    names = estore.field_index(Prop, "name", unique=True)
+    cmds = CommandBuffer()
+    cmds.create(Prop(name="c"))
+    cmds.create(Prop(name="Money"))  # taken
+    cmds.create(Prop(name="d"))
+    with pytest.raises(DuplicateKeyError):
+        cmds.apply(estore)
+    assert "c" in names and "d" not in names
+    assert len(cmds) == 1
+
+    cmds.apply(estore)
+    assert names["d"][Prop].name == "d"
+    assert len(cmds) == 0
+
+
+def test_FieldIndex_unique_refusal_changes_nothing():
+    estore = make_an_entity_store()
+    names = estore.field_index(Prop, "name", unique=True)
+    props = estore.query(Prop)
+    heard = []
+
+    class Recorder(EntityStoreListener):
+        kinds = (Prop,)
+
+        def component_added(self, ent, comp):
+            heard.append(("added", ent.eid))
+
+        def component_removed(self, ent, comp):
+            heard.append(("removed", ent.eid))
+
+        def component_changed(self, ent, comp, field, old):
+            heard.append(("changed", ent.eid))
+
+    estore.add_listener(Recorder())
+    e1, e3 = estore["e1"], estore["e3"]
+
+    def consistent():
+        for ent in estore.entities.values():
+            assert (ent in props) == ent.has_any(Prop)
+            if ent.has_any(Prop):
+                assert names[ent[Prop].name] is ent
+        assert len(names.values) == len(props)
+
+    # take
+    money = Prop(name="Money")
+    with pytest.raises(DuplicateKeyError):
+        e1.take(money)
+    assert not e1.has_any(Prop) and money.eid is None
+    consistent()
+
+    # field assignment
+    with pytest.raises(DuplicateKeyError):
+        e3[Prop].name = "Money"
+    assert e3[Prop].name == "Fountain"
+    consistent()
+
+    # create_entity
+    count = len(estore.entities)
+    with pytest.raises(DuplicateKeyError, match="a new Entity"):
+        estore.create_entity([Loc2(x=0, y=0), Prop(name="Fountain")])
+    assert len(estore.entities) == count
+    consistent()
+
+    # remove, promoting a second Prop
+    e3.take(Prop(name="Money"))  # (second: not filed)
+    with pytest.raises(DuplicateKeyError):
+        e3.remove(e3[Prop])
+    assert e3[Prop].name == "Fountain"
+    consistent()
+
+    assert heard == [("added", "e3")]
+    e1.take(Prop(name="Gem"))
+    e3[Prop].name = "Gems"
+    consistent()
+    assert names["Gems"] is e3
+
+
+def test_unique_FieldIndex_over_duplicates_is_not_added():
+    estore = make_an_entity_store()
+    estore["e1"].add(Prop(name="Money"))
+    with pytest.raises(DuplicateKeyError):
+        estore.field_index(Prop, "name", unique=True)
+    assert estore.unique_indexes == [] and estore.indexes == {}
+    assert estore.field_index(Prop, "name").find("Money") != []
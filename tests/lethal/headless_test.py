@@ -0,0 +1,51 @@
+# pylint: disable-all
+import pytest
+
+from lethal import Driver, HeadlessDriver, Input, Module, Output, Pos, Recording
+from lethal.recording import RecordingError
+
+
+class Keys(Module[list]):
+    def create(self) -> list:
+        return []
+
+    def update(self, state: list, user_input: Input, delta: float) -> list:
+        state.extend(user_input.keys)
+        return state
+
+    def draw(self, state: list, output: Output):
+        output.print_at(Pos(0, 0), "".join(state))
+
+
+def record(path, keys):
+    driver = Driver(Keys(), record=str(path), tick_rate=10)
+    for key in keys:
+        driver.update(Input([key] if key else []), 0.1)
+    driver.recorder.close()
+
+
+def test_Driver_records_inputs(tmp_path):
+    record(tmp_path / "rec", ["a", "", "b"])
+    rec = Recording.load(str(tmp_path / "rec"))
+    assert rec.header["module"] == "headless_test.Keys" and rec.header["tick_rate"] == 10
+    assert [(r.keys, r.delta) for r in rec.inputs] == [(["a"], 0.1), ([], 0.1), (["b"], 0.1)]
+    assert rec.inputs[0].t <= rec.inputs[1].t <= rec.inputs[2].t
+
+
+def test_HeadlessDriver_replays(tmp_path):
+    record(tmp_path / "rec", ["a", "", "b", "c"])
+    driver = HeadlessDriver(Keys(), str(tmp_path / "rec"))
+    report = driver.run()
+    assert driver.state == ["a", "b", "c"]
+    assert (report.ticks, report.frames) == (4, 5)  # (a first frame, then one per tick)
+    assert report.ticks_per_second > 0 and report.bytes_out > 0
+    assert "4 ticks, 5 frames" in str(report)
+
+    quiet = HeadlessDriver(Keys(), str(tmp_path / "rec"), draw=False)
+    assert quiet.run().frames == 0 and quiet.state == driver.state
+
+
+def test_Recording_rejects_other_files(tmp_path):
+    (tmp_path / "x").write_text('{"hello": 1}\n')
+    with pytest.raises(RecordingError):
+        Recording.load(str(tmp_path / "x"))
@@ -0,0 +1,64 @@
+# pylint: disable-all
+import io
+
+from blessed import Terminal
+
+from lethal import FramebufferOutput, Pos
+from lethal.layers import Compositor, Layer
+
+
+def make_output():
+    output = FramebufferOutput(Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO()), io.StringIO())
+    output.retain = True
+    return output
+
+
+def compose(compositor, output):
+    output.stream = io.StringIO()
+    output.begin_frame()
+    drawn = compositor.compose(output)
+    output.end_frame()
+    return drawn
+
+
+def test_Compositor_stacks_layers():
+    output = make_output()
+    compositor = Compositor()
+    sprites = compositor.add(Layer(1, 0, 4, 2, z=1))
+    board = compositor.add(Layer(0, 0, 6, 2))
+    board.put(0, 0, "......\n......")
+    sprites.put(1, 1, "@", output.term.red)
+
+    compose(compositor, output)
+    assert output.front.text().splitlines()[:2] == ["......" + " " * 74, "..@..." + " " * 74]
+    assert output.front.styles[1][2] == output.term.red
+
+    # Moving the sprite uncovers the board beneath it, and sends just the two cells
+    sprites.erase(1, 1)
+    sprites.put(2, 1, "@", output.term.red)
+    assert compose(compositor, output) == 2
+    assert output.front.text().splitlines()[1] == "...@.." + " " * 74
+    assert output.front.styles[1][2] == ""
+
+
+def test_Compositor_draws_only_touched_cells():
+    output = make_output()
+    compositor = Compositor()
+    layer = compositor.add(Layer(0, 0, 10, 3))
+    layer.put(0, 0, "hello")
+    assert compose(compositor, output) == 30  # the first frame starts cleared: everything is drawn
+
+    assert compose(compositor, output) == 0
+    assert output.stats.frame_bytes == 0
+
+    layer.put(4, 2, "x")
+    assert compose(compositor, output) == 1
+    assert output.stream.getvalue() == output.term.move_xy(4, 2) + "x"
+    assert output.front.text().splitlines()[0].startswith("hello")
+
+    # A repaint comes from what the output retained: nothing needs drawing again
+    output.redraw()
+    assert compose(compositor, output) == 0
+    sent = output.stream.getvalue()
+    assert sent.startswith(output.term.home + output.term.clear) and "hello" in sent
+    assert output.front.text().splitlines()[:3] == ["hello" + " " * 75, " " * 80, "    x" + " " * 75]
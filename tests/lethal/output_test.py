@@ -0,0 +1,135 @@
+# pylint: disable-all
+import io
+
+from blessed import Terminal
+
+from lethal import BufferedOutput, FramebufferOutput, Output, Pos
+from lethal.output import TermCodes
+from lethal.framebuffer import FrameBuffer
+
+
+def make_term():
+    return Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO())
+
+
+def test_FrameBuffer_put():
+    fb = FrameBuffer(6, 3)
+    fb.put(1, 0, "ab\ncd")
+    fb.put(4, 2, "xyz")  # clipped
+    fb.put(-1, 1, "!?")
+    assert fb.text() == " ab   \n?cd   \n    xy"
+
+
+def test_FrameBuffer_put_styles():
+    term = make_term()
+    fb = FrameBuffer(6, 1)
+    fb.put(0, 0, "a" + term.blue + "bc" + term.normal + "d", reset=term.normal)
+    assert fb.text() == "abcd  "
+    assert fb.styles[0][:4] == ["", term.blue, term.blue, ""]
+
+
+def test_FrameBuffer_diff():
+    before = FrameBuffer(20, 2)
+    after = FrameBuffer(20, 2)
+    after.put(0, 0, "a")
+    after.put(3, 0, "b")
+    after.put(15, 0, "c")
+    after.put(0, 1, "d")
+    assert [(x, y, "".join(chars)) for x, y, chars, _ in after.diff(before)] == [
+        (0, 0, "a"),
+        (3, 0, "b"),
+        (15, 0, "c"),
+        (0, 1, "d"),
+    ]
+    assert [(x, y, "".join(chars)) for x, y, chars, _ in after.diff(before, bridge=2)] == [
+        (0, 0, "a  b"),
+        (15, 0, "c"),
+        (0, 1, "d"),
+    ]
+
+
+def draw_frame(output, player_x):
+    output.begin_frame()
+    output.print_at(Pos(0, 0), "+------+\n|      |\n+------+")
+    with output.offset(Pos(1, 1)):
+        output.print_at(Pos(player_x, 0), "@")
+    output.print_at(Pos(0, 4), output.term.darkgray + "hello" + output.term.normal)
+    output.end_frame()
+
+
+def test_FramebufferOutput_sends_only_changes():
+    term = make_term()
+    output = FramebufferOutput(term, io.StringIO())
+
+    draw_frame(output, 2)
+    assert output.front.text().splitlines()[:5] == [
+        "+------+" + " " * 72,
+        "|  @   |" + " " * 72,
+        "+------+" + " " * 72,
+        " " * 80,
+        "hello" + " " * 75,
+    ]
+    first = output.stats.frame_bytes
+    assert output.stream.getvalue().startswith(term.home + term.clear)
+    assert term.darkgray + "hello" + term.normal in output.stream.getvalue()
+
+    output.stream = io.StringIO()
+    draw_frame(output, 2)
+    assert output.stats.frame_bytes == 0
+    assert output.stream.getvalue() == ""
+
+    draw_frame(output, 3)
+    assert output.stream.getvalue() == term.move_xy(3, 1) + " @"
+    assert output.stats.frame_bytes == len(term.move_xy(3, 1)) + 2
+    assert output.stats.frames == 3
+    assert output.stats.total_bytes == first + output.stats.frame_bytes
+
+
+def test_FramebufferOutput_print_continues():
+    output = FramebufferOutput(make_term(), io.StringIO())
+    output.begin_frame()
+    output.print_at(Pos(2, 1), "ab\ncd")
+    output.print("e")
+    output.end_frame()
+    assert output.front.text().splitlines()[1:3] == ["  ab" + " " * 76, "  cde" + " " * 75]
+
+
+def test_Output_counts_bytes():
+    term = make_term()
+    output = Output(term, io.StringIO())
+    output.begin_frame()
+    output.print_at(Pos(1, 1), "hi")
+    output.end_frame()
+    assert output.stream.getvalue() == term.home + term.clear + term.move_xy(1, 1) + "hi\n"
+    assert output.stats.frame_bytes == len(output.stream.getvalue())
+
+
+def test_BufferedOutput_writes_once_per_frame(tmp_path):
+    term = make_term()
+    with open(tmp_path / "out", "w") as stream:  # a real file: writes are syscalls
+        output = BufferedOutput(term, stream)
+        output.begin_frame()
+        output.print_at(Pos(1, 1), "hi")
+        output.print_at(Pos(1, 2), "there")
+        output.end_frame()
+        assert output.stats.frame_writes == 1
+
+        immediate = Output(term, stream)
+        immediate.begin_frame()
+        immediate.print_at(Pos(1, 1), "hi")
+        immediate.print_at(Pos(1, 2), "there")
+        immediate.end_frame()
+        assert immediate.stats.frame_writes == 3
+        assert immediate.stats.frame_bytes == output.stats.frame_bytes
+
+    sent = (tmp_path / "out").read_text()
+    assert sent == 2 * (term.home + term.clear + term.move_xy(1, 1) + "hi\n" + term.move_xy(1, 2) + "there\n")
+
+
+def test_TermCodes_are_shared_and_memoized():
+    term = make_term()
+    codes = TermCodes.of(term)
+    assert Output(term).codes is codes
+    assert codes.move(3, 4) == term.move_xy(3, 4)
+    assert codes.move(3, 4) is codes.move(3, 4)
+    assert codes.style("darkgray") == term.darkgray
@@ -0,0 +1,97 @@
+# pylint: disable-all
+import io
+import json
+
+import pytest
+from blessed import Terminal
+
+from lethal import Driver, FramebufferOutput, Input, Module, Output, Pos, PROFILER, Profiler, Scheduler, System
+from lethal.profiling import NO_SPAN
+
+
+@pytest.fixture(autouse=True)
+def profiler():
+    PROFILER.reset()
+    yield PROFILER
+    PROFILER.enabled = False
+    PROFILER.reset()
+
+
+def test_Profiler_disabled_records_nothing():
+    profiler = Profiler()
+    assert profiler.span("x") is NO_SPAN
+    with profiler.span("x"):
+        pass
+    assert profiler.spans == {}
+
+
+def test_Profiler_percentiles_of_recent_samples():
+    profiler = Profiler(enabled=True, window=100)
+    stats = profiler.span("x").stats
+    for ms in range(1, 201):
+        stats.add(ms / 1000)
+    assert stats.count == 200 and stats.worst == 0.2
+    assert stats.p50 == 0.15 and stats.p99 == 0.199  # (of the last 100: 101ms..200ms)
+    with profiler.span("y"):
+        pass
+    assert list(profiler.spans) == ["x", "y"] and profiler.spans["y"].count == 1
+
+
+def test_Profiler_dump(tmp_path):
+    profiler = Profiler(enabled=True)
+    profiler.span("x").stats.add(0.5)
+    profiler.dump(str(tmp_path / "prof.json"))
+    (span,) = json.loads((tmp_path / "prof.json").read_text())["spans"]
+    assert span == {"name": "x", "count": 1, "total": 0.5, "mean": 0.5, "p50": 0.5, "p99": 0.5, "max": 0.5}
+
+
+class Idle(System):
+    pass
+
+
+def test_Scheduler_times_each_system(profiler):
+    from lethal import EntityStore
+
+    scheduler = Scheduler([Idle()])
+    scheduler.run(EntityStore(), Input([]))
+    assert profiler.spans == {}
+    profiler.enabled = True
+    scheduler.run(EntityStore(), Input([]))
+    assert profiler.spans["system.Idle"].count == 1
+
+
+class Banner(Module[list]):
+    def create(self) -> list:
+        return []
+
+    def update(self, state: list, user_input: Input, delta: float) -> list:
+        state.extend(user_input.keys)
+        return state
+
+    def draw(self, state: list, output: Output):
+        output.print_at(Pos(0, 0), "game")
+
+
+def test_Driver_profile_key_toggles_overlay(profiler, tmp_path):
+    term = Terminal(kind="xterm-256color", force_styling=True, stream=io.StringIO())
+    driver = Driver(Banner(), term=term, profile=str(tmp_path / "prof.json"))
+    driver.output = output = FramebufferOutput(term, io.StringIO())
+    screens = []
+    keys = ["a", "KEY_F12", "b", "KEY_F12", "KEY_ESCAPE"]
+
+    def next_key(timeout=None):
+        screens.append(output.front.text())
+        return keys.pop(0)
+
+    driver._next_key_str = next_key
+    driver._loop_per_key()
+    driver.finish()
+
+    assert driver.state == ["a", "b"]  # (F12 isn't passed on)
+    title = screens[2].splitlines()[0]
+    assert title.startswith("game") and title.rstrip().endswith("p99 ms")
+    assert "module.update" in screens[3]
+    assert screens[4].splitlines()[0].rstrip() == "game" and "module" not in screens[4]
+    assert not profiler.enabled  # (collecting, for the file, until the Driver finished)
+    names = [span["name"] for span in json.loads((tmp_path / "prof.json").read_text())["spans"]]
+    assert {"module.update", "module.draw", "output.flush"} <= set(names)
@@ -0,0 +1,180 @@
+# pylint: disable-all
+import time
+
+import pytest
+
+from lethal import Component, EntityStore, EntityStoreListener, Input, Scheduler, SideEffect, System
+from lethal.scheduler import ScheduleError
+
+
+class Speed(Component):
+    value: int = 0
+
+
+class Pace(Component):
+    value: int = 0
+
+
+class Score(Component):
+    value: int = 0
+
+
+class Note(SideEffect):
+    text: str
+
+
+class Recording(System):
+    def update(self) -> None:
+        self.add_side_effect(Note(text=type(self).__name__))
+
+
+class Steer(Recording):
+    writes = (Speed,)
+
+
+class Walk(Recording):
+    reads = (Speed,)
+    writes = (Pace,)
+
+
+class Count(Recording):
+    reads = (Pace,)
+    writes = (Score,)
+
+
+class Weather(Recording):
+    writes = (Score,)
+
+
+class Idle(Recording):
+    pass
+
+
+def names(stages):
+    return [[type(s).__name__ for s in stage] for stage in stages]
+
+
+def test_Scheduler_orders_writers_before_readers():
+    sched = Scheduler([Count(), Walk(), Idle(), Steer()])
+    assert names(sched.stages) == [["Idle", "Steer"], ["Walk"], ["Count"]]
+    assert [n.text for n in sched.run(EntityStore(), Input([]))] == ["Idle", "Steer", "Walk", "Count"]
+
+
+def test_Scheduler_keeps_registration_order_for_shared_writes():
+    assert names(Scheduler([Weather(), Steer(), Count()]).stages) == [["Weather", "Steer"], ["Count"]]
+    assert names(Scheduler([Count(), Weather()]).stages) == [["Count"], ["Weather"]]
+
+
+def test_Scheduler_cycles():
+    class Ping(Recording):
+        reads = (Speed,)
+        writes = (Pace,)
+
+    class Pong(Recording):
+        reads = (Pace,)
+        writes = (Score,)
+
+    class Pang(Recording):
+        reads = (Score,)
+        writes = (Speed,)
+
+    with pytest.raises(ScheduleError):
+        Scheduler([Ping(), Pong(), Pang()])
+
+
+def test_Scheduler_threads():
+    class Bump(System):
+        writes = (Speed,)
+
+        def update(self) -> None:
+            for ent in self.estore.select(Speed):
+                ent[Speed].value += 1
+
+    class Tally(System):
+        reads = (Speed,)
+
+        def update(self) -> None:
+            self.add_side_effect(Note(text=str(sum(e[Speed].value for e in self.estore.select(Speed)))))
+
+    estore = EntityStore()
+    for _ in range(3):
+        estore.create_entity().take(Speed())
+    sched = Scheduler([Tally(), Bump(), Idle(), Walk()], threads=2)
+    try:
+        assert names(sched.stages) == [["Bump", "Idle"], ["Tally", "Walk"]]
+        assert [n.text for n in sched.run(estore, Input([]))] == ["Idle", "3", "Walk"]
+    finally:
+        sched.close()
+
+
+def test_Scheduler_threads_take_turns_at_listeners():
+    class Counter(EntityStoreListener):
+        kinds = (Speed, Pace)
+
+        def __init__(self):
+            self.count = 0
+
+        def component_changed(self, ent, comp, field, old):
+            count = self.count
+            time.sleep(0)  # (let another thread in, if it can)
+            self.count = count + 1
+
+    class Faster(System):
+        writes = (Speed,)
+
+        def update(self) -> None:
+            for _ in range(200):
+                self.estore.select(Speed)[0][Speed].value += 1
+
+    class Steadier(System):
+        writes = (Pace,)
+
+        def update(self) -> None:
+            for _ in range(200):
+                self.estore.select(Pace)[0][Pace].value += 1
+
+    estore = EntityStore()
+    estore.create_entity([Speed()])
+    estore.create_entity([Pace()])
+    counter = Counter()
+    estore.add_listener(counter)
+    sched = Scheduler([Faster(), Steadier()], threads=2)
+    try:
+        assert names(sched.stages) == [["Faster", "Steadier"]]
+        sched.run(estore, Input([]))
+        assert counter.count == 400
+        assert estore.dispatch_lock is None
+    finally:
+        sched.close()
+
+
+def test_Scheduler_applies_commands_between_stages():
+    class Spawn(System):
+        writes = (Speed,)
+
+        def update(self) -> None:
+            self.commands.create(Speed(value=1))
+            self.add_side_effect(Note(text=str(len(self.estore.select(Speed)))))
+
+    class Look(System):
+        reads = (Speed,)
+
+        def update(self) -> None:
+            self.add_side_effect(Note(text=str(len(self.estore.select(Speed)))))
+
+    estore = EntityStore()
+    sched = Scheduler([Spawn(), Look()])
+    assert [n.text for n in sched.run(estore, Input([]))] == ["0", "1"]
+    assert [n.text for n in sched.run(estore, Input([]))] == ["1", "2"]
+
+
+def test_System_run_standalone_applies_its_commands():
+    class Cull(System):
+        def update(self) -> None:
+            for ent in self.estore.select(Speed):
+                self.commands.destroy(ent)
+
+    estore = EntityStore()
+    estore.create_entity().take(Speed())
+    Cull().run_standalone(estore, Input([]))
+    assert estore.select(Speed) == []
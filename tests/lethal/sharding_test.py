@@ -0,0 +1,72 @@
+# pylint: disable-all
+from lethal import Component, EntityStore, Input, Scheduler, SideEffect, System
+from lethal.sharding import Shard, ShardedSimulation
+
+
+class Region(Component):
+    name: str
+
+
+class Walker(Component):
+    steps: int = 0
+    route: list[str]
+
+
+class Arrived(SideEffect):
+    name: str
+    zone: str
+
+
+class WalkSystem(System):
+    """Each Walker takes a step along its route, into the next zone, each tick"""
+
+    reads = (Walker,)
+    writes = (Region, Walker)
+
+    def update(self) -> None:
+        for ent in self.estore.select(Walker, Region):
+            walker = ent[Walker]
+            if walker.steps < len(walker.route):
+                ent[Region].name = walker.route[walker.steps]
+                walker.steps += 1
+                self.add_side_effect(Arrived(name=ent.eid, zone=ent[Region].name))
+
+
+def setup(estore: EntityStore) -> Scheduler:
+    return Scheduler([WalkSystem()])
+
+
+def make_world():
+    estore = EntityStore()
+    estore.create_entity([Region(name="a"), Walker(route=["b", "c", "a"])])
+    estore.create_entity([Region(name="b"), Walker(route=[])])
+    estore.create_entity([Region(name="c"), Walker(route=[])])
+    estore.create_entity([Walker(route=[])])  # zoneless
+    return estore
+
+
+def test_Shard_releases_entities_leaving_its_zones():
+    shard = Shard(setup, Region, "name", {"a"})
+    shard.admit([[Region(name="a"), Walker(route=["b"])], [Region(name="a"), Walker(route=[])]])
+    effects, departures, stats = shard.tick(Input([]), [])
+    assert [e.zone for e in effects] == ["b"]
+    assert len(departures) == 1 and departures[0][0] == Region(name="b")
+    assert departures[0][0]._entity is None  # detached, ready to move
+    assert (stats.entities, stats.departed) == (1, 1)
+
+
+def test_ShardedSimulation_moves_entities_between_workers():
+    with ShardedSimulation(make_world(), setup, Region, "name", workers=3) as sim:
+        assert sorted(sim.owners.values()) == [0, 1, 2]
+        walker_starts = sim.owners["a"]
+        routes = []
+        for _ in range(4):
+            routes.extend(e.zone for e in sim.tick(Input([])))
+        assert routes == ["b", "c", "a"]  # one step per tick, whichever worker the walker is with
+
+        world = sim.gather()
+        assert len(world.entities) == 4
+        walker = next(e for e in world.select(Walker) if e[Walker].route)
+        assert walker[Region].name == "a" and walker[Walker].steps == 3
+        assert sim.owners["a"] == walker_starts
+        assert sum(s.entities for s in sim.stats) == 4
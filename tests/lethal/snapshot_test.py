@@ -0,0 +1,114 @@
+# pylint: disable-all
+import io
+from typing import Any
+
+import pytest
+from pydantic import Field
+
+from lethal import Component, EntityStore, Loc
+from lethal.snapshot import MAGIC, PREAMBLE, Snapshot, SnapshotError, save_snapshot
+
+
+class Crate(Component):
+    label: str
+    weight: float
+    sealed: bool
+    shelf: int | None = Field(default=None)
+    notes: dict[str, Any] = Field(default_factory=dict)
+
+
+class Marker(Component):
+    ...
+
+
+def make_an_entity_store():
+    estore = EntityStore()
+    for i in range(4):
+        ent = estore.create_entity()
+        ent.take(Crate(label=f"c{i}", weight=i * 1.5, sealed=i % 2 == 0, shelf=None if i == 3 else i))
+        ent.take(Loc(x=i, y=10 + i))
+    estore["e2"].take(Marker())
+    estore["e2"].take(Loc(x=99, y=99))  # a second Loc
+    estore["e3"][Crate].notes["big"] = 2**70
+    estore.destroy_entity(estore["e1"])
+    estore.create_entity().take(Marker())  # recycles e1's slot
+    return estore
+
+
+def roundtrip(estore, compress=False):
+    out = io.BytesIO()
+    save_snapshot(estore, out, compress=compress)
+    return Snapshot.from_bytes(out.getvalue())
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_Snapshot_restore(compress):
+    estore = make_an_entity_store()
+    restored = roundtrip(estore, compress).restore()
+
+    assert [e.eid for e in restored.entities.values()] == ["e2", "e3", "e4", "e1.1"]
+    assert list(restored.entities.values()) == list(estore.entities.values())
+    assert restored["e2"].components == estore["e2"].components  # same order
+    assert type(restored["e3"][Crate].sealed) is bool
+    assert restored["e4"][Crate].shelf is None
+
+    # Same handles, same allocation state:
+    assert restored.generations == estore.generations
+    assert restored.create_entity().eid == estore.create_entity().eid
+
+    # A live store: changes are reported
+    names = restored.field_index(Crate, "label", unique=True)
+    restored["e2"][Crate].label = "renamed"
+    assert names["renamed"].eid == "e2"
+
+
+def test_Snapshot_is_lazy():
+    snap = roundtrip(make_an_entity_store())
+    assert len(snap) == 4
+    assert snap.rows(Loc) == 4
+    assert list(snap.column(Loc, "x")) == [1, 99, 2, 3]
+    assert snap.column(Crate, "label") == ["c1", "c2", "c3"]
+    crate = Crate(eid="e3", label="c2", weight=3.0, sealed=True, shelf=2, notes={"big": 2**70})
+    assert snap.component(Crate, 1) == crate
+    assert snap.entity("e2") == make_an_entity_store()["e2"]
+    with pytest.raises(KeyError):
+        snap.entity("e1")
+
+
+def test_Snapshot_file(tmp_path):
+    estore = make_an_entity_store()
+    path = str(tmp_path / "world.snap")
+    estore.save(path, compress=True)
+    assert list(EntityStore.load(path).entities.values()) == list(estore.entities.values())
+    with Snapshot.open(path) as snap:
+        assert sum(snap.column(Loc, "y")) == 11 + 99 + 12 + 13
+
+
+def test_Snapshot_rejects_other_data():
+    with pytest.raises(SnapshotError):
+        Snapshot.from_bytes(b"NOTASNAP" + bytes(8))
+
+
+def test_Snapshot_stores_other_values_as_validated_json():
+    estore = make_an_entity_store()
+    snap = roundtrip(estore)
+    (crates,) = [entry for entry in snap.directory["kinds"] if entry["kind"] == "Crate"]
+    assert {name: column["type"] for name, column in crates["columns"].items() if not name.startswith("_")} == {
+        "label": "json",
+        "weight": "d",
+        "sealed": "?",
+        "shelf": "json",
+        "notes": "json",
+    }
+    assert snap.column(Crate, "shelf") == [1, 2, None]
+
+    estore["e2"][Crate].label = 5  # (not a str: Components don't validate as they're built)
+    with pytest.warns(UserWarning, match="Expected `str`"):
+        snap = roundtrip(estore)
+    with pytest.raises(SnapshotError, match="Crate.label"):
+        snap.restore()
+
+
+def test_Snapshot_rejects_other_versions():
+    with pytest.raises(SnapshotError, match="version 1"):
+        Snapshot.from_bytes(PREAMBLE.pack(MAGIC, 1, 0))
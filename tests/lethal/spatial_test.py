@@ -0,0 +1,80 @@
+# pylint: disable-all
+from lethal import Component, EntityStore, Loc, SpatialIndex
+
+
+class Zone(Component):
+    zone_id: str
+
+
+def make_an_entity_store():
+    estore = EntityStore()
+    for i, (zone_id, x, y) in enumerate([("z1", 1, 1), ("z1", 2, 1), ("z1", 1, 1), ("z2", 1, 1)]):
+        ent = estore.create_entity()
+        ent.add(Zone(zone_id=zone_id))
+        ent.add(Loc(x=x, y=y))
+    return estore
+
+
+def eids(ents):
+    return sorted(e.eid for e in ents)
+
+
+def test_SpatialIndex_at():
+    estore = make_an_entity_store()
+    spatial = SpatialIndex.of(estore, Zone, "zone_id")
+    assert eids(spatial.at("z1", 1, 1)) == ["e1", "e3"]
+    assert eids(spatial.at("z2", 1, 1)) == ["e4"]
+    assert spatial.at("z2", 2, 1) == []
+    assert SpatialIndex.of(estore, Zone, "zone_id") is spatial
+
+
+def test_SpatialIndex_follows_field_assignment():
+    estore = make_an_entity_store()
+    spatial = SpatialIndex.of(estore, Zone, "zone_id")
+    e1 = estore["e1"]
+    e1[Loc].x = 5
+    assert eids(spatial.at("z1", 1, 1)) == ["e3"]
+    assert eids(spatial.at("z1", 5, 1)) == ["e1"]
+
+    e1[Loc].add(Loc(x=1, y=1))
+    assert eids(spatial.at("z1", 6, 2)) == ["e1"]
+
+    e1[Zone].zone_id = "z2"
+    assert spatial.at("z1", 6, 2) == []
+    assert eids(spatial.at("z2", 6, 2)) == ["e1"]
+
+
+def test_SpatialIndex_follows_structural_changes():
+    estore = make_an_entity_store()
+    spatial = SpatialIndex.of(estore, Zone, "zone_id")
+    e3 = estore["e3"]
+    e3.remove(e3[Loc])
+    assert eids(spatial.at("z1", 1, 1)) == ["e1"]
+    e3.add(Loc(x=2, y=1))
+    assert eids(spatial.at("z1", 2, 1)) == ["e2", "e3"]
+    estore.destroy_entity(estore["e2"])
+    assert eids(spatial.at("z1", 2, 1)) == ["e3"]
+
+    # Detached components no longer report changes
+    loc = e3[Loc]
+    e3.remove(loc)
+    loc.x = 1
+    assert eids(spatial.at("z1", 1, 1)) == ["e1"]
+
+
+def test_SpatialIndex_in_rect_and_radius():
+    estore = EntityStore()
+    spatial = SpatialIndex.of(estore, Zone, "zone_id")
+    for x in range(10):
+        for y in range(10):
+            ent = estore.create_entity()
+            ent.add(Zone(zone_id="z"))
+            ent.add(Loc(x=x, y=y))
+
+    assert len(spatial.in_rect("z", 2, 3, 3, 2)) == 6
+    assert len(spatial.in_rect("z", 8, 8, 5, 5)) == 4
+    assert len(spatial.in_rect("z", -100, -100, 1000, 1000)) == 100  # walks the zone instead
+    assert spatial.in_rect("nope", 0, 0, 5, 5) == []
+
+    near = spatial.in_radius("z", 5, 5, 1)
+    assert sorted((e[Loc].x, e[Loc].y) for e in near) == [(4, 5), (5, 4), (5, 5), (5, 6), (6, 5)]